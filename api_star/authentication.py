@@ -1,14 +1,94 @@
-from api_star.compat import Base64DecodeError
+from api_star.compat import Base64DecodeError, text_type
 from api_star.exceptions import Unauthorized
+from api_star.utils import LRUCache
 import base64
+import hashlib
+import hmac
+import os
 
 
-def basic_auth(lookup_username):
+_not_cached = object()
+
+
+def get_authorization_header(request):
+    """
+    Return the 'Authorization' header of the request as a bytestring.
+    Some frameworks provide header values as text rather than bytes.
+    """
+    header = request.headers.get('Authorization', b'')
+    if isinstance(header, text_type):
+        header = header.encode('iso-8859-1')
+    return header
+
+
+class CredentialCache(object):
+    """
+    Caches the results of the credential lookups made by `basic_auth()`
+    and `token_auth()`, so that repeated requests from the same client
+    do not need to call the lookup function each time.
+
+    Entries are keyed on an HMAC of the credentials, using a random
+    per-process secret, so the plaintext credentials are never stored.
+
+    Failed lookups are also cached, with a shorter `negative_ttl`, which
+    limits the load from repeated attempts with incorrect credentials.
+    """
+    def __init__(self, max_size=1024, ttl=60, negative_ttl=5):
+        self.negative_ttl = negative_ttl
+        self._cache = LRUCache(max_size=max_size, ttl=ttl)
+        self._secret = os.urandom(32)
+
+    @property
+    def hits(self):
+        return self._cache.hits
+
+    @property
+    def misses(self):
+        return self._cache.misses
+
+    def get_key(self, *credentials):
+        message = '\x00'.join(credentials).encode('utf-8')
+        return hmac.new(self._secret, message, hashlib.sha256).digest()
+
+    def lookup(self, credentials, lookup):
+        """
+        Return the cached result for the given credentials, or call
+        `lookup()` and cache the result.
+        """
+        key = self.get_key(*credentials)
+        auth = self._cache.get(key, _not_cached)
+        if auth is _not_cached:
+            auth = lookup()
+            ttl = self.negative_ttl if (auth is None) else None
+            self._cache.set(key, auth, ttl=ttl)
+        return auth
+
+    def invalidate(self, *credentials):
+        """
+        Remove the cached result for the given credentials.
+        """
+        self._cache.delete(self.get_key(*credentials))
+
+    def invalidate_auth(self, auth):
+        """
+        Remove any cached credentials that resolved to the given user.
+        For example, when the user changes their password.
+        """
+        self._cache.delete_value(auth)
+
+    def clear(self):
+        self._cache.clear()
+
+
+def basic_auth(lookup_username, cache=None):
     """
     HTTP Basic Authentication.
 
     `lookup_username` - A `function(username, password)` that returns a
                         user instance of some kind, or `None`.
+    `cache` - An optional `CredentialCache` instance. Use
+              `authenticator.invalidate(username, password)` to remove
+              a cached lookup.
     """
     errors = {
         'invalid-header': 'Invalid basic authorization header.',
@@ -16,7 +96,7 @@ def basic_auth(lookup_username):
     }
 
     def authenticator(request):
-        header = request.headers.get('Authorization', '').split()
+        header = get_authorization_header(request).split()
 
         if not header or header[0].lower() != b'basic':
             # Basic authentication credentials were not included in request.
@@ -34,21 +114,31 @@ def basic_auth(lookup_username):
         if not delimiter:
             raise Unauthorized(errors['invalid-header'])
 
-        auth = lookup_username(username=username, password=password)
+        if cache is None:
+            auth = lookup_username(username=username, password=password)
+        else:
+            auth = cache.lookup(
+                ('basic', username, password),
+                lambda: lookup_username(username=username, password=password)
+            )
         if auth is None:
             raise Unauthorized(errors['incorrect-credentials'])
 
         return auth
 
+    if cache is not None:
+        authenticator.invalidate = lambda username, password: cache.invalidate('basic', username, password)
     return authenticator
 
 
-def token_auth(lookup_token):
+def token_auth(lookup_token, cache=None):
     """
     A simple token-based authentication scheme.
 
     `lookup_token` - A `function(token)` that returns a user instance of some
                      kind, or `None`.
+    `cache` - An optional `CredentialCache` instance. Use
+              `authenticator.invalidate(token)` to remove a cached lookup.
     """
     errors = {
         'invalid-header': 'Invalid token authorization header.',
@@ -56,7 +146,7 @@ def token_auth(lookup_token):
     }
 
     def authenticator(request):
-        header = request.headers.get('Authorization', '').split()
+        header = get_authorization_header(request).split()
 
         if not header or header[0].lower() != b'token':
             # Token authentication credentials were not included in request.
@@ -67,10 +157,15 @@ def token_auth(lookup_token):
 
         token = header[1].decode('iso-8859-1')
 
-        auth = lookup_token(token)
+        if cache is None:
+            auth = lookup_token(token)
+        else:
+            auth = cache.lookup(('token', token), lambda: lookup_token(token))
         if auth is None:
             raise Unauthorized(errors['incorrect-credentials'])
 
         return auth
 
+    if cache is not None:
+        authenticator.invalidate = lambda token: cache.invalidate('token', token)
     return authenticator
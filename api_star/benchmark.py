@@ -0,0 +1,232 @@
+"""
+An in-process load generator, for measuring the framework overhead of an
+API, without the cost of a network or an HTTP client.
+
+Requests are made by calling the WSGI application directly, with environs
+built by `api_star.test.get_environ()`.
+
+    from api_star.benchmark import request, run
+
+    script = [
+        request('GET', '/notes/'),
+        request('POST', '/notes/', json={'description': 'Do something'}),
+    ]
+    result = run(app, script, requests=10000, concurrency=4)
+    print(result)
+"""
+from api_star.compat import monotonic, string_types, urlencode
+from api_star.test import Content, get_environ
+from collections import namedtuple
+from json import dumps as json_dumps
+import importlib
+import multiprocessing
+import threading
+
+
+Request = namedtuple('Request', ['method', 'path', 'query_string', 'headers', 'body'])
+
+
+def request(method, path, params=None, json=None, headers=None, body=b''):
+    """
+    Return a scripted `Request`.
+
+    `params` - A dictionary of query parameters.
+    `json` - Data to send as a JSON encoded request body.
+    """
+    headers = dict(headers or {})
+    if json is not None:
+        body = json_dumps(json).encode('utf-8')
+        headers['Content-Type'] = 'application/json'
+    query_string = urlencode(params or {})
+    return Request(method, path, query_string, headers, body)
+
+
+def load_app(app):
+    """
+    Return a WSGI application, given either the application itself,
+    or an import string such as 'examples.todo_flask:app'.
+    """
+    if not isinstance(app, string_types):
+        return app
+    module_name, sep, attribute = app.partition(':')
+    module = importlib.import_module(module_name)
+    return getattr(module, attribute or 'app')
+
+
+def call(app, template, body):
+    """
+    Make a single request, given a template environ and the request body.
+    Returns the response status code.
+    """
+    environ = template.copy()
+    environ['wsgi.input'] = Content(body)
+    status = []
+
+    def start_response(status_line, headers, exc_info=None):
+        status.append(status_line)
+
+    result = app(environ, start_response)
+    try:
+        for chunk in result:
+            pass
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return int(status[-1][:3])
+
+
+def worker(app, script, count, offset=0):
+    """
+    Make `count` requests, cycling through the script. Returns a two-tuple
+    of (latencies, status_counts).
+    """
+    app = load_app(app)
+    # The environs are built once, and copied for each request.
+    templates = [
+        (get_environ(item.method, item.path, item.query_string, item.headers, item.body), item.body)
+        for item in script
+    ]
+    latencies = []
+    statuses = {}
+    length = len(templates)
+    for idx in range(offset, offset + count):
+        template, body = templates[idx % length]
+        start = monotonic()
+        status = call(app, template, body)
+        latencies.append(monotonic() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+    return (latencies, statuses)
+
+
+def _process_worker(args):
+    return worker(*args)
+
+
+def percentile(ordered, percent):
+    """
+    Return the nearest-rank percentile of an ordered list.
+    """
+    if not ordered:
+        return None
+    index = max(int(round(percent / 100.0 * len(ordered))) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+class Result(object):
+    """
+    The results of a benchmark run. Latencies are in seconds.
+    """
+    def __init__(self, latencies, statuses, duration, concurrency, mode):
+        self.latencies = sorted(latencies)
+        self.statuses = statuses
+        self.duration = duration
+        self.concurrency = concurrency
+        self.mode = mode
+
+    @property
+    def requests(self):
+        return len(self.latencies)
+
+    @property
+    def throughput(self):
+        return self.requests / self.duration if self.duration else 0.0
+
+    @property
+    def errors(self):
+        return sum(count for status, count in self.statuses.items() if status >= 500)
+
+    def percentile(self, percent):
+        return percentile(self.latencies, percent)
+
+    def as_dict(self):
+        return {
+            'requests': self.requests,
+            'concurrency': self.concurrency,
+            'mode': self.mode,
+            'duration': self.duration,
+            'throughput': self.throughput,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'statuses': dict((str(key), value) for key, value in self.statuses.items())
+        }
+
+    def __str__(self):
+        return '%d requests, %d %s(s): %.0f req/s, p50 %.3f ms, p95 %.3f ms, p99 %.3f ms' % (
+            self.requests,
+            self.concurrency,
+            self.mode,
+            self.throughput,
+            self.percentile(50) * 1000,
+            self.percentile(95) * 1000,
+            self.percentile(99) * 1000
+        )
+
+
+def run(app, script, requests=1000, concurrency=1, mode='thread', warmup=100):
+    """
+    Replay the script against the application, and return a `Result`.
+
+    `app` - A WSGI application, or an import string. Required to be an
+            import string when `mode='process'`.
+    `script` - A list of `Request` instances, that are made in turn.
+               Repeat entries to weight the mix of requests.
+    `requests` - The total number of requests to make.
+    `concurrency` - The number of threads or processes making requests.
+    `mode` - Either 'thread' or 'process'.
+    `warmup` - A number of requests to make before measuring, so that any
+               lazy setup is not included in the results.
+    """
+    if mode not in ('thread', 'process'):
+        raise ValueError('mode must be either "thread" or "process".')
+    if mode == 'process' and not isinstance(app, string_types):
+        raise ValueError('mode="process" requires the app as an import string.')
+    if not script:
+        raise ValueError('The script must include at least one request.')
+
+    counts = [requests // concurrency] * concurrency
+    for idx in range(requests % concurrency):
+        counts[idx] += 1
+    offsets = [sum(counts[:idx]) for idx in range(concurrency)]
+
+    if mode == 'thread':
+        app = load_app(app)
+        if warmup:
+            worker(app, script, warmup)
+        results = [None] * concurrency
+
+        def target(idx):
+            results[idx] = worker(app, script, counts[idx], offsets[idx])
+
+        threads = [
+            threading.Thread(target=target, args=(idx,))
+            for idx in range(concurrency)
+        ]
+        start = monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duration = monotonic() - start
+    else:
+        pool = multiprocessing.Pool(concurrency)
+        try:
+            if warmup:
+                pool.map(_process_worker, [(app, script, warmup)] * concurrency)
+            start = monotonic()
+            results = pool.map(_process_worker, [
+                (app, script, counts[idx], offsets[idx])
+                for idx in range(concurrency)
+            ])
+            duration = monotonic() - start
+        finally:
+            pool.close()
+            pool.join()
+
+    latencies = []
+    statuses = {}
+    for worker_latencies, worker_statuses in results:
+        latencies.extend(worker_latencies)
+        for status, count in worker_statuses.items():
+            statuses[status] = statuses.get(status, 0) + count
+    return Result(latencies, statuses, duration, concurrency, mode)
@@ -0,0 +1,218 @@
+"""
+Caching of rendered responses, for expensive views that are safe to reuse.
+
+    from api_star.cache import cached, invalidate
+
+    @app.get('/notes/{note_id}/')
+    @cached(ttl=60, tags=['notes', 'note:{note_id}'])
+    def read_note(note_id):
+        ...
+
+    @app.put('/notes/{note_id}/')
+    def update_note(note_id, description):
+        ...
+        invalidate('notes', 'note:%s' % note_id)
+
+Responses are cached for each combination of route, view parameters,
+negotiated renderer and content encoding, and for each `request.auth` if
+the route has any authenticators. Permissions are still checked for every
+request, before the cache is used.
+"""
+from api_star.compat import string_types
+from api_star.introspection import get_path_variables
+from api_star.utils import LRUCache
+import string
+import threading
+import warnings
+
+
+def get_request_key(endpoint, params, request, compression=None, version=None, vary_on_auth=False):
+    """
+    Return a key identifying the response to a request, or `None` if the
+    request parameters cannot be used as a key.
+
+    The key includes the view parameters, the negotiated renderer and content
+    encoding, any view-supplied version, and optionally `request.auth`.
+    """
+    renderer = request.renderer or request.renderers[0]
+    encoding = None if (compression is None) else compression.negotiate(request)
+    key = (endpoint, tuple(sorted(params.items())), renderer, encoding, version)
+    if vary_on_auth:
+        auth = request.auth
+        if callable(vary_on_auth):
+            auth = vary_on_auth(auth)
+        elif auth is not None and not isinstance(auth, string_types + (int, tuple)):
+            # Other types may be unhashable, or hash by identity, so that
+            # the key would never match another request.
+            warnings.warn(
+                'Responses to %s are not shared, as request.auth is a %s. Pass a '
+                'function that returns a hashable identity for the auth, such as '
+                '`lambda user: user.id`.' % (endpoint, type(auth).__name__),
+                RuntimeWarning
+            )
+            return None
+        key += (auth,)
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+class ResponseCache(object):
+    """
+    A size-bounded cache of rendered responses, that evicts the least
+    recently used entries first.
+
+    `max_size` - The maximum number of cached responses.
+    `ttl` - The default number of seconds that a response is cached for,
+            or `None` to cache responses until they are evicted or invalidated.
+    """
+    def __init__(self, max_size=1024, ttl=None):
+        self._entries = LRUCache(max_size=max_size, ttl=ttl, on_evict=self._evicted)
+        self._tags = {}  # {tag: set of keys}
+        self._key_tags = {}  # {key: tuple of tags}
+        self._lock = threading.RLock()
+
+    @property
+    def hits(self):
+        return self._entries.hits
+
+    @property
+    def misses(self):
+        return self._entries.misses
+
+    def get(self, key):
+        """
+        Return the cached `(content, content_type, etag, content_encoding)`
+        for the given key, or `None`.
+        """
+        if key is None:
+            return None
+        return self._entries.get(key)
+
+    def set(self, key, entry, ttl=None, tags=()):
+        with self._lock:
+            self._remove_tags(key)
+            if tags:
+                self._key_tags[key] = tuple(tags)
+                for tag in tags:
+                    self._tags.setdefault(tag, set()).add(key)
+            self._entries.set(key, entry, ttl=ttl)
+
+    def invalidate(self, *tags):
+        """
+        Remove every cached response with any of the given tags.
+        """
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys.update(self._tags.get(tag, ()))
+            for key in keys:
+                self._remove_tags(key)
+                self._entries.delete(key)
+
+    def clear(self):
+        with self._lock:
+            self._tags.clear()
+            self._key_tags.clear()
+            self._entries.clear()
+
+    def _evicted(self, key):
+        # Forget the tags of evicted or expired responses, unless the
+        # key has since been set again.
+        with self._lock:
+            if key not in self._entries:
+                self._remove_tags(key)
+
+    def _remove_tags(self, key):
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def info(self):
+        info = self._entries.info()
+        info['tags'] = len(self._tags)
+        return info
+
+
+# The cache used by `@cached()`, unless another cache is given.
+response_cache = ResponseCache()
+
+
+def invalidate(*tags):
+    """
+    Remove every response in the default cache with any of the given tags.
+    """
+    response_cache.invalidate(*tags)
+
+
+class CachePolicy(object):
+    """
+    The caching options for a single view, set by `@cached()`.
+    """
+    def __init__(self, cache, ttl=None, tags=(), vary_on_auth=False):
+        self.cache = cache
+        self.ttl = ttl
+        self.tags = tuple(tags)
+        self.vary_on_auth = vary_on_auth
+
+    def get_key(self, endpoint, params, request, compression=None, version=None):
+        return get_request_key(endpoint, params, request, compression, version, self.vary_on_auth)
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, entry, params):
+        tags = [tag.format(**params) for tag in self.tags]
+        self.cache.set(key, entry, ttl=self.ttl, tags=tags)
+
+
+def cached(ttl=None, tags=(), vary_on_auth=None, cache=None):
+    """
+    Cache the rendered responses of a `GET` view. Must be applied
+    beneath the route decorator.
+
+    `ttl` - The number of seconds to cache each response for. Defaults to
+            the `ttl` of the cache.
+    `tags` - Tags for invalidating the cached responses. May include path
+             parameters, such as 'note:{note_id}'.
+    `vary_on_auth` - Cache separate responses for each `request.auth`. May be
+                     a function that returns a hashable identity for the auth.
+                     Defaults to `True` if the route has any authenticators.
+    `cache` - The `ResponseCache` to use. Defaults to `response_cache`.
+    """
+    def decorator(func):
+        func.cache_policy = CachePolicy(
+            response_cache if (cache is None) else cache, ttl, tags, vary_on_auth
+        )
+        return func
+    return decorator
+
+
+def get_cache_policy(func, url, method, authenticators=None):
+    """
+    Return the `CachePolicy` for a view, or `None` if it is not cached.
+    """
+    policy = getattr(func, 'cache_policy', None)
+    if policy is None:
+        return None
+    if method != 'GET':
+        raise RuntimeError(
+            '@cached() may only be applied to GET routes, not %s %s' % (method, url)
+        )
+    path_variables = get_path_variables(url)
+    for tag in policy.tags:
+        for literal, field_name, format_spec, conversion in string.Formatter().parse(tag):
+            if field_name is not None and field_name not in path_variables:
+                raise RuntimeError(
+                    '@cached() tag "%s" of %s does not match any path '
+                    'parameters in the URL %s' % (tag, func, url)
+                )
+    if policy.vary_on_auth is None:
+        # Responses are only shared between users if there is no authentication.
+        policy = CachePolicy(policy.cache, policy.ttl, policy.tags, bool(authenticators))
+    return policy
@@ -0,0 +1,142 @@
+"""
+Single-flight coalescing of identical concurrent requests.
+
+Routes opt in with `coalesce=True`. While a request is being handled, any
+identical requests to the same route wait for it to complete, and share
+its rendered response, rather than each calling the view.
+
+    @app.get('/reports/{report_id}/', coalesce=True)
+    def read_report(report_id):
+        ...
+
+Requests are identical if they have the same view parameters, negotiated
+renderer and content encoding. If the route has any authenticators they must
+also have the same `request.auth`. Pass a function as `coalesce=...` to map
+the auth onto a hashable identity, such as `lambda user: user.id`.
+"""
+from api_star.cache import get_request_key
+import threading
+
+
+class Flight(object):
+    """
+    A single in-flight call, that any number of threads may wait on.
+    """
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class Coalescer(object):
+    """
+    Runs at most one call at a time for each key. Concurrent calls with
+    the same key wait for the first call, and receive the same result,
+    or have the same exception raised.
+
+    `calls` counts the calls that were run, and `coalesced` counts the
+    calls that shared the result of another call, for each endpoint.
+    """
+    def __init__(self):
+        self.calls = {}
+        self.coalesced = {}
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def _count(self, counts, endpoint):
+        counts[endpoint] = counts.get(endpoint, 0) + 1
+
+    def run(self, endpoint, key, func, *args):
+        """
+        Return `func(*args)`, or the result of an identical call that is
+        already in flight.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = Flight()
+                self._flights[key] = flight
+                self._count(self.calls, endpoint)
+                leader = True
+            else:
+                self._count(self.coalesced, endpoint)
+                leader = False
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = func(*args)
+        except Exception as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.event.set()
+        return flight.result
+
+    def info(self):
+        with self._lock:
+            return {
+                'in_flight': len(self._flights),
+                'calls': sum(self.calls.values()),
+                'coalesced': sum(self.coalesced.values()),
+                'endpoints': dict(
+                    (endpoint, {
+                        'calls': self.calls.get(endpoint, 0),
+                        'coalesced': self.coalesced.get(endpoint, 0)
+                    })
+                    for endpoint in set(self.calls) | set(self.coalesced)
+                )
+            }
+
+    def clear(self):
+        with self._lock:
+            self.calls = {}
+            self.coalesced = {}
+
+
+class CoalescePolicy(object):
+    """
+    The coalescing options for a single route, set by `coalesce=...`.
+    """
+    def __init__(self, vary_on_auth=False):
+        self.vary_on_auth = vary_on_auth
+
+    def get_key(self, endpoint, params, request, compression=None, version=None,
+                cache_policy=None, cache_key=None):
+        """
+        Return the key that identical requests share, or `None` if the
+        request should not be coalesced.
+        """
+        cached = cache_policy is not None and cache_key is not None
+        if cached and (cache_policy.vary_on_auth or not self.vary_on_auth):
+            # The cache key already distinguishes the requests as required.
+            return cache_key
+        return get_request_key(endpoint, params, request, compression, version, self.vary_on_auth)
+
+
+def get_coalesce_policy(coalesce, url, method, authenticators=None):
+    """
+    Return the `CoalescePolicy` for a route, or `None` if it does not
+    coalesce requests.
+
+    `coalesce` - Either `True`, or a function that returns a hashable
+                 identity for `request.auth`.
+    """
+    if not coalesce:
+        return None
+    if method != 'GET':
+        raise RuntimeError(
+            'coalesce= may only be used with GET routes, not %s %s' % (method, url)
+        )
+    if callable(coalesce):
+        return CoalescePolicy(vary_on_auth=coalesce)
+    # Responses are only shared between users if there is no authentication.
+    return CoalescePolicy(vary_on_auth=bool(authenticators))
@@ -1,6 +1,7 @@
 import binascii
 import inspect
 import sys
+import time
 
 
 PY3 = sys.version_info[0] == 3
@@ -12,7 +13,7 @@ if PY3:
     COMPACT_SEPARATORS = (',', ':')   # Compact JSON
     VERBOSE_SEPARATORS = (',', ': ')  # Indented JSON
 
-    from urllib.parse import urlparse  # noqa
+    from urllib.parse import urlencode, urlparse  # noqa
 
     def copy_signature(copy_from, copy_to):
         copy_to.__signature__ = inspect.signature(copy_from)
@@ -22,12 +23,18 @@ if PY3:
 
     Base64DecodeError = binascii.Error
 
+    monotonic = time.monotonic
+    monotonic_ns = getattr(time, 'monotonic_ns', None) or (
+        lambda: int(time.monotonic() * 1e9)
+    )
+
 else:
     string_types = (type(b''), type(u''))
     text_type = unicode  # noqa
     COMPACT_SEPARATORS = (b',', b':')   # Compact JSON
     VERBOSE_SEPARATORS = (b',', b': ')  # Indented JSON
 
+    from urllib import urlencode  # noqa
     from urlparse import urlparse  # noqa
 
     def copy_signature(copy_from, copy_to):
@@ -40,3 +47,6 @@ else:
         return getattr(func, '_argspec', inspect.getargspec(func))
 
     Base64DecodeError = TypeError
+
+    monotonic = time.time
+    monotonic_ns = lambda: int(time.time() * 1e9)  # noqa
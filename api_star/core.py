@@ -1,5 +1,30 @@
 from api_star.compat import string_types, text_type
 from api_star.exceptions import Forbidden
+from api_star.utils import LRUCache
+from collections import namedtuple
+import hashlib
+import zlib
+
+
+FieldPlan = namedtuple('FieldPlan', ['path', 'query', 'form', 'body'])
+Rendered = namedtuple('Rendered', ['content', 'content_type', 'etag', 'encoding'])
+NotModified = namedtuple('NotModified', ['etag'])
+
+
+def get_field_plan(link):
+    """
+    Given a CoreAPI `Link`, return a `FieldPlan` of the field names
+    grouped by location.
+
+    This is built once when the route is registered, so that extracting
+    the view parameters only does the work the route actually needs.
+    """
+    locations = {'path': [], 'query': [], 'form': [], 'body': []}
+    for field in link.fields:
+        locations[field.location].append(field.name)
+    return FieldPlan(**{
+        location: tuple(names) for location, names in locations.items()
+    })
 
 
 def check_permissions(request, permissions):
@@ -8,6 +33,18 @@ def check_permissions(request, permissions):
             raise Forbidden()
 
 
+def get_content_type(renderer):
+    """
+    Return the 'Content-Type' header for responses from the given renderer.
+    """
+    if not renderer.media_type:
+        return None
+    content_type = '%s' % renderer.media_type
+    if renderer.charset:
+        content_type += '; charset=%s' % renderer.charset
+    return content_type
+
+
 def render(request, data):
     """
     Given the incoming request, and the outgoing data,
@@ -26,11 +63,324 @@ def render(request, data):
     if isinstance(content, text_type) and renderer.charset:
         content = content.encode(renderer.charset)
 
-    if renderer.media_type:
-        content_type = '%s' % renderer.media_type
-        if renderer.charset:
-            content_type += '; charset=%s' % renderer.charset
-    else:
-        content_type = None
+    return (content, get_content_type(renderer))
+
+
+def get_etag(content):
+    """
+    Return a strong 'ETag' header value for the given content.
+    """
+    return '"%s"' % hashlib.sha1(content).hexdigest()
+
+
+def get_version_etag(version, request, compression=None):
+    """
+    Return a strong 'ETag' header value for a view-supplied version token.
+    The tag differs for each renderer and content encoding, as each is a
+    different representation of the same version.
+    """
+    renderer = request.renderer or request.renderers[0]
+    key = '%s:%s' % (version, renderer.media_type)
+    if compression is not None:
+        key += ':%s' % compression.negotiate(request)
+    return '"%s"' % hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def get_etag_version(etag, url, method):
+    """
+    Return the view-supplied version function given by `etag=...`, or `None`
+    if the 'ETag' is a hash of the content, or the route has no 'ETag'.
+    """
+    if not etag:
+        return None
+    if method not in ('GET', 'HEAD'):
+        raise RuntimeError(
+            'etag= may only be used with GET or HEAD routes, not %s %s' % (method, url)
+        )
+    return etag if callable(etag) else None
+
+
+def get_vary(compression=None):
+    """
+    Return the 'Vary' header value for a negotiated response, that may be
+    cached and reused, such as the schema or a `@cached()` view.
+    """
+    if compression is None:
+        return 'Accept'
+    return 'Accept, Accept-Encoding'
+
+
+def etag_matches(if_none_match, etag):
+    """
+    Returns `True` if the value of an 'If-None-Match' header matches the
+    given 'ETag', in which case a '304 Not Modified' response may be sent.
+    """
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag == etag or tag == '*':
+            return True
+    return False
+
+
+def render_entry(request, data, compression=None, etag=None):
+    """
+    Render and compress the outgoing data, in a form that may be cached
+    and sent again for later requests.
+
+    Returns a `Rendered` four-tuple of `(content, content_type, etag, encoding)`.
+    The 'ETag' is a hash of the content, unless one is given.
+    """
+    content, content_type = render(request, data)
+    encoding = None
+    if compression is not None:
+        content, encoding = compression.compress(content, compression.negotiate(request))
+    if etag is None:
+        etag = get_etag(content)
+    return Rendered(content, content_type, etag, encoding)
+
+
+def render_cached(request, data, cache, compression=None):
+    """
+    Render the outgoing data, reusing any content that was previously
+    rendered for the negotiated renderer and content encoding. Only
+    suitable for data that does not change, such as the API schema.
+
+    Returns a four-tuple of `(content, content_type, etag, content_encoding)`.
+    """
+    renderer = request.renderer or request.renderers[0]
+    encoding = None if (compression is None) else compression.negotiate(request)
+    key = (renderer, encoding)
+    try:
+        return cache[key]
+    except KeyError:
+        pass
+
+    cache[key] = render_entry(request, data, compression)
+    return cache[key]
+
+
+class ResponsePipeline(object):
+    """
+    The conditional request, caching and coalescing options of a single
+    route, given by `etag=...`, `@cached()` and `coalesce=...`.
+
+    Each framework calls `start()` for every request, and only calls the
+    view, and constructs the responses, itself.
+    """
+    def __init__(self, endpoint, etag=False, version=None, cache_policy=None, coalescing=None):
+        self.endpoint = endpoint
+        self.etag = bool(etag)
+        self.version = version
+        self.cache_policy = cache_policy
+        self.coalescing = coalescing
+
+    def start(self, request, params, compression=None):
+        return PendingResponse(self, request, params, compression)
+
+
+class PendingResponse(object):
+    """
+    The state of a single request through a `ResponsePipeline`.
+    """
+    __slots__ = ('pipeline', 'request', 'params', 'compression', 'etag', 'cache_key', 'coalesce_key')
+
+    def __init__(self, pipeline, request, params, compression=None):
+        self.pipeline = pipeline
+        self.request = request
+        self.params = params
+        self.compression = compression
+        self.etag = None
+        self.cache_key = None
+        self.coalesce_key = None
+
+    def lookup(self):
+        """
+        Return a `NotModified` or `Rendered` response if the request can be
+        answered without calling the view, or `None`.
+
+        Sets `coalesce_key` if identical requests should share the view call.
+        """
+        pipeline = self.pipeline
+        request = self.request
+        if pipeline.version is not None:
+            # A view-supplied version allows a conditional request
+            # to be answered without calling the view at all.
+            self.etag = get_version_etag(pipeline.version(**self.params), request, self.compression)
+            if etag_matches(request.headers.get('If-None-Match'), self.etag):
+                return NotModified(self.etag)
+
+        policy = pipeline.cache_policy
+        if policy is not None:
+            self.cache_key = policy.get_key(pipeline.endpoint, self.params, request, self.compression, self.etag)
+            entry = policy.get(self.cache_key)
+            if entry is not None:
+                return entry
+
+        if pipeline.coalescing is not None:
+            self.coalesce_key = pipeline.coalescing.get_key(
+                pipeline.endpoint, self.params, request, self.compression,
+                self.etag, policy, self.cache_key
+            )
+        return None
+
+    def render(self, data):
+        """
+        Render the data returned by the view, storing it in the cache if
+        the route is cached. Coalesced requests share the returned `Rendered`
+        entry, so that the data is only rendered once.
+        """
+        if is_streaming(data):
+            data = list(data)
+        entry = render_entry(self.request, data, self.compression, self.etag)
+        if self.cache_key is not None:
+            self.pipeline.cache_policy.set(self.cache_key, entry, self.params)
+        return entry
+
+    def finish(self, data):
+        """
+        Given the renderable data returned by the view, or shared by a
+        coalesced request, return either a `Rendered` entry, or the data
+        if it should be rendered as a regular response.
+        """
+        if isinstance(data, Rendered):
+            return data
+        if self.cache_key is not None and not is_streaming(data):
+            return self.render(data)
+        return data
+
+    def get_etag(self, content):
+        """
+        Return the 'ETag' for the rendered content of a regular response,
+        or `None` if the route does not send one.
+        """
+        if self.etag is not None:
+            return self.etag
+        if self.pipeline.etag and isinstance(content, bytes):
+            return get_etag(content)
+        return None
+
+    def not_modified(self, etag):
+        """
+        Returns `True` if a '304 Not Modified' response may be sent,
+        given the 'ETag' of the rendered content.
+        """
+        return etag is not None and etag_matches(self.request.headers.get('If-None-Match'), etag)
+
+
+class Compression(object):
+    """
+    Response compression, negotiated using the request 'Accept-Encoding'
+    header.
+
+    `level` - The zlib compression level, from 1 (fastest) to 9 (smallest).
+    `threshold` - Responses smaller than this many bytes are not compressed.
+    `encodings` - The supported encodings, in order of preference.
+    """
+    wbits = {
+        'gzip': 16 + zlib.MAX_WBITS,
+        'deflate': zlib.MAX_WBITS
+    }
+
+    def __init__(self, level=6, threshold=1024, encodings=('gzip', 'deflate')):
+        for encoding in encodings:
+            if encoding not in self.wbits:
+                raise ValueError('Unsupported content encoding "%s".' % encoding)
+        self.level = level
+        self.threshold = threshold
+        self.encodings = tuple(encodings)
+        self._cache = LRUCache(max_size=64)
+
+    def negotiate(self, request):
+        """
+        Return the content encoding to use for the response,
+        or `None` if the response should not be compressed.
+        """
+        accept_encoding = request.headers.get('Accept-Encoding')
+        if not accept_encoding:
+            return None
+        encoding = self._cache.get(accept_encoding, False)
+        if encoding is False:
+            encoding = self._select_encoding(accept_encoding)
+            self._cache.set(accept_encoding, encoding)
+        return encoding
+
+    def _select_encoding(self, accept_encoding):
+        qualities = {}
+        for item in accept_encoding.split(','):
+            coding, sep, params = item.partition(';')
+            coding = coding.strip().lower()
+            quality = 1.0
+            for param in params.split(';'):
+                key, sep, value = param.partition('=')
+                if key.strip().lower() == 'q':
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.0
+            qualities[coding] = quality
+
+        selected = None
+        selected_quality = 0.0
+        for encoding in self.encodings:
+            quality = qualities.get(encoding, qualities.get('*', 0.0))
+            if quality > selected_quality:
+                selected, selected_quality = encoding, quality
+        return selected
+
+    def _compressobj(self, encoding):
+        # The gzip header written by zlib has no timestamp, so the same
+        # content is always compressed to the same bytes.
+        return zlib.compressobj(self.level, zlib.DEFLATED, self.wbits[encoding])
+
+    def compress(self, content, encoding):
+        """
+        Compress the content, unless it is smaller than the threshold.
+        Returns a two-tuple of `(content, content_encoding)`.
+        """
+        if encoding is None or len(content) < self.threshold:
+            return (content, None)
+        compressor = self._compressobj(encoding)
+        return (compressor.compress(content) + compressor.flush(), encoding)
+
+    def compress_stream(self, chunks, encoding):
+        """
+        Compress an iterator of content chunks. Each chunk is flushed, so that
+        clients receive data as soon as it has been rendered.
+        """
+        compressor = self._compressobj(encoding)
+        for chunk in chunks:
+            compressed = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
+
+def is_streaming(data):
+    """
+    Returns `True` if the outgoing data is an iterator, such as a generator,
+    that should be rendered as a streaming response.
+    """
+    return hasattr(data, '__next__') or hasattr(data, 'next')
+
+
+def render_stream(request, data):
+    """
+    Given the incoming request, and an iterator of outgoing items,
+    determine the content type and an iterator of encoded content chunks.
+
+    Renderers that support streaming provide a `stream` attribute. For any
+    other renderer the items are collected and rendered as a single list.
+    """
+    renderer = request.renderer or request.renderers[0]
+    stream = getattr(renderer, 'stream', None)
+
+    if stream is None:
+        content, content_type = render(request, list(data))
+        return (iter([content]), content_type)
 
-    return (content, content_type)
+    context = {'request': request}
+    return (stream(data, **context), get_content_type(renderer))
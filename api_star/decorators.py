@@ -1,5 +1,6 @@
-from api_star.compat import copy_signature, getargspec
+from api_star.compat import copy_signature
 from api_star.exceptions import ValidationError
+from api_star.introspection import get_view_info
 from functools import wraps
 
 
@@ -16,7 +17,7 @@ def validate(**validated):
         """
         # Ensure that the arguments to `@validate(...)` match the signature
         # of the function that it has been applied too.
-        arg_names = getargspec(func).args
+        arg_names = get_view_info(func).arg_names
 
         for key in validated.keys():
             if key not in arg_names:
@@ -26,33 +27,74 @@ def validate(**validated):
                     (key, func)
                 )
 
-        @wraps(func)  # `wraps` preserves the function name etc...
-        def wrapper(*args, **kwargs):
+        # Precompute the position of each validated argument, so that each
+        # call only needs to look at the validated arguments.
+        plan = tuple(
+            (key, arg_names.index(key), validator)
+            for key, validator in validated.items()
+        )
+
+        def validate_params(kwargs):
             """
-            3. When a function decorated by `@validate()` is called, this
-               wrapper function is what actaully gets executed.
+            Validate any inputs as required, updating `kwargs` in place.
             """
-            # Turn any positional arguments into keyword arguments instead.
-            for idx, value in enumerate(args):
-                key = arg_names[idx]
-                kwargs[key] = value
-
-            # Validate any inputs as required, collecting any errors.
-            errors = {}
-            for key, value in kwargs.items():
-                if key in validated:
-                    validator = validated[key]
+            errors = None
+            for key, position, validator in plan:
+                if key in kwargs:
                     try:
-                        kwargs[key] = validator(value)
+                        kwargs[key] = validator(kwargs[key])
                     except ValidationError as exc:
+                        if errors is None:
+                            errors = {}
                         errors[key] = exc.description
 
             # If any errors occured, then fail.
             if errors:
                 raise ValidationError(errors)
 
+        @wraps(func)  # `wraps` preserves the function name etc...
+        def wrapper(*args, **kwargs):
+            """
+            3. When a function decorated by `@validate()` is called, this
+               wrapper function is what actaully gets executed.
+            """
+            if args:
+                # Validate any positional arguments in place.
+                args = list(args)
+                num_args = len(args)
+                errors = None
+                for key, position, validator in plan:
+                    if position < num_args:
+                        value = args[position]
+                    elif key in kwargs:
+                        value = kwargs[key]
+                    else:
+                        continue
+                    try:
+                        value = validator(value)
+                    except ValidationError as exc:
+                        if errors is None:
+                            errors = {}
+                        errors[key] = exc.description
+                        continue
+                    if position < num_args:
+                        args[position] = value
+                    else:
+                        kwargs[key] = value
+                if errors:
+                    raise ValidationError(errors)
+            else:
+                validate_params(kwargs)
+
             # Call the underlying function.
-            return func(**kwargs)
+            return func(*args, **kwargs)
+
+        # Allow the validation and the function call to be timed separately.
+        # `wraps()` copies these attributes onto any outer decorators, so
+        # `validate_params.wrapper` identifies the function they belong to.
+        wrapper.validate_params = validate_params
+        wrapper.__wrapped__ = func
+        validate_params.wrapper = wrapper
 
         # Preserve the function signature.
         copy_signature(func, wrapper)
@@ -37,6 +37,11 @@ class NotFound(APIException):
     description = 'No resource could be found at this URL.'
 
 
+class MethodNotAllowed(APIException):
+    code = 405
+    description = 'Method not allowed.'
+
+
 class NotAcceptable(APIException):
     code = 406
     description = 'The request `Accept` header could not be satisfied.'
@@ -45,3 +50,13 @@ class NotAcceptable(APIException):
 class UnsupportedMediaType(APIException):
     code = 415
     description = 'Unsupported media type in the request `Content-Type` header.'
+
+
+class RequestEntityTooLarge(APIException):
+    code = 413
+    description = 'Request content is too large.'
+
+
+class ServiceUnavailable(APIException):
+    code = 503
+    description = 'The server is too busy to handle this request.'
@@ -0,0 +1,7 @@
+from api_star.frameworks.asgi.app import App
+from api_star.frameworks.asgi.executor import Executor
+from api_star.frameworks.asgi.request import APIRequest
+from api_star.frameworks.asgi.response import APIResponse
+
+
+__all__ = [App, APIRequest, APIResponse, Executor]
@@ -0,0 +1,397 @@
+from api_star.compat import monotonic
+from api_star.cache import get_cache_policy
+from api_star.coalesce import get_coalesce_policy
+from api_star.core import (
+    NotModified, Rendered, ResponsePipeline, check_permissions, etag_matches, get_etag_version,
+    get_field_plan, get_vary, is_streaming, render, render_cached, render_stream
+)
+from api_star.exceptions import (
+    APIException, MethodNotAllowed, NotAcceptable, NotFound
+)
+from api_star.frameworks.asgi.coalesce import AsyncCoalescer
+from api_star.frameworks.asgi.executor import Executor
+from api_star.frameworks.asgi.request import APIRequest
+from api_star.frameworks.asgi.response import APIResponse
+from api_star.instrumentation import split_validation, start_timer
+from api_star.metrics import ENDPOINT_KEY
+from api_star.schema import get_link
+import coreapi
+import inspect
+import re
+
+
+def error_response(request, exc):
+    try:
+        request.renderer
+    except NotAcceptable:
+        pass
+
+    data = {'message': exc.description}
+    content, content_type = render(request, data)
+    return APIResponse(content, status=exc.code, content_type=content_type)
+
+
+def is_coroutine_function(func):
+    """
+    Returns `True` if the view is an `async def` function, including
+    when it has been wrapped by a decorator such as `@validate()`.
+    """
+    while True:
+        if inspect.iscoroutinefunction(func):
+            return True
+        if not hasattr(func, '__wrapped__'):
+            return False
+        func = func.__wrapped__
+
+
+def compile_url(url):
+    """
+    Given a URI template such as '/users/{username}/', return a compiled
+    regex that matches the URL, and captures any path parameters.
+    """
+    pattern = '^'
+    position = 0
+    for match in re.finditer(r'{([^}]+)}', url):
+        pattern += re.escape(url[position:match.start()])
+        pattern += '(?P<%s>[^/]+)' % match.group(1)
+        position = match.end()
+    pattern += re.escape(url[position:]) + '$'
+    return re.compile(pattern)
+
+
+class Router(object):
+    """
+    Maps incoming paths onto the handlers for each method.
+
+    URLs without any path parameters are matched with a single dictionary
+    lookup. Templated URLs are matched against a regex, in the order that
+    they were added.
+    """
+    def __init__(self):
+        self.static = {}
+        self.templated = []
+
+    def add_route(self, url, method, handler):
+        if '{' not in url:
+            handlers = self.static.setdefault(url, {})
+        else:
+            for existing_url, regex, handlers in self.templated:
+                if existing_url == url:
+                    break
+            else:
+                handlers = {}
+                self.templated.append((url, compile_url(url), handlers))
+        handlers[method] = handler
+
+    def lookup(self, path, method):
+        """
+        Returns a two-tuple of (handler, path_params).
+        """
+        if path in self.static:
+            handlers, params = self.static[path], {}
+        else:
+            for url, regex, handlers in self.templated:
+                match = regex.match(path)
+                if match is not None:
+                    params = match.groupdict()
+                    break
+            else:
+                raise NotFound()
+
+        if method not in handlers:
+            raise MethodNotAllowed()
+        return (handlers[method], params)
+
+
+class App(object):
+    """
+    An ASGI application. Views may either be regular functions,
+    or `async def` coroutine functions.
+
+    Regular functions, any generators that they return, and any authenticators,
+    are run in the thread pool given by `executor`, so that blocking calls do
+    not stall the event loop.
+    Routes may opt out of this with `threaded=False`.
+    """
+    request_class = APIRequest
+    response_class = APIResponse
+
+    def __init__(self, module=None, title=None, parsers=None, renderers=None,
+                 authenticators=None, permissions=None, executor=None,
+                 instrumentation=None, metrics=None, compression=None):
+        self.router = Router()
+        self.executor = Executor() if (executor is None) else executor
+        self._schema = None
+        self._schema_cache = {}
+        self.links = {}
+        self.title = title
+        self.parsers = parsers
+        self.renderers = renderers
+        self.authenticators = authenticators
+        self.permissions = permissions
+        self.instrumentation = instrumentation
+        self.metrics = metrics
+        self.compression = compression
+        self.coalescer = AsyncCoalescer()
+        if metrics is not None:
+            metrics.links = self.links
+
+    def get(self, url, **options):
+        return self.api_route(url, 'GET', **options)
+
+    def post(self, url, **options):
+        return self.api_route(url, 'POST', **options)
+
+    def put(self, url, **options):
+        return self.api_route(url, 'PUT', **options)
+
+    def patch(self, url, **options):
+        return self.api_route(url, 'PATCH', **options)
+
+    def delete(self, url, **options):
+        return self.api_route(url, 'DELETE', **options)
+
+    def api_route(self, url, method, **options):
+        tag = options.pop('tag', None)
+        exclude_from_schema = options.pop('exclude_from_schema', False)
+        renderers = options.pop('renderers', self.renderers)
+        parsers = options.pop('parsers', self.parsers)
+        authenticators = options.pop('authenticators', self.authenticators)
+        permissions = options.pop('permissions', self.permissions)
+        threaded = options.pop('threaded', True)
+        etag = options.pop('etag', False)
+        version = get_etag_version(etag, url, method)
+        coalescing = get_coalesce_policy(options.pop('coalesce', False), url, method, authenticators)
+
+        def decorator(func):
+            endpoint = options.pop('endpoint', func.__name__)
+            func.link = get_link(url, method, func)
+            offload = threaded and not is_coroutine_function(func)
+
+            if not exclude_from_schema:
+                if tag:
+                    if tag not in self.links:
+                        self.links[tag] = {}
+                    self.links[tag][endpoint] = func.link
+                else:
+                    self.links[endpoint] = func.link
+                self._schema = None
+
+            plan = get_field_plan(func.link)
+            validate, view = split_validation(func)
+            pipeline = ResponsePipeline(
+                endpoint, etag, version, get_cache_policy(func, url, method, authenticators), coalescing
+            )
+
+            async def call_view(params, timer):
+                if timer is None:
+                    call = func
+                else:
+                    timer.lap('parse')
+                    if validate is not None:
+                        validate(params)
+                    timer.lap('validate')
+                    call = view
+                if offload:
+                    data = await self.executor.run(call, **params)
+                else:
+                    data = call(**params)
+                if inspect.isawaitable(data):
+                    data = await data
+                if timer is not None:
+                    timer.lap('view')
+                return data
+
+            async def call_shared_view(pending, timer):
+                data = await call_view(pending.params, timer)
+                if isinstance(data, APIResponse):
+                    return data
+                if offload and is_streaming(data):
+                    data = await self.executor.run(list, data)
+                return pending.render(data)
+
+            async def wrapper(request, receive, **params):
+                timer = start_timer(endpoint, self.instrumentation)
+                if self.metrics is not None:
+                    request.scope[ENDPOINT_KEY] = endpoint
+                try:
+                    if renderers is not None:
+                        request.renderers = renderers
+                    if parsers is not None:
+                        request.parsers = parsers
+                    if authenticators is not None:
+                        request.authenticators = authenticators
+                    if timer is not None:
+                        request.renderer
+                        timer.lap('negotiate')
+
+                    if threaded and request.authenticators:
+                        # Authenticators may make blocking credential lookups,
+                        # so resolve the auth before anything on the event loop
+                        # can access it.
+                        await self.executor.run(getattr, request, 'auth')
+                    if permissions is not None:
+                        check_permissions(request, permissions)
+                    if timer is not None:
+                        timer.lap('authenticate')
+
+                    if plan.query:
+                        query = request.params
+                        for name in plan.query:
+                            if name in query:
+                                params[name] = query[name]
+                    if plan.form or plan.body:
+                        # Only routes with form or body fields read the request body.
+                        await request.load_body(receive)
+                        request_data = request.data
+                        for name in plan.form:
+                            if name in request_data:
+                                params[name] = request_data[name]
+                        for name in plan.body:
+                            params[name] = request_data
+
+                    pending = pipeline.start(request, params, self.compression)
+                    result = pending.lookup()
+                    if isinstance(result, NotModified):
+                        return self.not_modified_response(result.etag)
+                    if result is not None:
+                        return self.cached_response(request, result)
+
+                    if pending.coalesce_key is not None:
+                        data = await self.coalescer.run(endpoint, pending.coalesce_key, call_shared_view, pending, timer)
+                    else:
+                        data = await call_view(params, timer)
+
+                    if isinstance(data, APIResponse):
+                        response = data
+                    elif data is not None and data is self._schema:
+                        response = self.schema_response(request)
+                    else:
+                        data = pending.finish(data)
+                        if isinstance(data, Rendered):
+                            response = self.cached_response(request, data)
+                        else:
+                            if offload and is_streaming(data):
+                                # Advance the generator of a blocking view in the
+                                # executor, rather than on the event loop.
+                                response = await self.executor.run(self.render_response, request, data)
+                                response.content = self.executor.iterate(response.content)
+                            else:
+                                response = self.render_response(request, data)
+                            response_etag = pending.get_etag(response.content)
+                            if pending.not_modified(response_etag):
+                                response = self.not_modified_response(response_etag)
+                            elif response_etag is not None:
+                                response.set_header('ETag', response_etag)
+                                response.set_header('Vary', get_vary(self.compression))
+                    if timer is not None:
+                        timer.lap('render')
+                    return response
+                finally:
+                    if timer is not None:
+                        timer.finish()
+
+            self.router.add_route(url, method, wrapper)
+            return func
+        return decorator
+
+    def render_response(self, request, data):
+        """
+        Render the data returned by a view, compressing the content if
+        compression is enabled and the client accepts it.
+        """
+        compression = self.compression
+        encoding = None
+        if is_streaming(data):
+            content, content_type = render_stream(request, data)
+            if compression is not None:
+                encoding = compression.negotiate(request)
+                if encoding is not None:
+                    content = compression.compress_stream(content, encoding)
+        else:
+            content, content_type = render(request, data)
+            if compression is not None:
+                content, encoding = compression.compress(content, compression.negotiate(request))
+
+        response = APIResponse(content, content_type=content_type)
+        if compression is not None:
+            response.set_header('Vary', 'Accept-Encoding')
+        if encoding is not None:
+            response.set_header('Content-Encoding', encoding)
+        return response
+
+    def not_modified_response(self, etag):
+        """
+        Return a '304 Not Modified' response, with no content.
+        """
+        headers = {'ETag': etag, 'Vary': get_vary(self.compression)}
+        return APIResponse(status=304, headers=headers)
+
+    @property
+    def schema(self):
+        """
+        The API schema, as a CoreAPI `Document`. Built on first access,
+        and rebuilt if any further routes are added.
+        """
+        if self._schema is None:
+            self._schema = coreapi.Document(title=self.title, content=self.links)
+            self._schema_cache = {}
+        return self._schema
+
+    def schema_response(self, request):
+        """
+        Return the response for the API schema. The rendered content is
+        cached for each renderer, and includes an 'ETag' header so that
+        clients may make conditional requests.
+        """
+        return self.cached_response(request, render_cached(
+            request, self.schema, self._schema_cache, self.compression
+        ))
+
+    def cached_response(self, request, entry):
+        """
+        Return a response for previously rendered content, given as a
+        four-tuple of `(content, content_type, etag, content_encoding)`.
+        """
+        content, content_type, etag, encoding = entry
+        headers = {'ETag': etag, 'Vary': get_vary(self.compression)}
+        if etag_matches(request.headers.get('If-None-Match'), etag):
+            return APIResponse(status=304, headers=headers)
+        if encoding is not None:
+            headers['Content-Encoding'] = encoding
+        return APIResponse(content, headers=headers, content_type=content_type)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        assert scope['type'] == 'http'
+
+        start = monotonic()
+        request = self.request_class(scope)
+        try:
+            handler, params = self.router.lookup(request.path, request.method)
+            response = await handler(request, receive, **params)
+        except APIException as exc:
+            response = error_response(request, exc)
+
+        await response.send(send)
+        if self.metrics is not None:
+            content = response.content
+            self.metrics.observe(
+                scope.get(ENDPOINT_KEY, ''),
+                request.method,
+                response.status,
+                monotonic() - start,
+                request.content_length,
+                len(content) if isinstance(content, bytes) else None
+            )
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
@@ -0,0 +1,34 @@
+from api_star.coalesce import Coalescer
+import asyncio
+
+
+class AsyncCoalescer(Coalescer):
+    """
+    Single-flight coalescing for coroutines, running on a single event loop.
+
+    The call runs in its own task, so that it still completes and is
+    shared with any other waiters if the first request is cancelled.
+    """
+    async def run(self, endpoint, key, func, *args):
+        """
+        Return `await func(*args)`, or the result of an identical call that
+        is already in flight.
+        """
+        with self._lock:
+            task = self._flights.get(key)
+            if task is None:
+                task = asyncio.ensure_future(func(*args))
+                self._flights[key] = task
+                task.add_done_callback(lambda done: self._finish(key, done))
+                self._count(self.calls, endpoint)
+            else:
+                self._count(self.coalesced, endpoint)
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        with self._lock:
+            if self._flights.get(key) is task:
+                del self._flights[key]
+        if not task.cancelled():
+            # Mark any exception as retrieved, in case every waiter was cancelled.
+            task.exception()
@@ -0,0 +1,130 @@
+from api_star.exceptions import ServiceUnavailable
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import os
+import threading
+
+
+_exhausted = object()
+
+
+class Executor(object):
+    """
+    A bounded thread pool, used to run blocking views and authenticators
+    without stalling the event loop.
+
+    `max_workers` - The number of worker threads. Defaults to the number of
+                    CPUs plus four, up to 32.
+    `max_queue` - The number of calls that may be waiting for a free worker.
+                  Any further calls raise `ServiceUnavailable`.
+                  If `None` the queue is unbounded.
+    """
+    def __init__(self, max_workers=None, max_queue=None):
+        if max_workers is None:
+            max_workers = min(32, (os.cpu_count() or 1) + 4)
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool = None
+        self._lock = threading.Lock()
+        self.pending = 0  # Calls that have been submitted, and not finished.
+        self.active = 0
+        self.completed = 0
+        self.rejected = 0
+        self.max_queued = 0
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(self.max_workers)
+        return self._pool
+
+    @property
+    def queued(self):
+        """
+        The number of calls waiting for a free worker.
+        """
+        return max(self.pending - self.max_workers, 0)
+
+    def _call(self, func, args, kwargs):
+        with self._lock:
+            self.active += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.pending -= 1
+                self.completed += 1
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Call `func(*args, **kwargs)` in a worker thread, and return the result.
+        """
+        return await self._run(func, args, kwargs)
+
+    def iterate(self, iterable):
+        """
+        Return an asynchronous iterator over a blocking iterable, such as the
+        generator returned by a view, that is advanced in a worker thread.
+
+        Once a streaming response has started, its remaining chunks are not
+        subject to `max_queue`, so that the response is never cut short.
+        """
+        return ThreadedIterator(self, iter(iterable))
+
+    async def _run(self, func, args, kwargs, limit=True):
+        with self._lock:
+            if limit and self.max_queue is not None and self.pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise ServiceUnavailable()
+            self.pending += 1
+            self.max_queued = max(self.max_queued, self.queued)
+        call = functools.partial(self._call, func, args, kwargs)
+        future = self.pool.submit(call)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            if future.cancel():
+                # The call was still waiting for a worker, and never ran.
+                with self._lock:
+                    self.pending -= 1
+            raise
+
+    def info(self):
+        with self._lock:
+            return {
+                'queued': self.queued,
+                'active': self.active,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'max_queued': self.max_queued,
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue
+            }
+
+    def shutdown(self, wait=True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+
+
+class ThreadedIterator(object):
+    """
+    An asynchronous iterator, that advances a blocking iterator in the
+    executor, one item at a time.
+    """
+    def __init__(self, executor, iterator):
+        self.executor = executor
+        self.iterator = iterator
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        item = await self.executor._run(next, (self.iterator, _exhausted), {}, limit=False)
+        if item is _exhausted:
+            raise StopAsyncIteration
+        return item
@@ -0,0 +1,66 @@
+from api_star.exceptions import RequestEntityTooLarge
+from api_star.request import RequestMixin
+from werkzeug.datastructures import MultiDict
+from urllib.parse import parse_qsl
+import io
+
+
+class Headers(dict):
+    """
+    ASGI provides lowercased header names. We'd like to ensure
+    case-insensitive lookups, so that eg. `request.headers['Accept']`
+    is valid.
+    """
+    def __getitem__(self, key):
+        return super(Headers, self).__getitem__(key.lower())
+
+    def __contains__(self, key):
+        return super(Headers, self).__contains__(key.lower())
+
+    def get(self, key, default=None):
+        return super(Headers, self).get(key.lower(), default)
+
+
+class APIRequest(RequestMixin):
+    def __init__(self, scope):
+        self.scope = scope
+        self.method = scope['method']
+        self.path = scope['path']
+        self.headers = Headers([
+            (key.decode('latin-1'), value.decode('latin-1'))
+            for key, value in scope.get('headers', [])
+        ])
+        query_string = scope.get('query_string', b'').decode('latin-1')
+        self.params = MultiDict(parse_qsl(query_string, keep_blank_values=True))
+        self.content_type = self.headers.get('content-type')
+        self.content_length = int(self.headers.get('content-length') or 0)
+        self.stream = io.BytesIO()
+
+    async def load_body(self, receive):
+        """
+        Read the request body from the ASGI `receive` channel, so that it
+        is available to the parsers as `request.stream`.
+
+        Raises `RequestEntityTooLarge` as soon as the body exceeds the
+        `max_body_size` of the negotiated parser.
+        """
+        max_body_size = None
+        if self.content_type:
+            max_body_size = getattr(self.parser, 'max_body_size', None)
+        if max_body_size is not None and self.content_length > max_body_size:
+            raise RequestEntityTooLarge()
+
+        chunks = []
+        total = 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            chunk = message.get('body', b'')
+            total += len(chunk)
+            if max_body_size is not None and total > max_body_size:
+                raise RequestEntityTooLarge()
+            chunks.append(chunk)
+            more_body = message.get('more_body', False)
+        body = b''.join(chunks)
+        self.content_length = len(body)
+        self.stream = io.BytesIO(body)
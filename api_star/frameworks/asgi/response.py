@@ -0,0 +1,42 @@
+class APIResponse(object):
+    """
+    An outgoing response, that is sent over an ASGI `send` channel.
+
+    The content may either be a bytestring, or an iterator or asynchronous
+    iterator of bytestrings for streaming responses.
+    """
+    def __init__(self, content=b'', status=200, headers=None, content_type=None):
+        self.content = content
+        self.status = status
+        self.headers = dict(headers or {})
+        if content_type is not None:
+            self.headers['Content-Type'] = content_type
+
+    def set_header(self, name, value):
+        self.headers[name] = value
+
+    async def send(self, send):
+        headers = [
+            (key.lower().encode('latin-1'), value.encode('latin-1'))
+            for key, value in self.headers.items()
+        ]
+        streaming = not isinstance(self.content, bytes)
+        if not streaming:
+            headers.append((b'content-length', str(len(self.content)).encode('latin-1')))
+
+        await send({
+            'type': 'http.response.start',
+            'status': self.status,
+            'headers': headers
+        })
+
+        if streaming and hasattr(self.content, '__aiter__'):
+            async for chunk in self.content:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        elif streaming:
+            for chunk in self.content:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        else:
+            await send({'type': 'http.response.body', 'body': self.content})
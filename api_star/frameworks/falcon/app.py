@@ -1,11 +1,19 @@
-from api_star.core import check_permissions, render
+from api_star.cache import get_cache_policy
+from api_star.coalesce import Coalescer, get_coalesce_policy
+from api_star.core import (
+    NotModified, Rendered, ResponsePipeline, check_permissions, etag_matches, get_etag_version,
+    get_field_plan, get_vary, is_streaming, render, render_cached, render_stream
+)
 from api_star.exceptions import APIException, NotAcceptable
 from api_star.frameworks.falcon.request import APIRequest
 from api_star.frameworks.falcon.response import APIResponse
+from api_star.instrumentation import split_validation, start_timer
+from api_star.metrics import ENDPOINT_KEY
 from api_star.schema import get_link
-from collections import namedtuple
+from falcon.routing import CompiledRouter
 import coreapi
 import falcon
+import threading
 
 
 def error_handler(exc, request, response, params):
@@ -22,20 +30,56 @@ def error_handler(exc, request, response, params):
     response.status = str(exc.code)  # TODO: Blergh
 
 
+class Router(CompiledRouter):
+    """
+    Falcon's compiled router, except that compilation may be deferred
+    while a batch of routes is added, rather than recompiling the routing
+    function after every single route.
+    """
+    def __init__(self):
+        self.deferred = False
+        super(Router, self).__init__()
+
+    def _compile(self):
+        if self.deferred:
+            return None
+        return super(Router, self)._compile()
+
+
+class Resource(object):
+    """
+    A Falcon resource for a single URL. Each method routed to the URL is
+    set as an `on_<method>` responder.
+    """
+    pass
+
+
 class App(falcon.API):
     request_class = APIRequest
     response_class = APIResponse
 
     def __init__(self, module=None, **kwargs):
-        self._registered = {}
+        self._resources = {}
+        self._schema = None
+        self._schema_cache = {}
+        self._routes_changed = False
+        self._setup_lock = threading.Lock()
         self.links = {}
         self.title = kwargs.pop('title', None)
         self.parsers = kwargs.pop('parsers', None)
         self.renderers = kwargs.pop('renderers', None)
         self.authenticators = kwargs.pop('authenticators', None)
         self.permissions = kwargs.pop('permissions', None)
+        self.instrumentation = kwargs.pop('instrumentation', None)
+        self.metrics = kwargs.pop('metrics', None)
+        if self.metrics is not None:
+            self.metrics.links = self.links
+        self.compression = kwargs.pop('compression', None)
+        self.coalescer = Coalescer()
         if 'request_type' not in kwargs:
             kwargs['request_type'] = App.request_class
+        if 'router' not in kwargs:
+            kwargs['router'] = Router()
         super(App, self).__init__(**kwargs)
         self.add_error_handler(APIException, error_handler)
 
@@ -61,6 +105,9 @@ class App(falcon.API):
         parsers = options.pop('parsers', self.parsers)
         authenticators = options.pop('authenticators', self.authenticators)
         permissions = options.pop('permissions', self.permissions)
+        etag = options.pop('etag', False)
+        version = get_etag_version(etag, url, method)
+        coalescing = get_coalesce_policy(options.pop('coalesce', False), url, method, authenticators)
 
         def decorator(func):
             endpoint = options.pop('endpoint', func.__name__)
@@ -73,51 +120,206 @@ class App(falcon.API):
                     self.links[tag][endpoint] = func.link
                 else:
                     self.links[endpoint] = func.link
-                self.schema = coreapi.Document(title=self.title, content=self.links)
+                self._schema = None
+
+            plan = get_field_plan(func.link)
+            validate, view = split_validation(func)
+            pipeline = ResponsePipeline(
+                endpoint, etag, version, get_cache_policy(func, url, method, authenticators), coalescing
+            )
+
+            def call_view(params, timer):
+                if timer is None:
+                    return func(**params)
+                timer.lap('parse')
+                if validate is not None:
+                    validate(params)
+                timer.lap('validate')
+                data = view(**params)
+                timer.lap('view')
+                return data
+
+            def call_shared_view(pending, timer):
+                return pending.render(call_view(pending.params, timer))
 
             def wrapper(request, response, **params):
-                for field in func.link.fields:
-                    if field.location == 'form':
-                        if field.name in request.data:
-                            params[field.name] = request.data[field.name]
-                    elif field.location == 'query':
-                        if field.name in request.params:
-                            params[field.name] = request.params[field.name]
-                    elif field.location == 'body':
-                        params[field.name] = request.data
-
-                if renderers is not None:
-                    request.renderers = renderers
-                if parsers is not None:
-                    request.parsers = parsers
-                if authenticators is not None:
-                    request.authenticators = authenticators
-
-                if permissions is not None:
-                    check_permissions(request, permissions)
-
-                data = func(**params)
-
-                # TODO: Handle case where APIResponse is returned.
-                content, content_type = render(request, data)
-                if content_type is not None:
-                    response.set_header('Content-Type', content_type)
-                response.body = content
-
-            # Setup the app routing each time `@app.<method>()` is called.
-            if url not in self._registered:
-                self._registered[url] = {}
-            self._registered[url][method] = wrapper
-            self._router._roots = []
-            self._setup()
+                timer = start_timer(endpoint, self.instrumentation)
+                if self.metrics is not None:
+                    request.env[ENDPOINT_KEY] = endpoint
+                try:
+                    if renderers is not None:
+                        request.renderers = renderers
+                    if parsers is not None:
+                        request.parsers = parsers
+                    if authenticators is not None:
+                        request.authenticators = authenticators
+                    if timer is not None:
+                        request.renderer
+                        timer.lap('negotiate')
+
+                    if permissions is not None:
+                        check_permissions(request, permissions)
+                    if timer is not None:
+                        timer.lap('authenticate')
+
+                    if plan.query:
+                        query = request.params
+                        for name in plan.query:
+                            if name in query:
+                                params[name] = query[name]
+                    if plan.form or plan.body:
+                        # Only routes with form or body fields parse the request body.
+                        request_data = request.data
+                        for name in plan.form:
+                            if name in request_data:
+                                params[name] = request_data[name]
+                        for name in plan.body:
+                            params[name] = request_data
+
+                    pending = pipeline.start(request, params, self.compression)
+                    result = pending.lookup()
+                    if isinstance(result, NotModified):
+                        self.not_modified_response(response, result.etag)
+                        return
+                    if result is not None:
+                        self.cached_response(request, response, result)
+                        return
+
+                    if pending.coalesce_key is not None:
+                        data = self.coalescer.run(endpoint, pending.coalesce_key, call_shared_view, pending, timer)
+                    else:
+                        data = call_view(params, timer)
+
+                    # TODO: Handle case where APIResponse is returned.
+                    if data is not None and data is self._schema:
+                        self.schema_response(request, response)
+                    else:
+                        data = pending.finish(data)
+                        if isinstance(data, Rendered):
+                            self.cached_response(request, response, data)
+                        else:
+                            self.render_response(request, response, data, pending)
+                    if timer is not None:
+                        timer.lap('render')
+                finally:
+                    if timer is not None:
+                        timer.finish()
+
+            # Routing is set up lazily, on the next incoming request, so that
+            # registering many routes does not rebuild the router each time.
+            if url not in self._resources:
+                self._resources[url] = Resource()
+            setattr(self._resources[url], 'on_' + method.lower(), wrapper)
+            self._routes_changed = True
             return func
         return decorator
 
+    def render_response(self, request, response, data, pending):
+        """
+        Populate the response with the data returned by a view, compressing
+        the content if compression is enabled and the client accepts it.
+        """
+        compression = self.compression
+        encoding = None
+        content = None
+        if is_streaming(data):
+            chunks, content_type = render_stream(request, data)
+            if compression is not None:
+                encoding = compression.negotiate(request)
+                if encoding is not None:
+                    chunks = compression.compress_stream(chunks, encoding)
+        else:
+            content, content_type = render(request, data)
+            if compression is not None:
+                content, encoding = compression.compress(content, compression.negotiate(request))
+
+        response_etag = pending.get_etag(content)
+        if pending.not_modified(response_etag):
+            self.not_modified_response(response, response_etag)
+            return
+        if content is None:
+            response.stream = chunks
+        else:
+            response.body = content
+        if content_type is not None:
+            response.set_header('Content-Type', content_type)
+        if response_etag is not None:
+            # The same as any '304 Not Modified' response for the content.
+            response.set_header('ETag', response_etag)
+            response.set_header('Vary', get_vary(compression))
+        elif compression is not None:
+            response.set_header('Vary', 'Accept-Encoding')
+        if encoding is not None:
+            response.set_header('Content-Encoding', encoding)
+
+    @property
+    def schema(self):
+        """
+        The API schema, as a CoreAPI `Document`. Built on first access,
+        and rebuilt if any further routes are added.
+        """
+        if self._schema is None:
+            self._schema = coreapi.Document(title=self.title, content=self.links)
+            self._schema_cache = {}
+        return self._schema
+
+    def schema_response(self, request, response):
+        """
+        Populate the response for the API schema. The rendered content is
+        cached for each renderer, and includes an 'ETag' header so that
+        clients may make conditional requests.
+        """
+        self.cached_response(request, response, render_cached(
+            request, self.schema, self._schema_cache, self.compression
+        ))
+
+    def cached_response(self, request, response, entry):
+        """
+        Populate the response with previously rendered content, given as a
+        four-tuple of `(content, content_type, etag, content_encoding)`.
+        """
+        content, content_type, etag, encoding = entry
+        response.set_header('ETag', etag)
+        response.set_header('Vary', get_vary(self.compression))
+        if etag_matches(request.headers.get('If-None-Match'), etag):
+            response.status = falcon.HTTP_304
+            return
+        if content_type is not None:
+            response.set_header('Content-Type', content_type)
+        if encoding is not None:
+            response.set_header('Content-Encoding', encoding)
+        response.body = content
+
+    def not_modified_response(self, response, etag):
+        """
+        Populate a '304 Not Modified' response, with no content.
+        """
+        response.status = falcon.HTTP_304
+        response.set_header('ETag', etag)
+        response.set_header('Vary', get_vary(self.compression))
+
+    def __call__(self, env, start_response):
+        if self._routes_changed:
+            self._setup()
+        if self.metrics is not None:
+            return self.metrics.wsgi(super(App, self).__call__, env, start_response)
+        return super(App, self).__call__(env, start_response)
+
     def _setup(self):
-        for url, methods in self._registered.items():
-            resource = {}
-            for method, func in methods.items():
-                method_function = "on_{0}".format(method.lower())
-                resource[method_function] = func
-            resource = namedtuple('Resource', resource.keys())(**resource)
-            self.add_route(url, resource)
+        with self._setup_lock:
+            if not self._routes_changed:
+                return
+            router = self._router
+            router._roots = []
+            if isinstance(router, Router):
+                router.deferred = True
+                try:
+                    for url, resource in self._resources.items():
+                        self.add_route(url, resource)
+                finally:
+                    router.deferred = False
+                router._find = router._compile()
+            else:
+                for url, resource in self._resources.items():
+                    self.add_route(url, resource)
+            self._routes_changed = False
@@ -1,10 +1,17 @@
 # coding: utf8
 from __future__ import unicode_literals
-from flask import request, Flask
-from api_star.core import check_permissions
+from flask import request, Flask, Response
+from api_star.cache import get_cache_policy
+from api_star.coalesce import Coalescer, get_coalesce_policy
+from api_star.core import (
+    NotModified, Rendered, ResponsePipeline, check_permissions, etag_matches,
+    get_etag_version, get_field_plan, get_vary, render_cached
+)
 from api_star.exceptions import APIException
 from api_star.frameworks.flask.request import APIRequest
-from api_star.frameworks.flask.response import APIResponse
+from api_star.frameworks.flask.response import APIResponse, is_renderable
+from api_star.instrumentation import split_validation, start_timer
+from api_star.metrics import ENDPOINT_KEY
 from api_star.schema import get_link
 from werkzeug.exceptions import HTTPException
 from werkzeug.routing import parse_rule
@@ -30,13 +37,73 @@ class App(Flask):
 
     def __init__(self, module=None, **kwargs):
         self.links = {}
+        self._schema = None
+        self._schema_cache = {}
         self.title = kwargs.pop('title', None)
         self.parsers = kwargs.pop('parsers', None)
         self.renderers = kwargs.pop('renderers', None)
         self.authenticators = kwargs.pop('authenticators', None)
         self.permissions = kwargs.pop('permissions', None)
+        self.instrumentation = kwargs.pop('instrumentation', None)
+        self.metrics = kwargs.pop('metrics', None)
+        if self.metrics is not None:
+            self.metrics.links = self.links
+        self.compression = kwargs.pop('compression', None)
+        self.coalescer = Coalescer()
         super(App, self).__init__(module, **kwargs)
 
+    def wsgi_app(self, environ, start_response):
+        if self.metrics is not None:
+            return self.metrics.wsgi(super(App, self).wsgi_app, environ, start_response)
+        return super(App, self).wsgi_app(environ, start_response)
+
+    @property
+    def schema(self):
+        """
+        The API schema, as a CoreAPI `Document`. Built on first access,
+        and rebuilt if any further routes are added.
+        """
+        if self._schema is None:
+            self._schema = coreapi.Document(title=self.title, content=self.links)
+            self._schema_cache = {}
+        return self._schema
+
+    def schema_response(self):
+        """
+        Return a response for the API schema. The rendered content is
+        cached for each renderer, and includes an 'ETag' header so that
+        clients may make conditional requests.
+        """
+        return self.cached_response(render_cached(
+            request, self.schema, self._schema_cache, self.compression
+        ))
+
+    def cached_response(self, entry):
+        """
+        Return a response for previously rendered content, given as a
+        four-tuple of `(content, content_type, etag, content_encoding)`.
+        """
+        content, content_type, etag, encoding = entry
+        if etag_matches(request.headers.get('If-None-Match'), etag):
+            return self.not_modified_response(etag)
+        response = Response(content, content_type=content_type)
+        response.headers['ETag'] = etag
+        response.headers['Vary'] = get_vary(self.compression)
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+        return response
+
+    def not_modified_response(self, etag):
+        """
+        Return a '304 Not Modified' response, with no content.
+        """
+        response = Response(status=304)
+        # The response has no content, so should not have the default type.
+        del response.headers['Content-Type']
+        response.headers['ETag'] = etag
+        response.headers['Vary'] = get_vary(self.compression)
+        return response
+
     def dispatch_request(self):
         try:
             return super(App, self).dispatch_request()
@@ -78,6 +145,9 @@ class App(Flask):
         parsers = options.pop('parsers', self.parsers)
         authenticators = options.pop('authenticators', self.authenticators)
         permissions = options.pop('permissions', self.permissions)
+        etag = options.pop('etag', False)
+        version = get_etag_version(etag, rule, method)
+        coalescing = get_coalesce_policy(options.pop('coalesce', False), rule, method, authenticators)
 
         def decorator(func):
             endpoint = options.pop('endpoint', func.__name__)
@@ -93,30 +163,99 @@ class App(Flask):
                     self.links[tag][endpoint] = func.link
                 else:
                     self.links[endpoint] = func.link
-                self.schema = coreapi.Document(title=self.title, content=self.links)
+                self._schema = None
+
+            plan = get_field_plan(func.link)
+            validate, view = split_validation(func)
+            pipeline = ResponsePipeline(
+                endpoint, etag, version, get_cache_policy(func, url, method, authenticators), coalescing
+            )
+
+            def call_view(params, timer):
+                if timer is None:
+                    return func(**params)
+                timer.lap('parse')
+                if validate is not None:
+                    validate(params)
+                timer.lap('validate')
+                data = view(**params)
+                timer.lap('view')
+                return data
+
+            def call_shared_view(pending, timer):
+                data = call_view(pending.params, timer)
+                if not is_renderable(data):
+                    return data
+                return pending.render(data)
 
             def wrapper(**params):
-                for field in func.link.fields:
-                    if field.location == 'form':
-                        if field.name in request.data:
-                            params[field.name] = request.data[field.name]
-                    elif field.location == 'query':
-                        if field.name in request.args:
-                            params[field.name] = request.args[field.name]
-                    elif field.location == 'body':
-                        params[field.name] = request.data
-
-                if renderers is not None:
-                    request.renderers = renderers
-                if parsers is not None:
-                    request.parsers = parsers
-                if authenticators is not None:
-                    request.authenticators = authenticators
-
-                if permissions is not None:
-                    check_permissions(request, permissions)
-
-                return func(**params)
+                timer = start_timer(endpoint, self.instrumentation)
+                if self.metrics is not None:
+                    request.environ[ENDPOINT_KEY] = endpoint
+                try:
+                    if renderers is not None:
+                        request.renderers = renderers
+                    if parsers is not None:
+                        request.parsers = parsers
+                    if authenticators is not None:
+                        request.authenticators = authenticators
+                    if timer is not None:
+                        request.renderer
+                        timer.lap('negotiate')
+
+                    if permissions is not None:
+                        check_permissions(request, permissions)
+                    if timer is not None:
+                        timer.lap('authenticate')
+
+                    if plan.query:
+                        query = request.args
+                        for name in plan.query:
+                            if name in query:
+                                params[name] = query[name]
+                    if plan.form or plan.body:
+                        # Only routes with form or body fields parse the request body.
+                        request_data = request.data
+                        for name in plan.form:
+                            if name in request_data:
+                                params[name] = request_data[name]
+                        for name in plan.body:
+                            params[name] = request_data
+
+                    pending = pipeline.start(request, params, self.compression)
+                    result = pending.lookup()
+                    if isinstance(result, NotModified):
+                        return self.not_modified_response(result.etag)
+                    if result is not None:
+                        return self.cached_response(result)
+
+                    if pending.coalesce_key is not None:
+                        data = self.coalescer.run(endpoint, pending.coalesce_key, call_shared_view, pending, timer)
+                    else:
+                        data = call_view(params, timer)
+
+                    if data is not None and data is self._schema:
+                        data = self.schema_response()
+                    elif isinstance(data, Rendered) or is_renderable(data):
+                        data = pending.finish(data)
+                        if isinstance(data, Rendered):
+                            data = self.cached_response(data)
+                        elif timer is not None or etag:
+                            # Render here, rather than in `make_response()`,
+                            # so that rendering is included in the timings.
+                            data = APIResponse(data)
+                            response_etag = pending.get_etag(None if data.is_streamed else data.get_data())
+                            if pending.not_modified(response_etag):
+                                data = self.not_modified_response(response_etag)
+                            elif response_etag is not None:
+                                data.headers['ETag'] = response_etag
+                                data.headers['Vary'] = get_vary(self.compression)
+                    if timer is not None:
+                        timer.lap('render')
+                    return data
+                finally:
+                    if timer is not None:
+                        timer.finish()
 
             self.add_url_rule(rule, endpoint, wrapper, methods=[method], **options)
             return func
@@ -1,20 +1,45 @@
 # coding: utf8
 from __future__ import unicode_literals
 from coreapi import Document
-from flask import request, Response
-from api_star.core import render
+from flask import current_app, request, stream_with_context, Response
+from api_star.core import is_streaming, render, render_stream
+from api_star.metrics import Metrics
+
+
+def is_renderable(data):
+    """
+    Returns `True` if the view returned data that should be rendered,
+    rather than a regular Flask response value.
+    """
+    return isinstance(data, (Document, Metrics, list, dict)) or is_streaming(data)
 
 
 class APIResponse(Response):
     def __init__(self, data=None, *args, **kwargs):
         super(APIResponse, self).__init__(None, *args, **kwargs)
-        (content, content_type) = render(request, data)
-        self.set_data(content)
+        compression = getattr(current_app, 'compression', None)
+        encoding = None
+        if compression is not None:
+            self.headers['Vary'] = 'Accept-Encoding'
+            encoding = compression.negotiate(request)
+
+        if is_streaming(data):
+            (chunks, content_type) = render_stream(request, data)
+            if encoding is not None:
+                chunks = compression.compress_stream(chunks, encoding)
+            self.response = stream_with_context(chunks)
+        else:
+            (content, content_type) = render(request, data)
+            if encoding is not None:
+                (content, encoding) = compression.compress(content, encoding)
+            self.set_data(content)
         if content_type:
             self.headers['Content-Type'] = content_type
+        if encoding is not None:
+            self.headers['Content-Encoding'] = encoding
 
     @classmethod
     def force_type(cls, response, environ=None):
-        if isinstance(response, (Document, list, dict)):
+        if is_renderable(response):
             return cls(response)
         return Response.force_type(response, environ)
@@ -0,0 +1,150 @@
+"""
+Per-request timing of each phase of handling a request.
+
+The phases are:
+
+* 'negotiate' - Selecting a renderer from the request 'Accept' header.
+* 'authenticate' - Authenticating the request and checking permissions.
+* 'parse' - Extracting the query parameters, and parsing the request body.
+* 'validate' - Running any `@validate()` validators.
+* 'view' - Calling the view function.
+* 'render' - Rendering the response content.
+
+Pass a list of callbacks as `App(instrumentation=[...])`. Each callback is
+called once per request as `callback(route, timings)`, where `timings` is a
+dictionary mapping each phase that completed to its duration in integer
+nanoseconds. If the request failed part way through then only the phases
+that completed are included.
+"""
+from api_star.compat import monotonic_ns
+from bisect import bisect_left
+import threading
+
+
+PHASES = ('negotiate', 'authenticate', 'parse', 'validate', 'view', 'render')
+
+# Bucket upper bounds in nanoseconds, from 1 microsecond to ~67 seconds.
+DEFAULT_BUCKETS = tuple(1000 * (2 ** idx) for idx in range(27))
+
+
+class Timer(object):
+    """
+    Records the duration of each phase of a single request.
+    Each call to `lap(phase)` records the time elapsed since the previous lap.
+    """
+    __slots__ = ('route', 'callbacks', 'timings', '_last')
+
+    def __init__(self, route, callbacks):
+        self.route = route
+        self.callbacks = callbacks
+        self.timings = {}
+        self._last = monotonic_ns()
+
+    def lap(self, phase):
+        now = monotonic_ns()
+        self.timings[phase] = now - self._last
+        self._last = now
+
+    def finish(self):
+        for callback in self.callbacks:
+            callback(self.route, self.timings)
+
+
+def start_timer(route, callbacks):
+    """
+    Return a `Timer` for a request to the given route, or `None` if
+    there are no instrumentation callbacks.
+    """
+    if not callbacks:
+        return None
+    return Timer(route, callbacks)
+
+
+def split_validation(func):
+    """
+    Given a view function, return a two-tuple of (validate, view).
+
+    If the view is the function returned by `@validate()`, then `validate`
+    is a function that validates the view parameters in place, and `view` is
+    the undecorated function. Otherwise `validate` is `None`, and `view` is
+    the function itself, so that any other decorators are still applied.
+    """
+    validate = getattr(func, 'validate_params', None)
+    if validate is None or getattr(validate, 'wrapper', None) is not func:
+        return (None, func)
+    return (validate, func.__wrapped__)
+
+
+class Histogram(object):
+    """
+    Counts of durations in fixed, exponentially sized buckets.
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0
+
+    def add(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def percentile(self, percent):
+        """
+        Return the upper bound of the bucket that contains the given
+        percentile, or `None` if it falls beyond the last bucket.
+        """
+        if not self.count:
+            return None
+        target = self.count * percent / 100.0
+        seen = 0
+        for idx, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                break
+        if idx >= len(self.buckets):
+            return None
+        return self.buckets[idx]
+
+
+class HistogramAggregator(object):
+    """
+    An instrumentation callback that aggregates the timings for each
+    route and phase into histograms, held in memory.
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, route, timings):
+        with self._lock:
+            for phase, duration in timings.items():
+                key = (route, phase)
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = Histogram(self.buckets)
+                    self.histograms[key] = histogram
+                histogram.add(duration)
+
+    def summary(self):
+        """
+        Return a dictionary of `{route: {phase: stats}}`. Durations are
+        in nanoseconds, and percentiles are bucket upper bounds.
+        """
+        summary = {}
+        with self._lock:
+            for (route, phase), histogram in self.histograms.items():
+                summary.setdefault(route, {})[phase] = {
+                    'count': histogram.count,
+                    'mean': histogram.total // histogram.count,
+                    'p50': histogram.percentile(50),
+                    'p95': histogram.percentile(95),
+                    'p99': histogram.percentile(99)
+                }
+        return summary
+
+    def clear(self):
+        with self._lock:
+            self.histograms = {}
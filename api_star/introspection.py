@@ -0,0 +1,96 @@
+"""
+Cached introspection of view functions.
+
+The argument names, defaults and docstring of each function are inspected
+once, and shared by schema generation, `@validate()`, and the frameworks.
+"""
+from api_star.compat import getargspec
+from collections import namedtuple
+import re
+import threading
+import uritemplate
+import weakref
+
+
+ViewInfo = namedtuple('ViewInfo', [
+    'arg_names', 'defaults', 'required', 'description', 'field_descriptions'
+])
+
+_view_info = weakref.WeakKeyDictionary()
+_path_variables = {}
+_lock = threading.Lock()
+
+
+def dedent(content):
+    """
+    Remove leading indent from a block of text.
+    Used when generating descriptions from docstrings.
+
+    Note that python's `textwrap.dedent` doesn't quite cut it,
+    as it fails to dedent multiline docstrings that include
+    unindented text on the initial line.
+    """
+    whitespace_counts = [len(line) - len(line.lstrip(' '))
+                         for line in content.splitlines()[1:] if line.lstrip()]
+
+    # unindent the content if needed
+    if whitespace_counts:
+        whitespace_pattern = '^' + (' ' * min(whitespace_counts))
+        content = re.sub(whitespace_pattern, '', content, flags=re.MULTILINE)
+
+    return content.strip()
+
+
+def parse_docstring(docstring):
+    """
+    Given a docstring, return a two-tuple of (description, field_descriptions).
+
+    Fields are described by lines such as '* username - The username.', or
+    '* [email] - An optional email address.' for optional fields.
+    """
+    description = ''
+    field_descriptions = {}
+    for line in dedent(docstring or '').splitlines():
+        if line.startswith('* '):
+            field_name, sep, field_description = line[2:].partition('-')
+            if sep:
+                field_name = field_name.strip().strip('[]').strip()
+                field_descriptions[field_name] = field_description.strip()
+                continue
+        description += line + '\n'
+    return (description.strip(), field_descriptions)
+
+
+def get_view_info(func):
+    """
+    Return a `ViewInfo` for the given function, which is introspected
+    the first time it is seen.
+    """
+    try:
+        return _view_info[func]
+    except KeyError:
+        pass
+
+    spec = getargspec(func)
+    arg_names = tuple(spec.args)
+    defaults = dict(zip(reversed(arg_names), reversed(spec.defaults or ())))
+    required = tuple(name not in defaults for name in arg_names)
+    description, field_descriptions = parse_docstring(func.__doc__)
+    info = ViewInfo(arg_names, defaults, required, description, field_descriptions)
+
+    with _lock:
+        _view_info[func] = info
+    return info
+
+
+def get_path_variables(url):
+    """
+    Return the set of variable names in a URI template.
+    """
+    try:
+        return _path_variables[url]
+    except KeyError:
+        variables = frozenset(uritemplate.variables(url))
+        with _lock:
+            _path_variables[url] = variables
+        return variables
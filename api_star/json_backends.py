@@ -0,0 +1,144 @@
+"""
+Pluggable JSON backends, used by `json_parser()` and `json_renderer()`.
+
+The standard library `json` module is always available, and is used by
+default. If `orjson` or `ujson` are installed, they may be selected with
+`backend='orjson'` or `backend='ujson'`. The faster backends fall back to
+the standard library for any data they cannot handle identically, such as
+non-string mapping keys, or integers that do not fit in 64 bits.
+
+There are some differences in output with the faster backends:
+
+* `orjson` renders NaN and infinite floats as `null`, where the standard
+  library renders `NaN` and `Infinity`.
+* `orjson` encodes `Enum` members natively, as their value, unless an
+  encoder is registered for them with `register_json_encoder()`.
+* Only the `default()` method of a custom `encoder_cls` is used.
+"""
+from api_star.compat import COMPACT_SEPARATORS, text_type
+from api_star.utils import json_encoders, to_json_primitives
+import json
+import uuid
+
+try:
+    import enum
+except ImportError:  # pragma: no cover
+    enum = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover
+    ujson = None
+
+
+class StdlibBackend(object):
+    name = 'json'
+
+    def loads(self, content):
+        if not isinstance(content, text_type):
+            content = content.decode('utf-8')
+        return json.loads(content)
+
+    def dumps(self, data, default=None, indent=None, separators=COMPACT_SEPARATORS, ensure_ascii=False):
+        content = json.dumps(
+            data,
+            default=default,
+            indent=indent,
+            separators=separators,
+            ensure_ascii=ensure_ascii
+        )
+        if isinstance(content, text_type):
+            content = content.encode('utf-8')
+        return content
+
+
+# Types that orjson encodes natively, and cannot pass through to `default`.
+ORJSON_NATIVE_TYPES = (uuid.UUID,) if (enum is None) else (uuid.UUID, enum.Enum)
+
+
+def overrides_orjson_types():
+    """
+    Returns `True` if a JSON encoder is registered for any type that orjson
+    would otherwise encode natively, other than the default `str()` for UUIDs.
+    """
+    for cls, func in list(json_encoders.items()):
+        if issubclass(cls, ORJSON_NATIVE_TYPES) and not (cls is uuid.UUID and func is text_type):
+            return True
+    return False
+
+
+class OrjsonBackend(StdlibBackend):
+    name = 'orjson'
+
+    def loads(self, content):
+        try:
+            return orjson.loads(content)
+        except ValueError:
+            # Eg. integers larger than 64 bits. Malformed content will
+            # also raise a `ValueError` from the standard library.
+            return super(OrjsonBackend, self).loads(content)
+
+    def dumps(self, data, default=None, indent=None, separators=COMPACT_SEPARATORS, ensure_ascii=False):
+        if indent is None and separators == COMPACT_SEPARATORS and not ensure_ascii:
+            # Datetimes and dataclasses are passed through to `default`, so
+            # that they are represented in exactly the same way as the other
+            # backends. Other registered types are converted up front.
+            option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+            if overrides_orjson_types():
+                data = to_json_primitives(data)
+            try:
+                return orjson.dumps(data, default=default, option=option)
+            except TypeError:
+                pass
+        return super(OrjsonBackend, self).dumps(data, default, indent, separators, ensure_ascii)
+
+
+class UjsonBackend(StdlibBackend):
+    name = 'ujson'
+
+    def loads(self, content):
+        try:
+            return ujson.loads(content)
+        except ValueError:
+            return super(UjsonBackend, self).loads(content)
+
+    def dumps(self, data, default=None, indent=None, separators=COMPACT_SEPARATORS, ensure_ascii=False):
+        if indent is None and separators == COMPACT_SEPARATORS and not ensure_ascii:
+            try:
+                content = ujson.dumps(
+                    data,
+                    default=default,
+                    ensure_ascii=False,
+                    escape_forward_slashes=False
+                )
+            except (TypeError, OverflowError):
+                pass
+            else:
+                return content.encode('utf-8')
+        return super(UjsonBackend, self).dumps(data, default, indent, separators, ensure_ascii)
+
+
+backends = {'json': StdlibBackend}
+if orjson is not None:
+    backends['orjson'] = OrjsonBackend
+if ujson is not None:
+    backends['ujson'] = UjsonBackend
+
+
+def get_backend(name=None):
+    """
+    Return a JSON backend instance, given the name of the backend.
+
+    If no name is given, return the standard library backend.
+    """
+    if name is None:
+        name = 'json'
+    elif name not in backends:
+        msg = 'JSON backend "%s" is not available. Installed backends are: %s'
+        raise RuntimeError(msg % (name, ', '.join(sorted(backends.keys()))))
+    return backends[name]()
@@ -0,0 +1,248 @@
+"""
+Per-endpoint request metrics, exposed in the Prometheus text format.
+
+    from api_star.metrics import Metrics
+    from api_star.renderers import prometheus_renderer
+
+    app = App(__name__, metrics=Metrics())
+
+    @app.get('/metrics/', renderers=[prometheus_renderer()], exclude_from_schema=True)
+    def metrics():
+        return app.metrics
+
+Each thread records into its own shard of counters, so that recording a
+request does not need to acquire a lock. The shards are merged when the
+metrics are collected, and the shards of any finished threads are folded
+into a single retired shard.
+"""
+from api_star.compat import monotonic
+from bisect import bisect_left
+import coreapi
+import threading
+
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0
+)
+SIZE_BUCKETS = tuple(4 ** idx for idx in range(3, 13))  # 64 bytes to 16MB.
+
+# The WSGI environ or ASGI scope key used to record the endpoint name.
+ENDPOINT_KEY = 'api_star.endpoint'
+
+
+class Shard(object):
+    """
+    The counters recorded by a single thread.
+    """
+    def __init__(self):
+        self.requests = {}   # {(endpoint, method): count}
+        self.responses = {}  # {(endpoint, status): count}
+        self.histograms = {}  # {(name, endpoint): [bucket counts..., sum]}
+
+
+def _observe(histograms, key, buckets, value):
+    histogram = histograms.get(key)
+    if histogram is None:
+        histogram = [0] * (len(buckets) + 2)
+        histograms[key] = histogram
+    histogram[bisect_left(buckets, value)] += 1
+    histogram[-1] += value
+
+
+def _merge(target, shard):
+    """
+    Add the counters of `shard` into `target`.
+    """
+    for key, count in shard.requests.copy().items():
+        target.requests[key] = target.requests.get(key, 0) + count
+    for key, count in shard.responses.copy().items():
+        target.responses[key] = target.responses.get(key, 0) + count
+    for key, counts in shard.histograms.copy().items():
+        if key in target.histograms:
+            target.histograms[key] = [a + b for a, b in zip(target.histograms[key], counts)]
+        else:
+            target.histograms[key] = list(counts)
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def _get_endpoints(links):
+    """
+    Return the endpoint names in the given `App.links` registry,
+    including any that are nested under a tag.
+    """
+    endpoints = []
+    for key, value in links.items():
+        if isinstance(value, coreapi.Link):
+            endpoints.append((key, value.action.upper()))
+        else:
+            endpoints.extend(_get_endpoints(value))
+    return endpoints
+
+
+class Metrics(object):
+    """
+    Request counts, response status codes, latency and body sizes,
+    recorded for each endpoint.
+
+    `duration_buckets` - Histogram bucket upper bounds for latency, in seconds.
+    `size_buckets` - Histogram bucket upper bounds for body sizes, in bytes.
+    `prefix` - Prefix for the metric names.
+    """
+    def __init__(self, duration_buckets=DURATION_BUCKETS, size_buckets=SIZE_BUCKETS, prefix='api_star'):
+        self.duration_buckets = duration_buckets
+        self.size_buckets = size_buckets
+        self.prefix = prefix
+        self.links = {}
+        self._local = threading.local()
+        self._shards = {}  # {shard: thread}
+        self._retired = Shard()
+        self._lock = threading.Lock()
+
+    def _get_shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = Shard()
+            with self._lock:
+                self._retire_shards()
+                self._shards[shard] = threading.current_thread()
+            self._local.shard = shard
+            return shard
+
+    def _retire_shards(self):
+        # Servers may start a thread for each request, so fold the shards of
+        # finished threads together, rather than keeping one for each thread.
+        for shard, thread in list(self._shards.items()):
+            if not thread.is_alive():
+                _merge(self._retired, shard)
+                del self._shards[shard]
+
+    def observe(self, endpoint, method, status, duration, request_size=None, response_size=None):
+        """
+        Record a single request.
+        """
+        shard = self._get_shard()
+        key = (endpoint, method)
+        shard.requests[key] = shard.requests.get(key, 0) + 1
+        key = (endpoint, status)
+        shard.responses[key] = shard.responses.get(key, 0) + 1
+        _observe(shard.histograms, ('request_duration_seconds', endpoint), self.duration_buckets, duration)
+        if request_size is not None:
+            _observe(shard.histograms, ('request_size_bytes', endpoint), self.size_buckets, request_size)
+        if response_size is not None:
+            _observe(shard.histograms, ('response_size_bytes', endpoint), self.size_buckets, response_size)
+
+    def wsgi(self, app, environ, start_response):
+        """
+        Call the WSGI application `app`, recording metrics for the request.
+        """
+        start = monotonic()
+        captured = []
+
+        def capture_start_response(status, headers, *args):
+            captured.append((status, headers))
+            return start_response(status, headers, *args)
+
+        result = app(environ, capture_start_response)
+        duration = monotonic() - start
+
+        if captured:
+            status, headers = captured[-1]
+            response_size = None
+            for key, value in headers:
+                if key.lower() == 'content-length':
+                    response_size = int(value)
+                    break
+            self.observe(
+                environ.get(ENDPOINT_KEY, ''),
+                environ.get('REQUEST_METHOD', ''),
+                int(status[:3]),
+                duration,
+                int(environ.get('CONTENT_LENGTH') or 0),
+                response_size
+            )
+        return result
+
+    def collect(self):
+        """
+        Merge the shards from each thread, returning a three-tuple of
+        (requests, responses, histograms).
+        """
+        merged = Shard()
+        with self._lock:
+            self._retire_shards()
+            _merge(merged, self._retired)
+            shards = list(self._shards)
+        for shard in shards:
+            _merge(merged, shard)
+        return (merged.requests, merged.responses, merged.histograms)
+
+    def render(self):
+        """
+        Return the metrics in the Prometheus text exposition format.
+        """
+        requests, responses, histograms = self.collect()
+        for endpoint, method in _get_endpoints(self.links):
+            requests.setdefault((endpoint, method), 0)
+
+        prefix = self.prefix
+        lines = [
+            '# HELP %s_requests_total Requests handled, by endpoint.' % prefix,
+            '# TYPE %s_requests_total counter' % prefix
+        ]
+        for (endpoint, method), count in sorted(requests.items()):
+            lines.append('%s_requests_total{endpoint="%s",method="%s"} %d' % (
+                prefix, _escape(endpoint), _escape(method), count
+            ))
+
+        lines += [
+            '# HELP %s_responses_total Responses sent, by endpoint and status code.' % prefix,
+            '# TYPE %s_responses_total counter' % prefix
+        ]
+        for (endpoint, status), count in sorted(responses.items()):
+            lines.append('%s_responses_total{endpoint="%s",status="%d"} %d' % (
+                prefix, _escape(endpoint), status, count
+            ))
+
+        for name, buckets, description in (
+            ('request_duration_seconds', self.duration_buckets, 'Request latency'),
+            ('request_size_bytes', self.size_buckets, 'Request body size'),
+            ('response_size_bytes', self.size_buckets, 'Response body size')
+        ):
+            metric = '%s_%s' % (prefix, name)
+            lines += [
+                '# HELP %s %s, by endpoint.' % (metric, description),
+                '# TYPE %s histogram' % metric
+            ]
+            for (histogram_name, endpoint), counts in sorted(histograms.items()):
+                if histogram_name != name:
+                    continue
+                endpoint = _escape(endpoint)
+                cumulative = 0
+                for bound, count in zip(buckets, counts):
+                    cumulative += count
+                    lines.append('%s_bucket{endpoint="%s",le="%s"} %d' % (
+                        metric, endpoint, _format_value(bound), cumulative
+                    ))
+                cumulative += counts[len(buckets)]
+                lines.append('%s_bucket{endpoint="%s",le="+Inf"} %d' % (metric, endpoint, cumulative))
+                lines.append('%s_sum{endpoint="%s"} %s' % (metric, endpoint, _format_value(counts[-1])))
+                lines.append('%s_count{endpoint="%s"} %d' % (metric, endpoint, cumulative))
+
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        with self._lock:
+            for shard in [self._retired] + list(self._shards):
+                shard.requests.clear()
+                shard.responses.clear()
+                shard.histograms.clear()
@@ -1,41 +1,315 @@
 # coding: utf8
 from __future__ import unicode_literals
 from api_star.decorators import annotate
-from api_star.exceptions import BadRequest
+from api_star.exceptions import BadRequest, RequestEntityTooLarge
+from api_star.json_backends import get_backend
 from api_star.utils import parse_header_params
 from werkzeug.formparser import MultiPartParser as WerkzeugMultiPartParser
-from werkzeug.formparser import default_stream_factory
 from werkzeug.urls import url_decode_stream
-import json
+import re
+import tempfile
 
 
-def json_parser():
-    errors = {
-        'malformed': 'Malformed JSON'
-    }
+# The size of the chunks that request content is read in.
+CHUNK_SIZE = 64 * 1024
+
+# Uploaded files larger than this are spooled to disk.
+SPOOL_SIZE = 500 * 1024
+
+# The tokens that affect the nesting depth of JSON content.
+json_tokens = re.compile(br'["\\\[\]{}]')
+
+# The tokens that affect the nesting depth, or delimit items, in a JSON array.
+json_item_tokens = re.compile(br'["\\\[\]{},]')
+
+json_whitespace = b' \t\n\r'
+
+
+json_errors = {
+    'malformed': 'Malformed JSON',
+    'not-array': 'Expected a JSON array',
+    'too-deep': 'JSON nested too deeply'
+}
+
+
+def read_chunks(stream, content_length=None, max_body_size=None, chunk_size=None):
+    """
+    Return an iterator over the request content in chunks of `chunk_size`
+    bytes, defaulting to `CHUNK_SIZE`. Raises `RequestEntityTooLarge` as
+    soon as more than `max_body_size` bytes have been read.
+    """
+    if chunk_size is None:
+        chunk_size = CHUNK_SIZE
+    if max_body_size is not None and content_length and content_length > max_body_size:
+        raise RequestEntityTooLarge()
+
+    def chunks():
+        total = 0
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                return
+            total += len(chunk)
+            if max_body_size is not None and total > max_body_size:
+                raise RequestEntityTooLarge()
+            yield chunk
+
+    return chunks()
+
+
+def check_depth(chunks, max_depth):
+    """
+    Pass through chunks of JSON content, raising `BadRequest` as soon as the
+    arrays and objects are nested more than `max_depth` levels deep.
+    """
+    depth = 0
+    in_string = False
+    skip = 0
+
+    for chunk in chunks:
+        pos = skip
+        skip = 0
+        while True:
+            match = json_tokens.search(chunk, pos)
+            if match is None:
+                break
+            pos = match.end()
+            token = match.group()
+            if in_string:
+                if token == b'\\':
+                    # Skip the escaped character, which may be in the next chunk.
+                    pos += 1
+                    skip = max(pos - len(chunk), 0)
+                elif token == b'"':
+                    in_string = False
+            elif token == b'"':
+                in_string = True
+            elif token in (b'[', b'{'):
+                depth += 1
+                if depth > max_depth:
+                    raise BadRequest(json_errors['too-deep'])
+            else:
+                depth -= 1
+        yield chunk
+
+
+def iter_json_array(chunks, backend=None):
+    """
+    Given chunks of content containing a JSON array, lazily decode and
+    yield each of the items in the array.
+
+    Each chunk is scanned once, tracking the nesting depth and string state
+    of the current item, which is only decoded once it is complete.
+    """
+    if backend is None:
+        backend = get_backend()
+
+    state = 'start'
+    item = []
+    depth = 0
+    in_string = False
+    skip = 0
+
+    for chunk in chunks:
+        length = len(chunk)
+        start = 0
+        pos = skip
+        skip = 0
+        while pos < length:
+            if state != 'item':
+                char = chunk[pos:pos + 1]
+                if char in json_whitespace:
+                    pos += 1
+                    continue
+                if state == 'start':
+                    if char != b'[':
+                        raise BadRequest(json_errors['not-array'])
+                    state = 'first'
+                elif state in ('first', 'next') and char == b']':
+                    state = 'end'
+                elif state == 'next':
+                    if char != b',':
+                        raise BadRequest(json_errors['malformed'])
+                    state = 'value'
+                elif state == 'end' or char in (b',', b']'):
+                    # Content following the closing bracket, or a missing item.
+                    raise BadRequest(json_errors['malformed'])
+                else:
+                    # The start of an item, which is scanned below.
+                    state = 'item'
+                    start = pos
+                    continue
+                pos += 1
+                continue
+
+            match = json_item_tokens.search(chunk, pos)
+            if match is None:
+                break
+            pos = match.end()
+            token = match.group()
+            if in_string:
+                if token == b'\\':
+                    # Skip the escaped character, which may be in the next chunk.
+                    pos += 1
+                    skip = max(pos - length, 0)
+                elif token == b'"':
+                    in_string = False
+            elif token == b'"':
+                in_string = True
+            elif token in (b'[', b'{'):
+                depth += 1
+            elif depth:
+                if token in (b']', b'}'):
+                    depth -= 1
+            elif token == b'}':
+                raise BadRequest(json_errors['malformed'])
+            else:
+                # A ',' or ']' that follows the item.
+                item.append(chunk[start:pos - 1])
+                content = b''.join(item)
+                item = []
+                state = 'next'
+                pos -= 1
+                try:
+                    value = backend.loads(content)
+                except ValueError:
+                    raise BadRequest(json_errors['malformed'])
+                yield value
+
+        if state == 'item':
+            item.append(chunk[start:])
+
+    if state != 'end':
+        raise BadRequest(json_errors['malformed'])
 
-    @annotate(media_type='application/json')
+
+def json_parser(backend=None, max_body_size=None, max_depth=None, lazy=False, chunk_size=None):
+    """
+    Parses JSON request content.
+
+    `backend` - The name of the JSON backend to use, such as 'json' or
+                'orjson'. Defaults to the standard library `json` module.
+    `max_body_size` - The maximum size of the content, in bytes. Larger
+                      requests fail with a 413 response, without reading
+                      more than the limit.
+    `max_depth` - The maximum nesting depth of arrays and objects.
+    `lazy` - If `True` the content must be a JSON array, and the parsed
+             data is an iterator that decodes the items one at a time,
+             as the view consumes them.
+    `chunk_size` - The size of the chunks that the content is read in.
+                   Defaults to `CHUNK_SIZE`.
+    """
+    backend = get_backend(backend)
+
+    @annotate(media_type='application/json', max_body_size=max_body_size)
     def parser(stream, **context):
-        data = stream.read().decode('utf-8')
+        chunks = read_chunks(stream, context.get('content_length'), max_body_size, chunk_size)
+        if max_depth is not None:
+            chunks = check_depth(chunks, max_depth)
+
+        if lazy:
+            return iter_json_array(chunks, backend)
+
+        content = b''.join(chunks)
         try:
-            return json.loads(data)
+            return backend.loads(content)
         except ValueError:
-            raise BadRequest(errors['malformed'])
+            raise BadRequest(json_errors['malformed'])
 
     return parser
 
 
-def multipart_parser():
+class LimitedReader(object):
+    """
+    Wraps the request stream, raising `RequestEntityTooLarge` as soon as
+    more than `max_size` bytes have been read.
+    """
+    def __init__(self, stream, max_size):
+        self.stream = stream
+        self.max_size = max_size
+        self.size = 0
+
+    def _count(self, data):
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise RequestEntityTooLarge()
+        return data
+
+    def read(self, size=-1):
+        return self._count(self.stream.read(size))
+
+    def readline(self, size=-1):
+        return self._count(self.stream.readline(size))
+
+
+class LimitedWriter(object):
+    """
+    Wraps the file that an upload is written to, raising
+    `RequestEntityTooLarge` as soon as more than `max_size` bytes
+    have been written.
+
+    If `seekable` is `False` then calls to `seek()` are ignored, so that
+    uploads may be written to streams such as sockets or pipes.
+    """
+    def __init__(self, file, max_size=None, seekable=True):
+        self.file = file
+        self.max_size = max_size
+        self.seekable = seekable
+        self.size = 0
+
+    def write(self, data):
+        self.size += len(data)
+        if self.max_size is not None and self.size > self.max_size:
+            raise RequestEntityTooLarge()
+        return self.file.write(data)
+
+    def seek(self, offset, whence=0):
+        if self.seekable:
+            return self.file.seek(offset, whence)
+
+    def __getattr__(self, attr):
+        return getattr(self.file, attr)
+
+
+def multipart_parser(spool_size=SPOOL_SIZE, spool_dir=None, max_file_size=None,
+                     max_body_size=None, sink=None):
+    """
+    Parses multipart form data, including file uploads.
+
+    `spool_size` - Uploaded files larger than this many bytes are written to
+                   a temporary file on disk. If `0` they are always written
+                   to disk.
+    `spool_dir` - The directory for temporary files.
+    `max_file_size` - The maximum size of each uploaded file, in bytes.
+    `max_body_size` - The maximum size of the request content, in bytes.
+    `sink` - An optional `function(filename, content_type)` that returns a
+             writable file-like object, for each uploaded file. The upload is
+             streamed directly to it, rather than to a temporary file.
+
+    Exceeding `max_file_size` or `max_body_size` raises
+    `RequestEntityTooLarge` as soon as the limit is reached.
+    """
     errors = {
         'missing-boundary-param': 'Multipart message missing boundary in Content-Type header',
         'malformed': 'Malformed multipart request'
     }
 
-    @annotate(media_type='multipart/form-data')
+    def stream_factory(total_content_length, content_type, filename, content_length=None):
+        if sink is not None:
+            return LimitedWriter(sink(filename, content_type), max_file_size, seekable=False)
+        if spool_size:
+            file = tempfile.SpooledTemporaryFile(max_size=spool_size, mode='w+b', dir=spool_dir)
+        else:
+            file = tempfile.TemporaryFile(mode='w+b', dir=spool_dir)
+        if max_file_size is None:
+            return file
+        return LimitedWriter(file, max_file_size)
+
+    @annotate(media_type='multipart/form-data', max_body_size=max_body_size)
     def parser(stream, **context):
         content_type = context['content_type']
         content_length = context['content_length']
-        multipart_parser = WerkzeugMultiPartParser(default_stream_factory)
+        multipart_parser = WerkzeugMultiPartParser(stream_factory)
 
         params = parse_header_params(content_type)
         boundary = params.get('boundary')
@@ -43,6 +317,11 @@ def multipart_parser():
             raise BadRequest(errors['missing-boundary-param'])
         boundary = boundary.encode('ascii')
 
+        if max_body_size is not None:
+            if content_length and content_length > max_body_size:
+                raise RequestEntityTooLarge()
+            stream = LimitedReader(stream, max_body_size)
+
         try:
             data, files = multipart_parser.parse(stream, boundary, content_length)
         except ValueError:
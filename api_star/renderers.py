@@ -1,14 +1,27 @@
 # coding: utf8
 from __future__ import unicode_literals
-from api_star.compat import text_type, COMPACT_SEPARATORS, VERBOSE_SEPARATORS
+from api_star.compat import COMPACT_SEPARATORS, VERBOSE_SEPARATORS
 from api_star.decorators import annotate
-from api_star.utils import JSONEncoder
+from api_star.json_backends import get_backend
+from api_star.utils import JSONEncoder, to_json_primitives
 from coreapi.codecs import CoreJSONCodec
 import jinja2
-import json
 
 
-def json_renderer(verbose=False, ensure_ascii=False, encoder_cls=None):
+# The approximate size of each chunk yielded by streaming renderers.
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def json_renderer(verbose=False, ensure_ascii=False, encoder_cls=None, backend=None, preconvert=False):
+    """
+    Renders data as JSON.
+
+    `backend` - The name of the JSON backend to use, such as 'json' or
+                'orjson'. Defaults to the standard library `json` module.
+    `preconvert` - If `True`, convert any registered types into JSON
+                   primitives before encoding, rather than calling back
+                   into the encoder's `default()` for each object.
+    """
     if verbose:
         separators = VERBOSE_SEPARATORS
         indent = 4
@@ -19,18 +32,60 @@ def json_renderer(verbose=False, ensure_ascii=False, encoder_cls=None):
     if encoder_cls is None:
         encoder_cls = JSONEncoder
 
-    @annotate(media_type='application/json', charset=None, format='json')
+    default = encoder_cls().default
+    backend = get_backend(backend)
+
+    def stream(data, **context):
+        """
+        Render an iterator of items as a JSON array, yielding the encoded
+        content in chunks of around `STREAM_CHUNK_SIZE` bytes.
+        """
+        if indent is None:
+            opening, delimiter, closing, item_indent = b'[', b',', b']', None
+        else:
+            opening, delimiter, closing, item_indent = b'[\n    ', b',\n    ', b'\n]', b'\n    '
+
+        first = True
+        chunk = []
+        size = 0
+        for item in data:
+            if preconvert:
+                item = to_json_primitives(item)
+            content = backend.dumps(
+                item,
+                default=default,
+                indent=indent,
+                separators=separators,
+                ensure_ascii=ensure_ascii
+            )
+            if item_indent is not None:
+                content = content.replace(b'\n', item_indent)
+            chunk.append(opening if first else delimiter)
+            chunk.append(content)
+            first = False
+            size += len(content)
+            if size >= STREAM_CHUNK_SIZE:
+                yield b''.join(chunk)
+                chunk = []
+                size = 0
+
+        if first:
+            yield b'[]'
+        else:
+            chunk.append(closing)
+            yield b''.join(chunk)
+
+    @annotate(media_type='application/json', charset=None, format='json', stream=stream)
     def renderer(data, **context):
-        content = json.dumps(
+        if preconvert:
+            data = to_json_primitives(data)
+        return backend.dumps(
             data,
-            separators=separators,
+            default=default,
             indent=indent,
-            cls=encoder_cls,
+            separators=separators,
             ensure_ascii=ensure_ascii
         )
-        if isinstance(content, text_type):
-            content = content.encode('utf-8')
-        return content
 
     return renderer
 
@@ -64,3 +119,14 @@ def html_renderer():
         return data
 
     return renderer
+
+
+def prometheus_renderer():
+    """
+    Renders `api_star.metrics.Metrics` in the Prometheus text format.
+    """
+    @annotate(media_type='text/plain', charset='utf-8', format='prometheus')
+    def renderer(data, **context):
+        return data.render()
+
+    return renderer
@@ -3,6 +3,7 @@ from __future__ import unicode_literals
 from api_star.exceptions import NotAcceptable, UnsupportedMediaType
 from api_star.parsers import json_parser, multipart_parser, urlencoded_parser
 from api_star.renderers import json_renderer
+from api_star.utils import LRUCache
 from werkzeug.datastructures import MultiDict
 
 
@@ -23,31 +24,86 @@ def _negotiate_parser(content_type, parsers):
     raise UnsupportedMediaType()
 
 
-def _negotiate_renderer(accept, renderers):
+def _parse_accept(accept):
     """
-    Given the value of a 'Accept' header, return a two tuple of the appropriate
-    content type and codec registered to encode the response content.
+    Given the value of an 'Accept' header, return a dictionary mapping each
+    media range to its 'q' quality value.
     """
-    if accept is None:
-        return renderers[0]
+    ranges = {}
+    for item in accept.split(','):
+        media_range, sep, params = item.partition(';')
+        media_range = media_range.strip().lower()
+        if not media_range:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            key, sep, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        ranges[media_range] = max(quality, ranges.get(media_range, 0.0))
+    return ranges
+
+
+def _select_renderer(accept, renderers):
+    """
+    Given the value of a 'Accept' header, return the renderer with the
+    highest quality value, or `None` if no renderer is acceptable.
 
-    acceptable = set([
-        item.split(';')[0].strip().lower()
-        for item in accept.split(',')
-    ])
+    Ties are broken in favour of more specific media ranges, and then in
+    favour of the earliest renderer in the list.
+    """
+    ranges = _parse_accept(accept)
 
+    selected = None
+    selected_key = None
     for renderer in renderers:
-        if renderer.media_type in acceptable:
-            return renderer
+        media_type = renderer.media_type
+        candidates = (
+            (2, media_type),
+            (1, media_type.split('/')[0] + '/*'),
+            (0, '*/*')
+        )
+        for specificity, media_range in candidates:
+            if media_range in ranges:
+                key = (ranges[media_range], specificity)
+                break
+        else:
+            continue
+
+        if key[0] > 0 and (selected_key is None or key > selected_key):
+            selected = renderer
+            selected_key = key
+
+    return selected
 
-    for renderer in renderers:
-        if renderer.media_type.split('/')[0] + '/*' in acceptable:
-            return renderer
 
-    if '*/*' in acceptable:
+# Negotiation results, keyed on `(accept, renderers)`.
+# In practice there are very few distinct 'Accept' headers, so this
+# turns renderer negotiation into a single dictionary lookup.
+renderer_cache = LRUCache(max_size=256)
+_not_cached = object()
+
+
+def _negotiate_renderer(accept, renderers):
+    """
+    Given the value of a 'Accept' header, return a two tuple of the appropriate
+    content type and codec registered to encode the response content.
+    """
+    if accept is None:
         return renderers[0]
 
-    raise NotAcceptable()
+    key = (accept, tuple(renderers))
+    renderer = renderer_cache.get(key, _not_cached)
+    if renderer is _not_cached:
+        renderer = _select_renderer(accept, renderers)
+        renderer_cache.set(key, renderer)
+
+    if renderer is None:
+        raise NotAcceptable()
+    return renderer
 
 
 class RequestMixin(object):
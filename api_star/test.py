@@ -1,10 +1,11 @@
 import io
-from api_star.compat import urlparse
+from api_star.compat import text_type, urlencode, urlparse
 from requests.adapters import BaseAdapter
 from requests.models import Response
 from requests.sessions import Session
 from requests.structures import CaseInsensitiveDict
 from requests.utils import get_encoding_from_headers
+import json as json_module
 import sys
 
 
@@ -23,6 +24,11 @@ class Content(object):
             self._read += amt
         return self._bytes.read(amt)
 
+    def readline(self, size=-1):
+        line = self._bytes.readline(size)
+        self._read += len(line)
+        return line
+
     def stream(self, amt=None, decode_content=None):
         while self._read < self._len:
             yield self.read(amt)
@@ -31,6 +37,37 @@ class Content(object):
         pass
 
 
+def get_environ(method='GET', path='/', query_string='', headers=None, body=b'',
+                scheme='http', host='testserver', port=None):
+    """
+    Return a WSGI environ for a request, without going through a client.
+    """
+    headers = headers or {}
+    environ = {
+        'CONTENT_TYPE': headers.get('Content-Type'),
+        'CONTENT_LENGTH': len(body),
+        'QUERY_STRING': query_string,
+        'PATH_INFO': path,
+        'REQUEST_METHOD': method,
+        'SERVER_NAME': host,
+        'SERVER_PORT': port or ('443' if scheme == 'https' else '80'),
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scheme,
+        'wsgi.input': Content(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multiprocess': False,
+        'wsgi.multithread': False,
+        'wsgi.run_once': False,
+    }
+
+    environ.update({
+        'HTTP_{}'.format(name).replace('-', '_').upper(): value
+        for name, value in headers.items()
+    })
+    return environ
+
+
 class WSGIAdapter(BaseAdapter):
     def __init__(self, app):
         self.app = app
@@ -38,31 +75,20 @@ class WSGIAdapter(BaseAdapter):
     def send(self, request, *args, **kwargs):
         urlinfo = urlparse(request.url)
 
-        data = request.body.encode('utf-8') if request.body else b''
-
-        environ = {
-            'CONTENT_TYPE': request.headers.get('Content-Type'),
-            'CONTENT_LENGTH': len(data),
-            'QUERY_STRING': urlinfo.query,
-            'PATH_INFO': urlinfo.path,
-            'REQUEST_METHOD': request.method,
-            'SERVER_NAME': urlinfo.hostname,
-            'SERVER_PORT': urlinfo.port or ('443' if urlinfo.scheme == 'https' else '80'),
-            'SERVER_PROTOCOL': 'HTTP/1.1',
-            'wsgi.version': (1, 0),
-            'wsgi.url_scheme': urlinfo.scheme,
-            'wsgi.input': Content(data),
-            'wsgi.errors': sys.stderr,
-            'wsgi.multiprocess': False,
-            'wsgi.multithread': False,
-            'wsgi.run_once': False,
-            'wsgi.url_scheme': urlinfo.scheme,
-        }
-
-        environ.update({
-            'HTTP_{}'.format(name).replace('-', '_').upper(): value
-            for name, value in request.headers.items()
-        })
+        data = request.body or b''
+        if isinstance(data, text_type):
+            data = data.encode('utf-8')
+
+        environ = get_environ(
+            method=request.method,
+            path=urlinfo.path,
+            query_string=urlinfo.query,
+            headers=request.headers,
+            body=data,
+            scheme=urlinfo.scheme,
+            host=urlinfo.hostname,
+            port=urlinfo.port
+        )
 
         response = Response()
 
@@ -91,3 +117,120 @@ class TestSession(Session):
     def prepare_request(self, request):
         request.url = 'http://testserver/' + request.url.lstrip('/')
         return super(TestSession, self).prepare_request(request)
+
+
+class TestResponse(object):
+    """
+    A minimal response, as returned by `TestClient`.
+    """
+    def __init__(self, status, headers, content):
+        self.status_code = int(status.split(' ')[0])
+        self.raw_headers = headers
+        self.content = content
+
+    @property
+    def headers(self):
+        if not hasattr(self, '_headers'):
+            self._headers = CaseInsensitiveDict(self.raw_headers)
+        return self._headers
+
+    @property
+    def text(self):
+        encoding = get_encoding_from_headers(self.headers) or 'utf-8'
+        return self.content.decode(encoding)
+
+    def json(self):
+        if not hasattr(self, '_json'):
+            self._json = json_module.loads(self.content.decode('utf-8'))
+        return self._json
+
+
+class TestClient(object):
+    """
+    A test client that calls the WSGI application directly, rather than
+    going through `requests`. Much faster than `TestSession`, for large
+    test suites.
+
+    The client holds no per-request state, so a single instance may be
+    used by tests running in parallel threads.
+    """
+    def __init__(self, app, host='testserver', scheme='http', headers=None):
+        self.app = app
+        self.headers = headers or {}
+        self.template = get_environ(scheme=scheme, host=host, headers=self.headers)
+        del self.template['wsgi.input']
+
+    def request(self, method, path, params=None, data=None, json=None, headers=None):
+        """
+        Make a request, returning a `TestResponse`.
+
+        `params` - A dictionary of query parameters.
+        `data` - A dictionary of form data, or a bytestring body.
+        `json` - Data to send as a JSON encoded body.
+        """
+        environ = self.template.copy()
+        path, sep, query_string = path.partition('?')
+        if params:
+            query_string = (query_string + '&' if query_string else '') + urlencode(params)
+
+        body = b''
+        content_type = None
+        if json is not None:
+            body = json_module.dumps(json).encode('utf-8')
+            content_type = 'application/json'
+        elif isinstance(data, dict):
+            body = urlencode(data).encode('utf-8')
+            content_type = 'application/x-www-form-urlencoded'
+        elif data is not None:
+            body = data.encode('utf-8') if isinstance(data, text_type) else data
+
+        if headers:
+            for name, value in headers.items():
+                key = name.upper().replace('-', '_')
+                if key == 'CONTENT_TYPE':
+                    content_type = value
+                else:
+                    environ['HTTP_' + key] = value
+        if content_type is not None:
+            environ['CONTENT_TYPE'] = content_type
+
+        environ['REQUEST_METHOD'] = method
+        environ['PATH_INFO'] = path
+        environ['QUERY_STRING'] = query_string
+        environ['CONTENT_LENGTH'] = str(len(body))
+        environ['wsgi.input'] = io.BytesIO(body)
+
+        started = []
+
+        def start_response(status, headers, exc_info=None):
+            started.append((status, headers))
+
+        result = self.app(environ, start_response)
+        try:
+            content = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        status, response_headers = started[-1]
+        return TestResponse(status, response_headers, content)
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request('PUT', path, **kwargs)
+
+    def patch(self, path, **kwargs):
+        return self.request('PATCH', path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request('DELETE', path, **kwargs)
+
+    def options(self, path, **kwargs):
+        return self.request('OPTIONS', path, **kwargs)
+
+    def head(self, path, **kwargs):
+        return self.request('HEAD', path, **kwargs)
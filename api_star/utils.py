@@ -1,38 +1,99 @@
-from api_star.compat import text_type
+from api_star.compat import monotonic, text_type
+from collections import OrderedDict
 import coreapi
 import datetime
 import decimal
 import json
 import re
+import threading
 import uuid
 
 
 ZERO = datetime.timedelta(0)
 
 
+def encode_datetime(obj):
+    representation = obj.isoformat()
+    if representation.endswith('+00:00'):
+        representation = representation[:-6] + 'Z'
+    return representation
+
+
+# Functions for converting non-native types into JSON primitives,
+# keyed on type. Use `register_json_encoder()` to add application types.
+json_encoders = {
+    datetime.datetime: encode_datetime,
+    datetime.date: datetime.date.isoformat,
+    datetime.time: datetime.time.isoformat,
+    decimal.Decimal: float,
+    uuid.UUID: text_type,
+    coreapi.Document: lambda obj: dict(obj.items()),
+    coreapi.Link: lambda obj: obj.url,
+}
+
+# The encoder resolved for each type seen, including subclasses of the
+# registered types, and `None` for types with no encoder.
+_resolved_json_encoders = {}
+
+
+def register_json_encoder(cls, func):
+    """
+    Register a function that converts instances of `cls`, or any subclass
+    of `cls`, into data that can be encoded as JSON.
+    """
+    json_encoders[cls] = func
+    _resolved_json_encoders.clear()
+
+
+def get_json_encoder(cls):
+    """
+    Return the JSON encoder function for a type, or `None`.
+
+    Looks for an exact match first, and then the nearest base class
+    in the type's MRO, caching the result.
+    """
+    try:
+        return _resolved_json_encoders[cls]
+    except KeyError:
+        pass
+
+    encoder = None
+    for base in cls.__mro__:
+        if base in json_encoders:
+            encoder = json_encoders[base]
+            break
+    _resolved_json_encoders[cls] = encoder
+    return encoder
+
+
+def to_json_primitives(data):
+    """
+    Return a copy of the data, with any instances of registered types
+    converted into JSON primitives.
+
+    Data converted up front can be encoded without calling back into
+    Python for each non-native object.
+    """
+    if isinstance(data, dict):
+        return {key: to_json_primitives(value) for key, value in data.items()}
+    elif isinstance(data, (list, tuple)):
+        return [to_json_primitives(item) for item in data]
+
+    encoder = get_json_encoder(type(data))
+    if encoder is None:
+        return data
+    return to_json_primitives(encoder(data))
+
+
 class JSONEncoder(json.JSONEncoder):
     """
     JSONEncoder subclass that deals with various built-in types.
     """
     def default(self, obj):
-        if isinstance(obj, datetime.datetime):
-            representation = obj.isoformat()
-            if representation.endswith('+00:00'):
-                representation = representation[:-6] + 'Z'
-            return representation
-        elif isinstance(obj, datetime.date):
-            return obj.isoformat()
-        elif isinstance(obj, datetime.time):
-            return obj.isoformat()
-        elif isinstance(obj, decimal.Decimal):
-            return float(obj)
-        elif isinstance(obj, uuid.UUID):
-            return text_type(obj)
-        elif isinstance(obj, coreapi.Document):
-            return dict(obj.items())
-        elif isinstance(obj, coreapi.Link):
-            return obj.url
-        return super(JSONEncoder, self).default(obj)
+        encoder = get_json_encoder(type(obj))
+        if encoder is None:
+            return super(JSONEncoder, self).default(obj)
+        return encoder(obj)
 
 
 class UTC(datetime.tzinfo):
@@ -87,16 +148,24 @@ class FixedOffset(datetime.tzinfo):
 utc = UTC()
 
 
+# Timezones are interned, so that each offset is only allocated once.
+_fixed_timezones = {}
+
+
 def get_fixed_timezone(offset):
     """
     Returns a tzinfo instance with a fixed offset from UTC.
     """
     if isinstance(offset, datetime.timedelta):
         offset = offset.seconds // 60
+    try:
+        return _fixed_timezones[offset]
+    except KeyError:
+        pass
     sign = '-' if offset < 0 else '+'
     hhmm = '%02d%02d' % divmod(abs(offset), 60)
     name = sign + hhmm
-    return FixedOffset(offset, name)
+    return _fixed_timezones.setdefault(offset, FixedOffset(offset, name))
 
 
 date_re = re.compile(
@@ -115,6 +184,81 @@ datetime_re = re.compile(
     r'(?P<tzinfo>Z|[+-]\d{2}(?::?\d{2})?)?$'
 )
 
+# The C implemented `fromisoformat()` constructors are used as a fast path
+# for the most common, fixed width, formats. They are not available before
+# Python 3.7, in which case only the regular expressions are used.
+date_fromisoformat = getattr(datetime.date, 'fromisoformat', None)
+time_fromisoformat = getattr(datetime.time, 'fromisoformat', None)
+datetime_fromisoformat = getattr(datetime.datetime, 'fromisoformat', None)
+
+
+def _fast_parse_date(value):
+    if date_fromisoformat is None or len(value) != 10:
+        return None
+    if value[4] != '-' or value[7] != '-':
+        return None
+    try:
+        return date_fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def _fast_parse_time(value):
+    # Supports 'HH:MM', 'HH:MM:SS', 'HH:MM:SS.fff' and 'HH:MM:SS.ffffff'.
+    # Any other shape, such as a time zone suffix, which `fromisoformat()`
+    # accepts on some Python versions, is left to the regular expression.
+    length = len(value)
+    if time_fromisoformat is None or length not in (5, 8, 12, 15):
+        return None
+    if value[2] != ':' or (length > 5 and value[5] != ':') or (length > 8 and value[8] != '.'):
+        return None
+    if not (value[0:2] + value[3:5] + value[6:8] + value[9:]).isdigit():
+        return None
+    try:
+        return time_fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def _fast_parse_datetime(value, default_timezone):
+    # Supports 'YYYY-MM-DDTHH:MM', with optional ':SS', ':SS.fff' or
+    # ':SS.ffffff', followed by an optional 'Z' or '+HH:MM' offset.
+    if datetime_fromisoformat is None or len(value) < 16:
+        return None
+
+    if value[-1] == 'Z':
+        tzinfo = utc
+        value = value[:-1]
+    elif value[-6] in '+-' and value[-3] == ':' and len(value) > 21:
+        hours, minutes = value[-5:-3], value[-2:]
+        if not (hours.isdigit() and minutes.isdigit()):
+            return None
+        offset = 60 * int(hours) + int(minutes)
+        if value[-6] == '-':
+            offset = -offset
+        tzinfo = get_fixed_timezone(offset)
+        value = value[:-6]
+    else:
+        tzinfo = default_timezone
+
+    length = len(value)
+    if length not in (16, 19, 23, 26):
+        return None
+    if value[4] != '-' or value[7] != '-' or value[10] not in 'T ' or value[13] != ':':
+        return None
+    if (length > 16 and value[16] != ':') or (length > 19 and value[19] != '.'):
+        return None
+    digits = value[0:4] + value[5:7] + value[8:10] + value[11:13] + value[14:16] + value[17:19] + value[20:]
+    if not digits.isdigit():
+        return None
+    try:
+        parsed = datetime_fromisoformat(value)
+    except ValueError:
+        return None
+    if tzinfo is not None:
+        parsed = parsed.replace(tzinfo=tzinfo)
+    return parsed
+
 
 def parse_iso8601_date(value):
     """
@@ -122,6 +266,10 @@ def parse_iso8601_date(value):
 
     Raises ValueError if the input is invalid.
     """
+    parsed = _fast_parse_date(value)
+    if parsed is not None:
+        return parsed
+
     match = date_re.match(value)
     if match:
         kw = {k: int(v) for k, v in match.groupdict().items()}
@@ -136,6 +284,10 @@ def parse_iso8601_time(value):
 
     Raises ValueError if the input is invalid.
     """
+    parsed = _fast_parse_time(value)
+    if parsed is not None:
+        return parsed
+
     match = time_re.match(value)
     if match:
         kw = match.groupdict()
@@ -154,6 +306,10 @@ def parse_iso8601_datetime(value, default_timezone=None):
 
     Raises ValueError if the input is invalid.
     """
+    parsed = _fast_parse_datetime(value, default_timezone)
+    if parsed is not None:
+        return parsed
+
     match = datetime_re.match(value)
     if match:
         kw = match.groupdict()
@@ -192,3 +348,87 @@ def parse_header_params(media_type):
         if key:
             params[key] = value
     return params
+
+
+class LRUCache(object):
+    """
+    A thread-safe, size-bounded cache, that evicts the least recently used
+    entries first. Entries may optionally expire after `ttl` seconds.
+
+    The `hits` and `misses` counters may be used to monitor the cache.
+    If given, `on_evict(key)` is called, outside of the lock, for each entry
+    that is evicted or found to have expired.
+    """
+    def __init__(self, max_size=128, ttl=None, on_evict=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        # Membership tests do not count as hits or misses,
+        # or change the order of eviction.
+        item = self._data.get(key)
+        return item is not None and (item[1] is None or item[1] > monotonic())
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value, expires = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            if expires is None or expires > monotonic():
+                # Reinsert the entry, marking it as the most recently used.
+                self._data[key] = (value, expires)
+                self.hits += 1
+                return value
+            self.misses += 1
+        if self.on_evict is not None:
+            self.on_evict(key)
+        return default
+
+    def set(self, key, value, ttl=None):
+        if ttl is None:
+            ttl = self.ttl
+        expires = None if (ttl is None) else monotonic() + ttl
+        evicted = []
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (value, expires)
+            while len(self._data) > self.max_size:
+                evicted.append(self._data.popitem(last=False)[0])
+        if self.on_evict is not None:
+            for evicted_key in evicted:
+                self.on_evict(evicted_key)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_value(self, value):
+        """
+        Delete every entry with the given value.
+        """
+        with self._lock:
+            for key, (item, expires) in list(self._data.items()):
+                if item == value:
+                    del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def info(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._data),
+            'max_size': self.max_size
+        }
@@ -69,6 +69,9 @@ def boolean(allow_blank=True):
     false_values = ('false', '0', 'f', False, 0)
 
     def validator(value):
+        if value is True or value is False:
+            return value
+
         if is_blank(value, allow_blank):
             return False
 
@@ -161,18 +164,19 @@ def integer(max_value=None, min_value=None, allow_null=False):
     Validates an integer.
     """
     def validator(value):
-        if is_null(value, allow_null):
-            return None
+        if type(value) is not int:
+            if is_null(value, allow_null):
+                return None
 
-        if isinstance(value, string_types) and len(value) > 100:
-            raise ValidationError(errors['too_large'])
+            if isinstance(value, string_types) and len(value) > 100:
+                raise ValidationError(errors['too_large'])
 
-        try:
-            value = int(value)
-        except TypeError:
-            raise ValidationError(errors['type'].format(type_name='integer'))
-        except ValueError:
-            raise ValidationError(errors['value'].format(type_name='integer'))
+            try:
+                value = int(value)
+            except TypeError:
+                raise ValidationError(errors['type'].format(type_name='integer'))
+            except ValueError:
+                raise ValidationError(errors['value'].format(type_name='integer'))
 
         if (max_value is not None) and (value > max_value):
             raise ValidationError(errors['max_value'].format(max_value=max_value))
@@ -343,6 +347,14 @@ def multiple_choice(options):
 
 # Composite validators.
 
+class required(object):
+    """
+    A sentinal value used in `object_of(...)` validation plans to indicate a
+    field that has no default value.
+    """
+    pass
+
+
 def list_of(child_validator, allow_empty=True):
     """
     Validates a list of items. For example:
@@ -358,17 +370,24 @@ def list_of(child_validator, allow_empty=True):
         if not allow_empty and not value:
             raise ValidationError(errors['empty'])
 
-        validated = []
+        try:
+            # Fast path. Validate every item without tracking indexes.
+            return [child_validator(item) for item in value]
+        except ValidationError:
+            pass
 
+        # Slow path. Determine the index of the first invalid item.
         for idx, item in enumerate(value):
             try:
-                validated.append(child_validator(item))
+                child_validator(item)
             except ValidationError as exc:
+                if not isinstance(exc.description, string_types):
+                    # Nested errors, eg. from `list_of(object_of(...))`.
+                    raise ValidationError({idx: exc.description})
                 index_msg = errors['index'].format(index=idx)
                 raise ValidationError(index_msg + ' ' + exc.description)
 
-        return validated
-
+    validator.child_validator = child_validator
     return validator
 
 
@@ -388,12 +407,14 @@ def mapping_of(child_validator, allow_empty=True):
             raise ValidationError(errors['empty'])
 
         validated = {}
-        invalid = {}
+        invalid = None
 
         for key, item in value.items():
             try:
                 validated[key] = child_validator(item)
             except ValidationError as exc:
+                if invalid is None:
+                    invalid = {}
                 invalid[key] = exc.description
 
         if invalid:
@@ -401,9 +422,27 @@ def mapping_of(child_validator, allow_empty=True):
 
         return validated
 
+    validator.child_validator = child_validator
     return validator
 
 
+def compile_spec(spec):
+    """
+    Compile an `object_of(...)` spec into a validation plan.
+
+    Returns a tuple of `(key, validator, default)` three-tuples, where
+    `default` is either the `required` sentinal, the `ignore` sentinal,
+    or the default value for an `optional()` field.
+
+    The plan is built once, so that validating a value does not need to
+    probe each field validator for a `default_value` attribute.
+    """
+    return tuple([
+        (key, child_validator, getattr(child_validator, 'default_value', required))
+        for key, child_validator in spec.items()
+    ])
+
+
 def object_of(spec):
     """
     Validates a mapping of a fixed set of fields. For example:
@@ -422,38 +461,72 @@ def object_of(spec):
         'tags': optional(list_of(text(max_length=20)), default=[])
     })
     """
+    plan = compile_spec(spec)
+
     def validator(value):
         if not isinstance(value, dict):
             raise ValidationError(errors['type'].format(type_name='object'))
 
         validated = {}
-        invalid = {}
+        invalid = None
+        lookup = value.get
 
-        for key, validator in spec.items():
-            try:
-                item = value[key]
-            except KeyError:
-                # No value included for this field.
-                try:
-                    item = validator.default_value
-                except AttributeError:
-                    # A missing required field.
-                    invalid[key] = errors['required']
-                else:
-                    # An `optional()` field.
-                    if item is not ignore:
-                        # An `optional()` field with a default.
-                        validated[key] = item
-            else:
+        for key, child_validator, default in plan:
+            item = lookup(key, required)
+            if item is not required:
                 # A value has been included for this field.
                 try:
-                    validated[key] = validator(item)
+                    validated[key] = child_validator(item)
                 except ValidationError as exc:
+                    if invalid is None:
+                        invalid = {}
                     invalid[key] = exc.description
+            elif default is required:
+                # A missing required field.
+                if invalid is None:
+                    invalid = {}
+                invalid[key] = errors['required']
+            elif default is not ignore:
+                # An `optional()` field with a default.
+                validated[key] = default
 
         if invalid:
             raise ValidationError(invalid)
 
         return validated
 
+    validator.plan = plan
     return validator
+
+
+def validate_many(spec, records):
+    """
+    Validates a batch of records in a single pass. For example:
+
+    validate_many({'id': integer(), 'name': text()}, records)
+
+    The `spec` may either be a dictionary, as used by `object_of(...)`,
+    or any validator.
+
+    Unlike `list_of(...)`, validation does not stop at the first invalid
+    item. Returns a two-tuple of `(validated, invalid)`, where `validated`
+    is a list of the validated records, in their original order, and
+    `invalid` maps the index of each invalid record to its errors.
+    """
+    if isinstance(spec, dict):
+        spec = object_of(spec)
+
+    if not isinstance(records, list):
+        raise ValidationError(errors['type'].format(type_name='list'))
+
+    validated = []
+    invalid = {}
+    append = validated.append
+
+    for idx, item in enumerate(records):
+        try:
+            append(spec(item))
+        except ValidationError as exc:
+            invalid[idx] = exc.description
+
+    return (validated, invalid)
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+"""
+Startup benchmark for registering a large number of Falcon routes.
+
+Measures the time taken to register the routes, and the time taken by
+the first request, which is when the routes are added to the router.
+
+    python benchmarks/bench_falcon_startup.py
+"""
+from api_star.frameworks.falcon import App
+from api_star.test import TestSession
+import time
+
+
+def build(count):
+    app = App(title='Startup benchmark')
+    for idx in range(count):
+        def view(item_id):
+            return {'item_id': item_id}
+        view.__name__ = 'view_%d' % idx
+        app.get('/resource_%d/{item_id}/' % idx)(view)
+        app.delete('/resource_%d/{item_id}/' % idx)(view)
+    return app
+
+
+def main(counts=(100, 1000)):
+    for count in counts:
+        start = time.time()
+        app = build(count)
+        registered = time.time()
+        response = TestSession(app).get('/resource_0/1/')
+        finished = time.time()
+        assert response.status_code == 200
+
+        print('%5d routes: register %8.2f ms, first request %8.2f ms' % (
+            count,
+            (registered - start) * 1000,
+            (finished - registered) * 1000
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+"""
+Parsing throughput for the `iso_datetime()`, `iso_date()` and `iso_time()`
+validators, comparing the `fromisoformat()` fast path with the regular
+expression based parsing.
+
+    python benchmarks/bench_iso8601.py
+"""
+from api_star import utils, validators
+import timeit
+
+
+values = {
+    'datetime': ['2001-01-%02dT12:%02d:00Z' % (1 + idx % 28, idx % 60) for idx in range(1000)] +
+                ['2001-01-%02dT12:00:00.123456+01:00' % (1 + idx % 28) for idx in range(1000)],
+    'date': ['2001-01-%02d' % (1 + idx % 28) for idx in range(1000)],
+    'time': ['12:%02d:00' % (idx % 60) for idx in range(1000)],
+}
+
+validator_factories = {
+    'datetime': validators.iso_datetime,
+    'date': validators.iso_date,
+    'time': validators.iso_time,
+}
+
+
+def measure(validator, items, number):
+    timer = timeit.Timer(lambda: [validator(item) for item in items])
+    return min(timer.repeat(repeat=number, number=1)) / len(items)
+
+
+def main(number=20):
+    fast_paths = (utils.date_fromisoformat, utils.time_fromisoformat, utils.datetime_fromisoformat)
+    print('%-10s %12s %12s' % ('type', 'fast us', 'regex us'))
+    for name in ('datetime', 'date', 'time'):
+        validator = validator_factories[name]()
+        fast = measure(validator, values[name], number)
+        utils.date_fromisoformat = utils.time_fromisoformat = utils.datetime_fromisoformat = None
+        try:
+            regex = measure(validator, values[name], number)
+        finally:
+            utils.date_fromisoformat, utils.time_fromisoformat, utils.datetime_fromisoformat = fast_paths
+        print('%-10s %12.2f %12.2f' % (name, fast * 1e6, regex * 1e6))
+
+
+if __name__ == '__main__':
+    main()
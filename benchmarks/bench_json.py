@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+"""
+Encode and decode throughput for each of the installed JSON backends.
+
+    python benchmarks/bench_json.py
+"""
+from api_star import json_backends
+from api_star.utils import JSONEncoder, utc
+import datetime
+import decimal
+import timeit
+import uuid
+
+
+def payloads():
+    notes = [
+        {'id': idx, 'description': 'Note number %d' % idx, 'complete': idx % 2 == 0}
+        for idx in range(5000)
+    ]
+    events = [
+        {
+            'id': '%s' % uuid.uuid4(),
+            'created': datetime.datetime(2001, 1, 1, 12, 0, idx % 60, tzinfo=utc),
+            'amount': decimal.Decimal('%d.50' % idx)
+        }
+        for idx in range(5000)
+    ]
+    nested = {
+        'user': {'name': 'example', 'tags': ['a', 'b', 'c'] * 10},
+        'items': [{'values': list(range(20)), 'meta': {'x': 1.5, 'y': None}}] * 500
+    }
+    return [('notes', notes), ('events', events), ('nested', nested)]
+
+
+def measure(func, number):
+    return min(timeit.Timer(func).repeat(repeat=number, number=1))
+
+
+def main(number=10):
+    default = JSONEncoder().default
+    stdlib = json_backends.get_backend('json')
+    names = sorted(json_backends.backends.keys())
+
+    print('%-8s %-8s %12s %12s' % ('payload', 'backend', 'encode MB/s', 'decode MB/s'))
+    for payload_name, data in payloads():
+        content = stdlib.dumps(data, default=default)
+        megabytes = len(content) / 1000000.0
+        for name in names:
+            backend = json_backends.get_backend(name)
+            encode = measure(lambda: backend.dumps(data, default=default), number)
+            decode = measure(lambda: backend.loads(content), number)
+            print('%-8s %-8s %12.1f %12.1f' % (payload_name, name, megabytes / encode, megabytes / decode))
+
+
+if __name__ == '__main__':
+    main()
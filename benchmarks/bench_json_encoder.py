@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""
+Encoding throughput for payloads dominated by datetimes and Decimals,
+comparing the `default()` callback with pre-converting known types, for
+each of the installed JSON backends.
+
+The 'isinstance' row uses the previous `JSONEncoder.default()`, which
+checked each supported type in turn, for comparison.
+
+    python benchmarks/bench_json_encoder.py
+"""
+from api_star import json_backends
+from api_star.renderers import json_renderer
+from api_star.compat import text_type
+from api_star.utils import utc
+import coreapi
+import datetime
+import decimal
+import json
+import timeit
+import uuid
+
+
+class IsinstanceEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, datetime.datetime):
+            representation = obj.isoformat()
+            if representation.endswith('+00:00'):
+                representation = representation[:-6] + 'Z'
+            return representation
+        elif isinstance(obj, datetime.date):
+            return obj.isoformat()
+        elif isinstance(obj, datetime.time):
+            return obj.isoformat()
+        elif isinstance(obj, decimal.Decimal):
+            return float(obj)
+        elif isinstance(obj, uuid.UUID):
+            return text_type(obj)
+        elif isinstance(obj, coreapi.Document):
+            return dict(obj.items())
+        elif isinstance(obj, coreapi.Link):
+            return obj.url
+        return super(IsinstanceEncoder, self).default(obj)
+
+
+def payloads():
+    start = datetime.datetime(2001, 1, 1, tzinfo=utc)
+    datetimes = [
+        {'created': start + datetime.timedelta(minutes=idx), 'updated': start}
+        for idx in range(10000)
+    ]
+    decimals = [
+        {'price': decimal.Decimal('%d.99' % idx), 'tax': decimal.Decimal('0.20')}
+        for idx in range(10000)
+    ]
+    return [('datetimes', datetimes), ('decimals', decimals)]
+
+
+def main(number=10):
+    print('%-10s %-10s %14s %14s' % ('payload', 'backend', 'default ms', 'preconvert ms'))
+    for payload_name, data in payloads():
+        renderer = json_renderer(backend='json', encoder_cls=IsinstanceEncoder)
+        timer = timeit.Timer(lambda: renderer(data))
+        result = min(timer.repeat(repeat=number, number=1)) * 1000
+        print('%-10s %-10s %14.2f %14s' % (payload_name, 'isinstance', result, '-'))
+
+        for name in sorted(json_backends.backends.keys()):
+            results = []
+            for preconvert in (False, True):
+                renderer = json_renderer(backend=name, preconvert=preconvert)
+                timer = timeit.Timer(lambda: renderer(data))
+                results.append(min(timer.repeat(repeat=number, number=1)) * 1000)
+            print('%-10s %-10s %14.2f %14.2f' % (payload_name, name, results[0], results[1]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+"""
+Compares the per-request cost of `TestClient` against `TestSession`.
+
+    python benchmarks/bench_test_client.py
+"""
+from api_star.frameworks.falcon import App as FalconApp
+from api_star.frameworks.flask import App as FlaskApp
+from api_star.test import TestClient, TestSession
+import timeit
+
+
+def build(app_class):
+    app = app_class(__name__, title='Test client benchmark')
+
+    @app.get('/items/{item_id}/' if app_class is FalconApp else '/items/<item_id>/')
+    def read_item(item_id, verbose=False):
+        return {'item_id': item_id}
+
+    @app.post('/items/')
+    def create_item(name):
+        return {'name': name}
+
+    return app
+
+
+def main(number=2000):
+    for app_class in (FlaskApp, FalconApp):
+        app = build(app_class)
+        for client in (TestSession(app), TestClient(app)):
+            get = timeit.timeit(lambda: client.get('/items/1/', params={'verbose': 1}).json(), number=number)
+            post = timeit.timeit(lambda: client.post('/items/', json={'name': 'a'}).json(), number=number)
+            print('%-6s %-12s GET %7.1f us   POST %7.1f us' % (
+                app_class.__module__.split('.')[-2],
+                type(client).__name__,
+                get / number * 1e6,
+                post / number * 1e6
+            ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""
+Standard framework overhead suite, run against the todo examples.
+
+Each scenario replays a mix of requests against the Flask and Falcon
+versions of the todo API, and reports throughput and latency percentiles.
+
+    python benchmarks/bench_todo.py
+    python benchmarks/bench_todo.py --save baseline.json
+    python benchmarks/bench_todo.py --baseline baseline.json --tolerance 0.2
+
+With `--baseline` the script exits with an error if the throughput of any
+scenario has dropped by more than the tolerance.
+"""
+from api_star.benchmark import request, run
+import argparse
+import importlib
+import json
+import os
+import sys
+
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+APPS = ('examples.todo_flask:app', 'examples.todo_falcon:app')
+
+
+def get_scenarios(module):
+    note_id = module.notes[1]['id']
+    return {
+        'list': [request('GET', '/notes/')],
+        'read': [request('GET', '/notes/%s/' % note_id)],
+        'update': [request('PUT', '/notes/%s/' % note_id, json={'complete': True})],
+        'invalid': [request('POST', '/notes/', json={'description': 'x' * 200})],
+        'not_found': [request('GET', '/notes/missing/')],
+        'schema': [request('GET', '/', headers={'Accept': 'application/vnd.coreapi+json'})],
+        'mixed': (
+            [request('GET', '/notes/')] * 4 +
+            [request('GET', '/notes/%s/' % note_id)] * 4 +
+            [request('PUT', '/notes/%s/' % note_id, json={'complete': False})] +
+            [request('GET', '/notes/missing/')]
+        )
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--mode', choices=['thread', 'process'], default='thread')
+    parser.add_argument('--save', help='Write the results to a JSON file.')
+    parser.add_argument('--baseline', help='Compare against results from a JSON file.')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = {}
+    for app in APPS:
+        module = importlib.import_module(app.split(':')[0])
+        for name, script in sorted(get_scenarios(module).items()):
+            key = '%s %s' % (module.__name__.split('_')[-1], name)
+            # Processes import the app themselves, threads share one instance.
+            target = app if args.mode == 'process' else module.app
+            result = run(target, script, args.requests, args.concurrency, args.mode)
+            results[key] = result.as_dict()
+            statuses = ', '.join('%d x%d' % item for item in sorted(result.statuses.items()))
+            print('%-16s %s [%s]' % (key, result, statuses))
+
+    if args.save:
+        with open(args.save, 'w') as output:
+            json.dump(results, output, indent=4, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = []
+        for key, result in sorted(results.items()):
+            if key not in baseline:
+                continue
+            expected = baseline[key]['throughput']
+            if result['throughput'] < expected * (1 - args.tolerance):
+                regressions.append('%s: %.0f req/s, baseline %.0f req/s' % (
+                    key, result['throughput'], expected
+                ))
+        if regressions:
+            print('\nThroughput regressions:\n' + '\n'.join(regressions))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark comparing the `@validate()` wrapper against the previous
+implementation, which converted positional arguments to keyword arguments
+and checked every argument on each call.
+
+    python benchmarks/bench_validate_decorator.py
+"""
+from api_star import validators
+from api_star.decorators import validate
+from api_star.exceptions import ValidationError
+from functools import wraps
+import timeit
+
+
+def previous_validate(**validated):
+    def decorator(func):
+        arg_names = list(func.__code__.co_varnames[:func.__code__.co_argcount])
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            for idx, value in enumerate(args):
+                key = arg_names[idx]
+                kwargs[key] = value
+
+            errors = {}
+            for key, value in kwargs.items():
+                if key in validated:
+                    validator = validated[key]
+                    try:
+                        kwargs[key] = validator(value)
+                    except ValidationError as exc:
+                        errors[key] = exc.description
+
+            if errors:
+                raise ValidationError(errors)
+
+            return func(**kwargs)
+        return wrapper
+    return decorator
+
+
+def view(note_id, description=None, complete=None, verbose=False, page=1):
+    return note_id
+
+
+def main(number=200000):
+    spec = {
+        'description': validators.text(max_length=100),
+        'complete': validators.boolean()
+    }
+    previous = previous_validate(**spec)(view)
+    current = validate(**spec)(view)
+    kwargs = {'note_id': 'abc', 'description': 'Do something', 'complete': True, 'verbose': True, 'page': 2}
+
+    for name, func in (('previous', previous), ('current', current)):
+        keyword = timeit.timeit(lambda: func(**kwargs), number=number)
+        positional = timeit.timeit(lambda: func('abc', 'Do something', True), number=number)
+        print('%-8s keyword %6.3f us   positional %6.3f us' % (
+            name, keyword / number * 1e6, positional / number * 1e6
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark comparing the `object_of(...)` / `list_of(...)` validation
+plans against the previous closure based implementations.
+
+    python benchmarks/bench_validators.py
+"""
+from api_star import validators
+from api_star.exceptions import ValidationError
+import timeit
+
+
+# The previous closure based implementations, kept here for comparison.
+
+def closure_list_of(child_validator):
+    def validator(value):
+        if not isinstance(value, list):
+            raise ValidationError(validators.errors['type'].format(type_name='list'))
+
+        validated = []
+        for idx, item in enumerate(value):
+            try:
+                validated.append(child_validator(item))
+            except ValidationError as exc:
+                index_msg = validators.errors['index'].format(index=idx)
+                raise ValidationError(index_msg + ' ' + exc.description)
+        return validated
+
+    return validator
+
+
+def closure_object_of(spec):
+    def validator(value):
+        if not isinstance(value, dict):
+            raise ValidationError(validators.errors['type'].format(type_name='object'))
+
+        validated = {}
+        invalid = {}
+        for key, child_validator in spec.items():
+            try:
+                item = value[key]
+            except KeyError:
+                try:
+                    item = child_validator.default_value
+                except AttributeError:
+                    invalid[key] = validators.errors['required']
+                else:
+                    if item is not validators.ignore:
+                        validated[key] = item
+            else:
+                try:
+                    validated[key] = child_validator(item)
+                except ValidationError as exc:
+                    invalid[key] = exc.description
+
+        if invalid:
+            raise ValidationError(invalid)
+        return validated
+
+    return validator
+
+
+def build(list_of, object_of):
+    return list_of(object_of({
+        'id': validators.integer(),
+        'complete': validators.optional(validators.boolean(), default=False),
+        'note': validators.optional(validators.text(allow_blank=True)),
+        'tags': validators.optional(list_of(validators.text()), default=[]),
+        'owner': object_of({
+            'id': validators.integer(),
+            'email': validators.optional(validators.email()),
+        }),
+    }))
+
+
+def payload(size=10000):
+    return [
+        {
+            'id': idx,
+            'complete': idx % 2 == 0,
+            'tags': ['a', 'b', 'c'],
+            'owner': {'id': idx % 50}
+        }
+        for idx in range(size)
+    ]
+
+
+def main(number=10):
+    body = payload()
+    candidates = [
+        ('closure', build(closure_list_of, closure_object_of)),
+        ('compiled', build(validators.list_of, validators.object_of)),
+    ]
+
+    assert candidates[0][1](body) == candidates[1][1](body)
+
+    print('Validating %d nested items, best of %d runs.' % (len(body), number))
+    results = {}
+    for name, validator in candidates:
+        timer = timeit.Timer(lambda: validator(body))
+        results[name] = min(timer.repeat(repeat=number, number=1))
+        print('%-10s %8.2f ms' % (name, results[name] * 1000))
+    print('speedup    %8.2fx' % (results['closure'] / results['compiled']))
+
+
+if __name__ == '__main__':
+    main()
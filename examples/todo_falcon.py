@@ -3,7 +3,7 @@ from api_star import validators
 from api_star.decorators import validate
 from api_star.exceptions import NotFound
 from api_star.frameworks.falcon import App
-from api_star.renderers import CoreJSONRenderer, DocsRenderer
+from api_star.renderers import corejson_renderer, docs_renderer
 import uuid
 
 
@@ -28,7 +28,7 @@ notes = [
 ]
 
 
-@app.get('/', renderers=[CoreJSONRenderer(), DocsRenderer()], exclude_from_schema=True)
+@app.get('/', renderers=[corejson_renderer(), docs_renderer()], exclude_from_schema=True)
 def schema():
     """
     Return the API schema.
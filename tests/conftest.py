@@ -0,0 +1,7 @@
+import sys
+
+
+collect_ignore = []
+if sys.version_info < (3, 5):
+    # The ASGI app uses `async def`, which is not valid syntax here.
+    collect_ignore.append('integration/test_asgi.py')
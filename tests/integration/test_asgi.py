@@ -0,0 +1,497 @@
+from api_star import validators
+from api_star.decorators import validate
+from api_star.exceptions import RequestEntityTooLarge, ServiceUnavailable
+from api_star.parsers import json_parser
+from api_star.renderers import corejson_renderer, docs_renderer
+from api_star.authentication import basic_auth
+from api_star.cache import ResponseCache, cached
+from api_star.core import Compression
+from api_star.frameworks.asgi import App, Executor
+from api_star.frameworks.asgi.request import APIRequest
+from api_star.instrumentation import HistogramAggregator
+from api_star.permissions import is_authenticated
+import asyncio
+import base64
+import gzip
+import json
+import pytest
+import threading
+import time
+
+
+app = App(__name__, title='Day of Week API')
+
+
+@app.get('/day-of-week/')
+@validate(date=validators.iso_date())
+def day_of_week(date):
+    """
+    Returns the day of the week, for the given date.
+    """
+    return {'day': date.strftime('%A')}
+
+
+@app.post('/echo/')
+async def echo(message):
+    return {'message': message}
+
+
+@app.post('/echo/limited/', parsers=[json_parser(max_body_size=10)])
+async def echo_limited(message):
+    return {'message': message}
+
+
+@app.get('/items/{item_id}/')
+async def read_item(item_id):
+    await asyncio.sleep(0)
+    return {'read': item_id}
+
+
+@app.get('/numbers/')
+def numbers(count):
+    return ({'number': idx} for idx in range(int(count)))
+
+
+@app.get('/thread/sync/')
+def sync_thread():
+    return {'main': threading.current_thread() is threading.main_thread()}
+
+
+@app.get('/thread/async/')
+async def async_thread():
+    return {'main': threading.current_thread() is threading.main_thread()}
+
+
+generator_threads = []
+
+
+def numbers_in_thread(count):
+    for idx in range(int(count)):
+        generator_threads.append(threading.current_thread())
+        yield {'number': idx}
+
+
+@app.get('/thread/stream/')
+def stream_thread(count):
+    return numbers_in_thread(count)
+
+
+@app.get('/thread/stream/coalesced/', coalesce=True)
+def coalesced_stream_thread(count):
+    return numbers_in_thread(count)
+
+
+@app.get('/thread/opt-out/', threaded=False)
+def opt_out_thread():
+    return {'main': threading.current_thread() is threading.main_thread()}
+
+
+lookup_threads = []
+
+
+def lookup_username(username, password):
+    lookup_threads.append(threading.current_thread())
+    if (username, password) == ('tom', 'secret'):
+        return {'username': username}
+
+
+@app.get('/auth/', authenticators=[basic_auth(lookup_username)], permissions=[is_authenticated()])
+def auth():
+    return {}
+
+
+@app.get('/auth/optional/', authenticators=[basic_auth(lookup_username)])
+async def optional_auth():
+    return {}
+
+
+@app.get('/', renderers=[corejson_renderer(), docs_renderer()], exclude_from_schema=True)
+def root():
+    return app.schema
+
+
+def call(app, method, path, query_string=b'', headers=None, body=b''):
+    """
+    Make a request to the ASGI application, returning a three-tuple of
+    (status, headers, body).
+    """
+    scope = {
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'query_string': query_string,
+        'headers': [
+            (key.lower().encode('latin-1'), value.encode('latin-1'))
+            for key, value in (headers or {}).items()
+        ]
+    }
+    received = [{'type': 'http.request', 'body': body[:3], 'more_body': True},
+                {'type': 'http.request', 'body': body[3:]}]
+    sent = []
+
+    async def receive():
+        return received.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(app(scope, receive, send))
+    finally:
+        loop.close()
+
+    start = sent[0]
+    assert start['type'] == 'http.response.start'
+    response_headers = {
+        key.decode('latin-1'): value.decode('latin-1')
+        for key, value in start['headers']
+    }
+    content = b''.join(message.get('body', b'') for message in sent[1:])
+    return (start['status'], response_headers, content)
+
+
+def test_response():
+    status, headers, content = call(app, 'GET', '/day-of-week/', b'date=2001-01-01')
+    assert status == 200
+    assert headers['content-type'] == 'application/json'
+    assert json.loads(content.decode('utf-8')) == {'day': 'Monday'}
+
+
+def test_invalid_query():
+    status, headers, content = call(app, 'GET', '/day-of-week/', b'date=abc')
+    assert status == 400
+
+
+def test_form_parameters():
+    body = json.dumps({'message': 'hello'}).encode('utf-8')
+    status, headers, content = call(app, 'POST', '/echo/', headers={
+        'Content-Type': 'application/json',
+        'Content-Length': str(len(body))
+    }, body=body)
+    assert status == 200
+    assert json.loads(content.decode('utf-8')) == {'message': 'hello'}
+
+
+def test_path_parameters():
+    status, headers, content = call(app, 'GET', '/items/123/')
+    assert status == 200
+    assert json.loads(content.decode('utf-8')) == {'read': '123'}
+
+
+def test_not_found():
+    status, headers, content = call(app, 'GET', '/missing/')
+    assert status == 404
+    assert json.loads(content.decode('utf-8')) == {'message': 'No resource could be found at this URL.'}
+
+
+def test_method_not_allowed():
+    status, headers, content = call(app, 'DELETE', '/echo/')
+    assert status == 405
+
+
+def test_streaming_response():
+    status, headers, content = call(app, 'GET', '/numbers/', b'count=3')
+    assert status == 200
+    assert headers['content-type'] == 'application/json'
+    assert json.loads(content.decode('utf-8')) == [{'number': 0}, {'number': 1}, {'number': 2}]
+
+
+def test_schema_response():
+    status, headers, content = call(app, 'GET', '/')
+    assert status == 200
+    assert headers['content-type'] == 'application/vnd.coreapi+json'
+    assert b'day_of_week' in content
+    assert headers['vary'] == 'Accept'
+    etag = headers['etag']
+
+    status, headers, content = call(app, 'GET', '/', headers={'If-None-Match': etag})
+    assert status == 304
+    assert content == b''
+    assert headers['vary'] == 'Accept'
+    assert 'content-type' not in headers
+
+
+def test_lifespan():
+    received = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+    sent = []
+
+    async def receive():
+        return received.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(app({'type': 'lifespan'}, receive, send))
+    finally:
+        loop.close()
+    assert sent == [{'type': 'lifespan.startup.complete'}, {'type': 'lifespan.shutdown.complete'}]
+
+
+def test_sync_views_run_in_thread_pool():
+    completed = app.executor.info()['completed']
+    status, headers, content = call(app, 'GET', '/thread/sync/')
+    assert json.loads(content.decode('utf-8')) == {'main': False}
+    assert app.executor.info()['completed'] == completed + 1
+
+
+def test_async_views_run_in_event_loop():
+    status, headers, content = call(app, 'GET', '/thread/async/')
+    assert json.loads(content.decode('utf-8')) == {'main': True}
+
+
+def test_generators_run_in_thread_pool():
+    for url in ('/thread/stream/', '/thread/stream/coalesced/'):
+        del generator_threads[:]
+        status, headers, content = call(app, 'GET', url, b'count=3')
+        assert json.loads(content.decode('utf-8')) == [{'number': idx} for idx in range(3)]
+        assert len(generator_threads) == 3
+        assert threading.main_thread() not in generator_threads
+
+
+def test_threaded_opt_out():
+    status, headers, content = call(app, 'GET', '/thread/opt-out/')
+    assert json.loads(content.decode('utf-8')) == {'main': True}
+
+
+def test_max_body_size():
+    headers = {'Content-Type': 'application/json'}
+    status, headers, content = call(app, 'POST', '/echo/limited/', headers=headers, body=b'{"message": "hello"}')
+    assert status == 413
+
+
+def test_load_body_stops_at_max_body_size():
+    received = []
+
+    async def receive():
+        received.append(None)
+        return {'type': 'http.request', 'body': b'[1, 2, 3, 4]', 'more_body': True}
+
+    scope = {'type': 'http', 'method': 'POST', 'path': '/', 'headers': [(b'content-type', b'application/json')]}
+    request = APIRequest(scope)
+    request.parsers = [json_parser(max_body_size=30)]
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(request.load_body(receive))
+    except RequestEntityTooLarge:
+        pass
+    else:
+        assert False, 'Expected the body to be rejected.'
+    finally:
+        loop.close()
+    assert len(received) == 3
+
+
+def test_authenticators_run_in_thread_pool():
+    credentials = base64.b64encode(b'tom:secret').decode('ascii')
+    del lookup_threads[:]
+    status, headers, content = call(app, 'GET', '/auth/', headers={'Authorization': 'Basic ' + credentials})
+    assert status == 200
+    status, headers, content = call(app, 'GET', '/auth/')
+    assert status == 403
+    status, headers, content = call(app, 'GET', '/auth/optional/', headers={'Authorization': 'Basic ' + credentials})
+    assert status == 200
+    assert len(lookup_threads) == 2
+    assert threading.main_thread() not in lookup_threads
+
+
+def test_executor_queue_limit():
+    executor = Executor(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def run():
+        first = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0.01)
+        second = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0)
+        assert executor.info()['queued'] == 1
+        try:
+            await executor.run(release.wait)
+        finally:
+            release.set()
+            await first
+            await second
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(run())
+    except ServiceUnavailable:
+        pass
+    else:
+        assert False, 'Expected the call to be rejected.'
+    finally:
+        loop.close()
+        executor.shutdown()
+
+    info = executor.info()
+    assert info['rejected'] == 1
+    assert info['completed'] == 2
+    assert info['max_queued'] == 1
+    assert info['queued'] == 0
+
+
+def test_executor_without_queue():
+    executor = Executor(max_workers=4, max_queue=0)
+    release = threading.Event()
+
+    async def run():
+        calls = [asyncio.ensure_future(executor.run(release.wait)) for idx in range(4)]
+        await asyncio.sleep(0.01)
+        assert executor.info()['active'] == 4
+        assert executor.info()['queued'] == 0
+        try:
+            await executor.run(release.wait)
+        finally:
+            release.set()
+            await asyncio.gather(*calls)
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(run())
+    except ServiceUnavailable:
+        pass
+    else:
+        assert False, 'Expected the call to be rejected.'
+    finally:
+        loop.close()
+        executor.shutdown()
+
+    info = executor.info()
+    assert info['rejected'] == 1
+    assert info['completed'] == 4
+    assert info['max_queued'] == 0
+
+
+def test_instrumentation():
+    aggregator = HistogramAggregator()
+    app = App(instrumentation=[aggregator])
+
+    @app.get('/day-of-week/')
+    @validate(date=validators.iso_date())
+    def day_of_week(date):
+        return {'day': date.strftime('%A')}
+
+    status, headers, content = call(app, 'GET', '/day-of-week/', b'date=2001-01-01')
+    assert status == 200
+    summary = aggregator.summary()
+    assert set(summary['day_of_week']) == set(['negotiate', 'authenticate', 'parse', 'validate', 'view', 'render'])
+    assert summary['day_of_week']['view']['count'] == 1
+
+
+def test_compression():
+    app = App(compression=Compression(threshold=100))
+
+    @app.get('/numbers/')
+    def numbers(count):
+        return [{'number': idx} for idx in range(int(count))]
+
+    status, headers, content = call(app, 'GET', '/numbers/', b'count=100', headers={'Accept-Encoding': 'gzip'})
+    assert headers['content-encoding'] == 'gzip'
+    assert headers['vary'] == 'Accept-Encoding'
+    assert json.loads(gzip.decompress(content).decode('utf-8')) == [{'number': idx} for idx in range(100)]
+
+
+def test_conditional_requests():
+    app = App(compression=Compression(threshold=1000))
+    calls = []
+
+    @app.get('/hashed/', etag=True)
+    def hashed():
+        return {'hello': 'world'}
+
+    @app.get('/versioned/', etag=lambda: 1)
+    async def versioned():
+        calls.append('versioned')
+        return {'hello': 'world'}
+
+    for url in ('/hashed/', '/versioned/'):
+        status, headers, content = call(app, 'GET', url)
+        assert status == 200
+        assert headers['vary'] == 'Accept, Accept-Encoding'
+        etag = headers['etag']
+
+        status, headers, content = call(app, 'GET', url, headers={'If-None-Match': etag})
+        assert status == 304
+        assert content == b''
+        assert headers['etag'] == etag
+        assert headers['vary'] == 'Accept, Accept-Encoding'
+    assert calls == ['versioned']
+
+    with pytest.raises(RuntimeError):
+        app.post('/versioned/', etag=True)
+
+
+def test_cached_views():
+    app = App(compression=Compression(threshold=0))
+    cache = ResponseCache(ttl=60)
+    calls = []
+
+    @app.get('/items/{item_id}/')
+    @cached(cache=cache)
+    async def read_item(item_id):
+        calls.append(item_id)
+        return {'read': item_id}
+
+    for idx in range(2):
+        status, headers, content = call(app, 'GET', '/items/1/')
+        assert json.loads(content.decode('utf-8')) == {'read': '1'}
+        status, headers, content = call(app, 'GET', '/items/1/', headers={'Accept-Encoding': 'gzip'})
+        assert headers['content-encoding'] == 'gzip'
+        assert headers['vary'] == 'Accept, Accept-Encoding'
+        assert json.loads(gzip.decompress(content).decode('utf-8')) == {'read': '1'}
+    assert calls == ['1', '1']
+    assert cache.info()['hits'] == 2
+
+
+def test_coalesced_requests():
+    app = App()
+    calls = []
+
+    @app.get('/reports/{report_id}/', coalesce=True)
+    async def read_report(report_id):
+        calls.append(report_id)
+        await asyncio.sleep(0.01)
+        return {'id': report_id}
+
+    @app.get('/reports/{report_id}/summary/', coalesce=True)
+    def read_summary(report_id):
+        calls.append('summary')
+        time.sleep(0.01)
+        return {'id': report_id}
+
+    async def request(path):
+        scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': b'', 'headers': []}
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            sent.append(message)
+
+        await app(scope, receive, send)
+        return (sent[0]['status'], json.loads(sent[1]['body'].decode('utf-8')))
+
+    async def run():
+        return await asyncio.gather(*[
+            request(path)
+            for path in ['/reports/1/', '/reports/1/summary/'] * 3 + ['/reports/2/']
+        ])
+
+    loop = asyncio.new_event_loop()
+    try:
+        responses = loop.run_until_complete(run())
+    finally:
+        loop.close()
+
+    assert [status for status, data in responses] == [200] * 7
+    assert responses[-1][1] == {'id': '2'}
+    assert sorted(calls) == ['1', '2', 'summary']
+    info = app.coalescer.info()
+    assert info['endpoints'] == {
+        'read_report': {'calls': 2, 'coalesced': 2},
+        'read_summary': {'calls': 1, 'coalesced': 2}
+    }
+    assert info['in_flight'] == 0
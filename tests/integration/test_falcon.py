@@ -1,7 +1,19 @@
 from api_star import validators
+from api_star.cache import ResponseCache, cached
+from api_star.core import Compression
 from api_star.decorators import validate
+from api_star.metrics import Metrics
+from api_star.permissions import is_authenticated
+from api_star.renderers import corejson_renderer, docs_renderer, prometheus_renderer
 from api_star.frameworks.falcon import App
-from api_star.test import TestSession
+from api_star.test import TestClient, TestSession
+import gzip
+import io
+import json
+import pytest
+import threading
+import time
+import zlib
 
 
 app = App(__name__, title='Day of Week API')
@@ -19,3 +31,315 @@ def day_of_week(date):
 def test_success():
     session = TestSession(app)
     session.get('/day-of-week/', params={'date': '2001-01-01'})
+
+
+@app.post('/echo/')
+def echo(message):
+    return {'message': message}
+
+
+def test_response():
+    session = TestSession(app)
+    response = session.get('/day-of-week/', params={'date': '2001-01-01'})
+    assert response.status_code == 200
+    assert response.json() == {'day': 'Monday'}
+
+
+def test_invalid_query():
+    session = TestSession(app)
+    response = session.get('/day-of-week/', params={'date': 'abc'})
+    assert response.status_code == 400
+
+
+def test_form_parameters():
+    session = TestSession(app)
+    response = session.post('/echo/', json={'message': 'hello'})
+    assert response.status_code == 200
+    assert response.json() == {'message': 'hello'}
+
+
+def test_routes_added_after_first_request():
+    app = App(title='Late routes')
+
+    @app.get('/items/{item_id}/')
+    def read_item(item_id):
+        return {'read': item_id}
+
+    session = TestSession(app)
+    assert session.get('/items/1/').json() == {'read': '1'}
+
+    @app.delete('/items/{item_id}/')
+    def delete_item(item_id):
+        return {'deleted': item_id}
+
+    @app.get('/other/')
+    def other():
+        return {'other': True}
+
+    assert session.get('/items/1/').json() == {'read': '1'}
+    assert session.delete('/items/1/').json() == {'deleted': '1'}
+    assert session.get('/other/').json() == {'other': True}
+
+
+@app.get('/numbers/')
+def numbers(count):
+    return ({'number': idx} for idx in range(int(count)))
+
+
+def test_streaming_response():
+    session = TestSession(app)
+    response = session.get('/numbers/', params={'count': 3})
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == 'application/json'
+    assert response.json() == [{'number': 0}, {'number': 1}, {'number': 2}]
+
+
+@app.get('/', renderers=[corejson_renderer(), docs_renderer()], exclude_from_schema=True)
+def root():
+    return app.schema
+
+
+def test_schema_response():
+    session = TestSession(app)
+    response = session.get('/')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == 'application/vnd.coreapi+json'
+    assert b'day_of_week' in response.content
+    assert response.headers['Vary'] == 'Accept'
+    etag = response.headers['ETag']
+
+    response = session.get('/', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.content == b''
+    assert response.headers['ETag'] == etag
+    assert response.headers['Vary'] == 'Accept'
+    assert 'Content-Type' not in response.headers
+
+    response = session.get('/', headers={'Accept': 'text/html', 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == 'text/html; charset=utf-8'
+    assert response.headers['ETag'] != etag
+
+    assert app.schema is app.schema
+    assert len(app._schema_cache) == 2
+
+
+def test_instrumentation():
+    timings = []
+    app = App(instrumentation=[lambda route, phases: timings.append((route, phases))])
+
+    @app.get('/day-of-week/')
+    @validate(date=validators.iso_date())
+    def day_of_week(date):
+        return {'day': date.strftime('%A')}
+
+    session = TestSession(app)
+    response = session.get('/day-of-week/', params={'date': '2001-01-01'})
+    assert response.json() == {'day': 'Monday'}
+    route, phases = timings.pop()
+    assert route == 'day_of_week'
+    assert set(phases) == set(['negotiate', 'authenticate', 'parse', 'validate', 'view', 'render'])
+
+    response = session.get('/day-of-week/', params={'date': 'abc'})
+    assert response.status_code == 400
+    route, phases = timings.pop()
+    assert set(phases) == set(['negotiate', 'authenticate', 'parse'])
+
+
+def test_metrics():
+    app = App(metrics=Metrics())
+
+    @app.get('/day-of-week/')
+    @validate(date=validators.iso_date())
+    def day_of_week(date):
+        return {'day': date.strftime('%A')}
+
+    @app.get('/metrics/', renderers=[prometheus_renderer()], exclude_from_schema=True)
+    def metrics():
+        return app.metrics
+
+    session = TestSession(app)
+    session.get('/day-of-week/', params={'date': '2001-01-01'})
+    session.get('/day-of-week/', params={'date': 'abc'})
+    response = session.get('/metrics/')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == 'text/plain; charset=utf-8'
+    lines = response.text.splitlines()
+    assert 'api_star_requests_total{endpoint="day_of_week",method="GET"} 2' in lines
+    assert 'api_star_responses_total{endpoint="day_of_week",status="200"} 1' in lines
+    assert 'api_star_responses_total{endpoint="day_of_week",status="400"} 1' in lines
+    assert 'api_star_request_duration_seconds_count{endpoint="day_of_week"} 2' in lines
+    assert 'api_star_response_size_bytes_count{endpoint="day_of_week"} 2' in lines
+
+
+def test_client():
+    client = TestClient(app)
+    response = client.get('/day-of-week/', params={'date': '2001-01-01'})
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/json'
+    assert response.json() == {'day': 'Monday'}
+
+    response = client.get('/day-of-week/?date=abc')
+    assert response.status_code == 400
+
+    response = client.post('/echo/', json={'message': 'hello'})
+    assert response.json() == {'message': 'hello'}
+
+    response = client.post('/echo/', data={'message': 'hello'})
+    assert response.json() == {'message': 'hello'}
+
+
+def test_compression():
+    app = App(compression=Compression(threshold=100))
+
+    @app.get('/numbers/')
+    def numbers(count, stream=False):
+        items = ({'number': idx} for idx in range(int(count)))
+        return items if stream else list(items)
+
+    @app.get('/', renderers=[corejson_renderer()], exclude_from_schema=True)
+    def root():
+        return app.schema
+
+    client = TestClient(app)
+    expected = [{'number': idx} for idx in range(100)]
+
+    response = client.get('/numbers/', params={'count': 100}, headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert json.loads(gzip.GzipFile(fileobj=io.BytesIO(response.content)).read().decode('utf-8')) == expected
+
+    response = client.get('/numbers/', params={'count': 100, 'stream': 1}, headers={'Accept-Encoding': 'deflate'})
+    assert response.headers['Content-Encoding'] == 'deflate'
+    assert json.loads(zlib.decompress(response.content).decode('utf-8')) == expected
+
+    response = client.get('/numbers/', params={'count': 1}, headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert response.json() == [{'number': 0}]
+
+    response = client.get('/numbers/', params={'count': 100})
+    assert 'Content-Encoding' not in response.headers
+    assert response.json() == expected
+
+    response = client.get('/', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Vary'] == 'Accept, Accept-Encoding'
+    etag = response.headers['ETag']
+    plain = client.get('/')
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.headers['ETag'] != etag
+    assert gzip.GzipFile(fileobj=io.BytesIO(response.content)).read() == plain.content
+
+    response = client.get('/', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert response.status_code == 304
+    assert len(app._schema_cache) == 2
+
+
+def test_conditional_requests():
+    app = App(compression=Compression(threshold=1000))
+    calls = []
+    state = {'version': 1}
+
+    @app.get('/hashed/', etag=True)
+    def hashed():
+        calls.append('hashed')
+        return {'version': state['version']}
+
+    @app.get('/versioned/', etag=lambda: state['version'])
+    def versioned():
+        calls.append('versioned')
+        return {'version': state['version']}
+
+    client = TestClient(app)
+    for url in ('/hashed/', '/versioned/'):
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.headers['Vary'] == 'Accept, Accept-Encoding'
+        etag = response.headers['ETag']
+
+        response = client.get(url, headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.content == b''
+        assert response.headers['ETag'] == etag
+        assert response.headers['Vary'] == 'Accept, Accept-Encoding'
+
+    # The versioned view is not called for a matching conditional request.
+    assert calls == ['hashed', 'hashed', 'versioned']
+
+    state['version'] = 2
+    for url in ('/hashed/', '/versioned/'):
+        response = client.get(url, headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.json() == {'version': 2}
+        assert response.headers['ETag'] != etag
+
+    with pytest.raises(RuntimeError):
+        app.post('/versioned/', etag=True)
+
+
+def test_cached_views():
+    app = App()
+    cache = ResponseCache()
+    calls = []
+
+    def user_header(request):
+        return request.headers.get('X-USER')
+
+    @app.get('/notes/{note_id}/', authenticators=[user_header], permissions=[is_authenticated()])
+    @cached(tags=['note:{note_id}'], vary_on_auth=True, cache=cache)
+    def read_note(note_id):
+        calls.append(note_id)
+        return {'id': note_id}
+
+    client = TestClient(app)
+    for username in ('tom', 'tom', 'jerry'):
+        response = client.get('/notes/1/', headers={'X-User': username})
+        assert response.json() == {'id': '1'}
+        assert response.headers['Vary'] == 'Accept'
+    assert calls == ['1', '1']
+
+    # Permissions are checked before the cache is used.
+    assert client.get('/notes/1/').status_code == 403
+
+    cache.invalidate('note:1')
+    client.get('/notes/1/', headers={'X-User': 'tom'})
+    assert calls == ['1', '1', '1']
+
+
+def test_coalesced_requests():
+    app = App()
+    cache = ResponseCache()
+    release = threading.Event()
+    calls = []
+
+    @app.get('/reports/{report_id}/', coalesce=True)
+    @cached(cache=cache)
+    def read_report(report_id):
+        calls.append(report_id)
+        release.wait()
+        return {'id': report_id}
+
+    client = TestClient(app)
+    responses = []
+
+    def target():
+        responses.append(client.get('/reports/1/'))
+
+    threads = [threading.Thread(target=target) for idx in range(4)]
+    for thread in threads:
+        thread.start()
+    while app.coalescer.info()['coalesced'] < 3:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ['1']
+    assert [response.json() for response in responses] == [{'id': '1'}] * 4
+
+    # The shared response is also cached.
+    assert client.get('/reports/1/').json() == {'id': '1'}
+    assert calls == ['1']
+    assert app.coalescer.info()['calls'] == 1
+    assert cache.info()['hits'] == 1
@@ -1,4 +1,4 @@
-from api_star.authentication import basic_auth, token_auth
+from api_star.authentication import basic_auth, token_auth, CredentialCache
 from api_star.exceptions import Unauthorized
 import base64
 import pytest
@@ -53,3 +53,59 @@ def test_token_auth():
         auth(MockRequest(b'Token invalid'))
 
     assert auth(MockRequest(b'Token token')) == 'admin'
+
+
+def test_basic_auth_cache():
+    lookups = []
+
+    def lookup_username(username, password):
+        lookups.append(username)
+        if username == 'admin' and password == 'password':
+            return 'admin'
+
+    cache = CredentialCache()
+    auth = basic_auth(lookup_username, cache=cache)
+    valid = MockRequest(b'Basic ' + base64.b64encode(b'admin:password'))
+
+    assert auth(valid) == 'admin'
+    assert auth(valid) == 'admin'
+    assert lookups == ['admin']
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    auth.invalidate('admin', 'password')
+    assert auth(valid) == 'admin'
+    assert lookups == ['admin', 'admin']
+
+    cache.invalidate_auth('admin')
+    assert auth(valid) == 'admin'
+    assert lookups == ['admin', 'admin', 'admin']
+
+
+def test_token_auth_cache():
+    lookups = []
+
+    def lookup_token(token):
+        lookups.append(token)
+        if token == 'token':
+            return 'admin'
+
+    cache = CredentialCache(negative_ttl=60)
+    auth = token_auth(lookup_token, cache=cache)
+
+    assert auth(MockRequest(b'Token token')) == 'admin'
+    assert auth(MockRequest(b'Token token')) == 'admin'
+    for attempt in range(3):
+        with pytest.raises(Unauthorized):
+            auth(MockRequest(b'Token invalid'))
+    assert lookups == ['token', 'invalid']
+
+    # Plaintext credentials are not stored.
+    assert 'token' not in cache._cache._data
+    assert cache.get_key('token', 'token') in cache._cache._data
+
+    cache.negative_ttl = -1
+    cache.clear()
+    for attempt in range(2):
+        with pytest.raises(Unauthorized):
+            auth(MockRequest(b'Token invalid'))
+    assert lookups == ['token', 'invalid', 'invalid', 'invalid']
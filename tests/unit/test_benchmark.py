@@ -0,0 +1,53 @@
+from api_star.benchmark import percentile, request, run
+from api_star.frameworks.falcon import App
+import pytest
+
+
+app = App(title='Benchmark')
+
+
+@app.get('/items/{item_id}/')
+def read_item(item_id):
+    return {'item_id': item_id}
+
+
+@app.post('/items/')
+def create_item(name):
+    return {'name': name}
+
+
+def test_request():
+    scripted = request('POST', '/items/', params={'a': 1}, json={'name': 'abc'})
+    assert scripted.query_string == 'a=1'
+    assert scripted.headers == {'Content-Type': 'application/json'}
+    assert scripted.body == b'{"name": "abc"}'
+
+
+def test_run():
+    script = [
+        request('GET', '/items/1/'),
+        request('POST', '/items/', json={'name': 'abc'}),
+        request('GET', '/missing/')
+    ]
+    result = run(app, script, requests=30, concurrency=2, warmup=3)
+    assert result.requests == 30
+    assert result.statuses == {200: 20, 404: 10}
+    assert result.errors == 0
+    assert result.percentile(50) <= result.percentile(99)
+    assert result.throughput > 0
+    assert result.as_dict()['statuses'] == {'200': 20, '404': 10}
+
+
+def test_invalid_run():
+    with pytest.raises(ValueError):
+        run(app, [request('GET', '/items/1/')], mode='process')
+    with pytest.raises(ValueError):
+        run(app, [])
+
+
+def test_percentile():
+    ordered = list(range(1, 101))
+    assert percentile(ordered, 50) == 50
+    assert percentile(ordered, 99) == 99
+    assert percentile(ordered, 100) == 100
+    assert percentile([], 50) is None
@@ -0,0 +1,109 @@
+from api_star.cache import CachePolicy, ResponseCache, cached, get_cache_policy
+import pytest
+
+
+class Request(object):
+    renderer = 'json'
+    renderers = ['json']
+    auth = None
+
+
+def test_response_cache():
+    cache = ResponseCache(max_size=2)
+    cache.set('a', 'A', tags=['letters', 'first'])
+    cache.set('b', 'B', tags=['letters'])
+    assert cache.get('a') == 'A'
+    assert cache.get(None) is None
+
+    cache.invalidate('first')
+    assert cache.get('a') is None
+    assert cache.get('b') == 'B'
+
+    cache.set('c', 'C', tags=['letters'])
+    cache.invalidate('letters', 'missing')
+    assert cache.get('b') is None
+    assert cache.get('c') is None
+    assert cache.info() == {'hits': 2, 'misses': 3, 'size': 0, 'max_size': 2, 'tags': 0}
+
+
+def test_response_cache_ttl():
+    cache = ResponseCache(ttl=60)
+    cache.set('a', 'A')
+    cache.set('b', 'B', ttl=-1)
+    assert cache.get('a') == 'A'
+    assert cache.get('b') is None
+
+
+def test_evicted_keys_are_pruned_from_tags():
+    cache = ResponseCache(max_size=2)
+    for idx in range(10):
+        cache.set(idx, idx, tags=['numbers', 'number:%d' % idx])
+    assert cache._tags == {'numbers': set([8, 9]), 'number:8': set([8]), 'number:9': set([9])}
+    cache.set(9, 9, tags=['numbers'])
+    assert 'number:9' not in cache._tags
+    cache.clear()
+    assert cache.info()['tags'] == 0
+
+
+def test_expired_keys_are_pruned_from_tags():
+    cache = ResponseCache()
+    cache.set('a', 'A', ttl=-1, tags=['letters', 'letter:a'])
+    cache.set('b', 'B', tags=['letters'])
+    assert cache.get('a') is None
+    assert cache._tags == {'letters': set(['b'])}
+
+
+def test_cache_key():
+    policy = CachePolicy(ResponseCache())
+    request = Request()
+    key = policy.get_key('list_notes', {'page': '1', 'search': 'a'}, request)
+    assert key == policy.get_key('list_notes', {'search': 'a', 'page': '1'}, request)
+    assert key != policy.get_key('list_notes', {'page': '2', 'search': 'a'}, request)
+    assert key != policy.get_key('other', {'page': '1', 'search': 'a'}, request)
+
+    # Unhashable parameters are not cached.
+    assert policy.get_key('list_notes', {'page': ['1']}, request) is None
+
+
+def test_cache_key_varies_on_auth():
+    request = Request()
+    request.auth = {'username': 'tom'}
+    policy = CachePolicy(ResponseCache(), vary_on_auth=lambda auth: auth['username'])
+    key = policy.get_key('list_notes', {}, request)
+    assert key[-1] == 'tom'
+    request.auth = {'username': 'jerry'}
+    assert policy.get_key('list_notes', {}, request) != key
+
+    policy = CachePolicy(ResponseCache(), vary_on_auth=True)
+    with pytest.warns(RuntimeWarning):
+        assert policy.get_key('list_notes', {}, request) is None
+    request.auth = object()
+    with pytest.warns(RuntimeWarning):
+        assert policy.get_key('list_notes', {}, request) is None
+    request.auth = 'tom'
+    assert policy.get_key('list_notes', {}, request)[-1] == 'tom'
+
+
+def test_get_cache_policy():
+    def read_note(note_id):
+        pass
+
+    assert get_cache_policy(read_note, '/notes/{note_id}/', 'GET') is None
+
+    cached(tags=['notes', 'note:{note_id}'])(read_note)
+    policy = get_cache_policy(read_note, '/notes/{note_id}/', 'GET')
+    assert policy.tags == ('notes', 'note:{note_id}')
+
+    assert not policy.vary_on_auth
+
+    # Routes with authenticators cache a response for each user, by default.
+    policy = get_cache_policy(read_note, '/notes/{note_id}/', 'GET', [lambda request: None])
+    assert policy.vary_on_auth is True
+    assert policy.tags == ('notes', 'note:{note_id}')
+    cached(tags=['notes', 'note:{note_id}'], vary_on_auth=False)(read_note)
+    assert not get_cache_policy(read_note, '/notes/{note_id}/', 'GET', [lambda request: None]).vary_on_auth
+
+    with pytest.raises(RuntimeError):
+        get_cache_policy(read_note, '/notes/{note_id}/', 'PUT')
+    with pytest.raises(RuntimeError):
+        get_cache_policy(read_note, '/notes/', 'GET')
@@ -0,0 +1,116 @@
+from api_star.cache import CachePolicy, ResponseCache
+from api_star.coalesce import Coalescer, get_coalesce_policy
+import pytest
+import threading
+import time
+
+
+def run_concurrently(coalescer, func, count=5):
+    results = []
+    errors = []
+
+    def target():
+        try:
+            results.append(coalescer.run('report', 'key', func))
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=target) for idx in range(count)]
+    for thread in threads:
+        thread.start()
+    # Wait until every other thread is waiting on the first call.
+    while coalescer.info()['coalesced'] < count - 1:
+        time.sleep(0.001)
+    return threads, results, errors
+
+
+def test_coalesced_calls_share_the_result():
+    coalescer = Coalescer()
+    release = threading.Event()
+    calls = []
+
+    def func():
+        calls.append(None)
+        release.wait()
+        return {'total': 10}
+
+    threads, results, errors = run_concurrently(coalescer, func)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{'total': 10}] * 5
+    assert results[0] is results[1]
+    assert coalescer.info() == {
+        'in_flight': 0,
+        'calls': 1,
+        'coalesced': 4,
+        'endpoints': {'report': {'calls': 1, 'coalesced': 4}}
+    }
+
+    # Once the call completes, the next call runs again.
+    assert coalescer.run('report', 'key', lambda: 'again') == 'again'
+    assert coalescer.info()['calls'] == 2
+
+
+def test_coalesced_calls_share_exceptions():
+    coalescer = Coalescer()
+    release = threading.Event()
+
+    def func():
+        release.wait()
+        raise ValueError('Failed')
+
+    threads, results, errors = run_concurrently(coalescer, func, count=3)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == []
+    assert [str(exc) for exc in errors] == ['Failed'] * 3
+    assert coalescer.info()['in_flight'] == 0
+
+
+def test_different_keys_are_not_coalesced():
+    coalescer = Coalescer()
+    assert coalescer.run('report', 1, lambda: 1) == 1
+    assert coalescer.run('report', 2, lambda: 2) == 2
+    assert coalescer.info()['coalesced'] == 0
+    coalescer.clear()
+    assert coalescer.info()['calls'] == 0
+
+
+class Request(object):
+    renderer = 'json'
+    renderers = ['json']
+    auth = None
+
+
+def test_coalesce_policy():
+    assert get_coalesce_policy(False, '/reports/', 'GET') is None
+    with pytest.raises(RuntimeError):
+        get_coalesce_policy(True, '/reports/', 'POST')
+
+    tom = Request()
+    tom.auth = 'tom'
+    jerry = Request()
+    jerry.auth = 'jerry'
+
+    # Without authenticators, requests from anyone are coalesced.
+    policy = get_coalesce_policy(True, '/reports/', 'GET')
+    assert policy.get_key('report', {}, tom) == policy.get_key('report', {}, jerry)
+
+    # With authenticators, requests are only coalesced for the same auth.
+    policy = get_coalesce_policy(True, '/reports/', 'GET', authenticators=[object()])
+    assert policy.get_key('report', {}, tom) != policy.get_key('report', {}, jerry)
+    assert policy.get_key('report', {}, tom) == policy.get_key('report', {}, tom)
+
+    policy = get_coalesce_policy(lambda auth: auth[0], '/reports/', 'GET')
+    assert policy.get_key('report', {}, tom)[-1] == 't'
+
+    # A cache key is only reused if it also varies on the auth.
+    shared = CachePolicy(ResponseCache())
+    assert policy.get_key('report', {}, tom, cache_policy=shared, cache_key='shared') != 'shared'
+    per_user = CachePolicy(ResponseCache(), vary_on_auth=True)
+    assert policy.get_key('report', {}, tom, cache_policy=per_user, cache_key='tom') == 'tom'
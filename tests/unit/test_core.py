@@ -0,0 +1,116 @@
+from api_star.cache import CachePolicy, ResponseCache
+from api_star.core import (
+    Compression, NotModified, Rendered, ResponsePipeline, get_etag, get_etag_version
+)
+from api_star.renderers import json_renderer
+import gzip
+import io
+import pytest
+import zlib
+
+
+class MockRequest(object):
+    renderer = None
+    renderers = [json_renderer()]
+    auth = None
+
+    def __init__(self, accept_encoding=None):
+        self.headers = {}
+        if accept_encoding is not None:
+            self.headers['Accept-Encoding'] = accept_encoding
+
+
+def test_negotiate_encoding():
+    compression = Compression()
+    assert compression.negotiate(MockRequest()) is None
+    assert compression.negotiate(MockRequest('gzip, deflate')) == 'gzip'
+    assert compression.negotiate(MockRequest('deflate')) == 'deflate'
+    assert compression.negotiate(MockRequest('gzip;q=0.5, deflate')) == 'deflate'
+    assert compression.negotiate(MockRequest('gzip;q=0, *')) == 'deflate'
+    assert compression.negotiate(MockRequest('*;q=0')) is None
+    assert compression.negotiate(MockRequest('br, identity')) is None
+
+
+def test_unsupported_encoding():
+    with pytest.raises(ValueError):
+        Compression(encodings=['br'])
+
+
+def test_compress():
+    compression = Compression(threshold=100)
+    content = b'{"hello": "world"}' * 100
+
+    compressed, encoding = compression.compress(content, 'gzip')
+    assert encoding == 'gzip'
+    assert gzip.GzipFile(fileobj=io.BytesIO(compressed)).read() == content
+    # Compression is deterministic, so that ETags are stable.
+    assert compression.compress(content, 'gzip') == (compressed, 'gzip')
+
+    compressed, encoding = compression.compress(content, 'deflate')
+    assert encoding == 'deflate'
+    assert zlib.decompress(compressed) == content
+
+    assert compression.compress(b'small', 'gzip') == (b'small', None)
+    assert compression.compress(content, None) == (content, None)
+
+
+def test_compress_stream():
+    compression = Compression()
+    chunks = [b'[', b'1,' * 1000, b'2]']
+    compressed = list(compression.compress_stream(iter(chunks), 'gzip'))
+    assert len(compressed) > 1
+    assert gzip.GzipFile(fileobj=io.BytesIO(b''.join(compressed))).read() == b''.join(chunks)
+
+
+def test_get_etag_version():
+    def version():
+        return 1
+
+    assert get_etag_version(False, '/notes/', 'GET') is None
+    assert get_etag_version(True, '/notes/', 'GET') is None
+    assert get_etag_version(version, '/notes/', 'HEAD') is version
+    with pytest.raises(RuntimeError):
+        get_etag_version(True, '/notes/', 'POST')
+    with pytest.raises(RuntimeError):
+        get_etag_version(version, '/notes/', 'PUT')
+
+
+def test_response_pipeline():
+    request = MockRequest()
+    pipeline = ResponsePipeline('read_note', cache_policy=CachePolicy(ResponseCache()))
+    pending = pipeline.start(request, {'note_id': '1'})
+    assert pending.lookup() is None
+    entry = pending.finish({'id': '1'})
+    assert isinstance(entry, Rendered)
+    assert pipeline.start(request, {'note_id': '1'}).lookup() == entry
+    assert pipeline.start(request, {'note_id': '2'}).lookup() is None
+
+    # Streaming data is not cached.
+    pending = pipeline.start(request, {'note_id': '3'})
+    pending.lookup()
+    stream = iter([{'id': '3'}])
+    assert pending.finish(stream) is stream
+
+
+def test_response_pipeline_etags():
+    request = MockRequest()
+    pipeline = ResponsePipeline('read_note', etag=True, version=lambda note_id: 1)
+    pending = pipeline.start(request, {'note_id': '1'})
+    assert pending.lookup() is None
+    assert pending.get_etag(b'content') == pending.etag
+
+    request.headers['If-None-Match'] = pending.etag
+    assert pipeline.start(request, {'note_id': '1'}).lookup() == NotModified(pending.etag)
+
+    pipeline = ResponsePipeline('read_note', etag=True)
+    pending = pipeline.start(request, {'note_id': '1'})
+    assert pending.lookup() is None
+    assert pending.get_etag(None) is None
+    etag = pending.get_etag(b'content')
+    assert etag == get_etag(b'content')
+    assert not pending.not_modified(etag)
+    request.headers['If-None-Match'] = etag
+    assert pending.not_modified(etag)
+
+    pending = ResponsePipeline('read_note').start(request, {'note_id': '1'})
+    assert pending.get_etag(b'content') is None
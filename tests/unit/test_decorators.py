@@ -0,0 +1,34 @@
+from api_star import validators
+from api_star.decorators import validate
+from api_star.exceptions import ValidationError
+import pytest
+
+
+@validate(page=validators.integer(), complete=validators.boolean())
+def list_notes(query, page=1, complete=None):
+    return (query, page, complete)
+
+
+def test_keyword_arguments():
+    assert list_notes(query='abc', page='2', complete='true') == ('abc', 2, True)
+    assert list_notes(query='abc') == ('abc', 1, None)
+
+
+def test_positional_arguments():
+    assert list_notes('abc', '2') == ('abc', 2, None)
+    assert list_notes('abc', '2', complete='false') == ('abc', 2, False)
+
+
+def test_errors():
+    with pytest.raises(ValidationError) as exc:
+        list_notes('abc', 'x', complete='x')
+    assert set(exc.value.description.keys()) == set(['page', 'complete'])
+
+    with pytest.raises(ValidationError) as exc:
+        list_notes(query='abc', page='x')
+    assert list(exc.value.description.keys()) == ['page']
+
+
+def test_unknown_argument():
+    with pytest.raises(RuntimeError):
+        validate(missing=validators.integer())(list_notes)
@@ -0,0 +1,95 @@
+from api_star import validators
+from api_star.decorators import validate
+from api_star.exceptions import ValidationError
+from api_star.instrumentation import (
+    HistogramAggregator, Histogram, split_validation, start_timer
+)
+from functools import wraps
+import pytest
+
+
+def test_no_callbacks():
+    assert start_timer('route', None) is None
+    assert start_timer('route', []) is None
+
+
+def test_timer():
+    calls = []
+    timer = start_timer('route', [lambda route, timings: calls.append((route, timings))])
+    timer.lap('negotiate')
+    timer.lap('view')
+    timer.finish()
+    assert len(calls) == 1
+    route, timings = calls[0]
+    assert route == 'route'
+    assert set(timings.keys()) == set(['negotiate', 'view'])
+    assert all(isinstance(value, int) and value >= 0 for value in timings.values())
+
+
+def test_histogram_percentiles():
+    histogram = Histogram(buckets=(10, 100, 1000))
+    assert histogram.percentile(50) is None
+    for value in [5] * 50 + [50] * 45 + [500] * 4 + [5000]:
+        histogram.add(value)
+    assert histogram.count == 100
+    assert histogram.percentile(50) == 10
+    assert histogram.percentile(95) == 100
+    assert histogram.percentile(99) == 1000
+    assert histogram.percentile(100) is None
+
+
+def test_histogram_aggregator():
+    aggregator = HistogramAggregator(buckets=(10, 100))
+    aggregator('read', {'parse': 5, 'view': 50})
+    aggregator('read', {'parse': 15, 'view': 50})
+    summary = aggregator.summary()
+    assert summary == {
+        'read': {
+            'parse': {'count': 2, 'mean': 10, 'p50': 10, 'p95': 100, 'p99': 100},
+            'view': {'count': 2, 'mean': 50, 'p50': 100, 'p95': 100, 'p99': 100}
+        }
+    }
+    aggregator.clear()
+    assert aggregator.summary() == {}
+
+
+def test_split_validation():
+    def undecorated(value):
+        return value
+
+    @validate(value=validators.integer())
+    def decorated(value):
+        return value
+
+    assert split_validation(undecorated) == (None, undecorated)
+
+    validate_params, view = split_validation(decorated)
+    params = {'value': '123'}
+    validate_params(params)
+    assert params == {'value': 123}
+    assert view(**params) == 123
+    with pytest.raises(ValidationError):
+        validate_params({'value': 'abc'})
+
+
+def test_split_validation_with_outer_decorator():
+    calls = []
+
+    def login_required(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            calls.append('login_required')
+            return func(*args, **kwargs)
+        return wrapper
+
+    @login_required
+    @validate(value=validators.integer())
+    def decorated(value):
+        return value
+
+    # The outer decorator must not be skipped.
+    validate_params, view = split_validation(decorated)
+    assert validate_params is None
+    assert view is decorated
+    assert view(value='123') == 123
+    assert calls == ['login_required']
@@ -0,0 +1,48 @@
+from api_star.introspection import get_path_variables, get_view_info, parse_docstring
+from api_star.schema import get_link
+
+
+def update_note(note_id, description=None, complete=None):
+    """
+    Update a note.
+
+    * note_id - A unique ID string for the note.
+    * [description] - A short description of the note.
+    * [complete] - True if the task has been completed, false otherwise.
+    """
+
+
+def test_view_info():
+    info = get_view_info(update_note)
+    assert info.arg_names == ('note_id', 'description', 'complete')
+    assert info.defaults == {'description': None, 'complete': None}
+    assert info.required == (True, False, False)
+    assert info.description == 'Update a note.'
+    assert info.field_descriptions == {
+        'note_id': 'A unique ID string for the note.',
+        'description': 'A short description of the note.',
+        'complete': 'True if the task has been completed, false otherwise.'
+    }
+
+
+def test_view_info_is_cached():
+    assert get_view_info(update_note) is get_view_info(update_note)
+    assert get_path_variables('/notes/{note_id}/') is get_path_variables('/notes/{note_id}/')
+
+
+def test_bullet_without_description():
+    description, fields = parse_docstring('Notes:\n\n* Not a field\n')
+    assert description == 'Notes:\n\n* Not a field'
+    assert fields == {}
+
+
+def test_link_field_descriptions():
+    link = get_link('/notes/{note_id}/', 'PUT', update_note)
+    fields = dict((field.name, field) for field in link.fields)
+    assert link.description == 'Update a note.'
+    assert fields['note_id'].location == 'path'
+    assert fields['note_id'].required
+    assert fields['note_id'].description == 'A unique ID string for the note.'
+    assert fields['complete'].location == 'form'
+    assert not fields['complete'].required
+    assert fields['complete'].description == 'True if the task has been completed, false otherwise.'
@@ -0,0 +1,81 @@
+from api_star.metrics import Metrics
+from api_star.renderers import prometheus_renderer
+import coreapi
+import threading
+
+
+def test_render():
+    metrics = Metrics(duration_buckets=(0.1, 1.0), size_buckets=(100,))
+    metrics.observe('list_users', 'GET', 200, 0.05, 0, 150)
+    metrics.observe('list_users', 'GET', 404, 0.5)
+    lines = metrics.render().splitlines()
+
+    assert 'api_star_requests_total{endpoint="list_users",method="GET"} 2' in lines
+    assert 'api_star_responses_total{endpoint="list_users",status="200"} 1' in lines
+    assert 'api_star_responses_total{endpoint="list_users",status="404"} 1' in lines
+    assert '# TYPE api_star_request_duration_seconds histogram' in lines
+    assert 'api_star_request_duration_seconds_bucket{endpoint="list_users",le="0.1"} 1' in lines
+    assert 'api_star_request_duration_seconds_bucket{endpoint="list_users",le="1.0"} 2' in lines
+    assert 'api_star_request_duration_seconds_bucket{endpoint="list_users",le="+Inf"} 2' in lines
+    assert 'api_star_request_duration_seconds_sum{endpoint="list_users"} 0.55' in lines
+    assert 'api_star_request_duration_seconds_count{endpoint="list_users"} 2' in lines
+    assert 'api_star_request_size_bytes_count{endpoint="list_users"} 1' in lines
+    assert 'api_star_response_size_bytes_bucket{endpoint="list_users",le="100"} 0' in lines
+    assert 'api_star_response_size_bytes_bucket{endpoint="list_users",le="+Inf"} 1' in lines
+
+
+def test_unrequested_endpoints():
+    metrics = Metrics()
+    metrics.links = {
+        'list_users': coreapi.Link(url='/users/', action='get'),
+        'admin': {'delete_user': coreapi.Link(url='/users/{id}/', action='delete')}
+    }
+    lines = metrics.render().splitlines()
+    assert 'api_star_requests_total{endpoint="list_users",method="GET"} 0' in lines
+    assert 'api_star_requests_total{endpoint="delete_user",method="DELETE"} 0' in lines
+
+
+def test_shards_are_merged():
+    metrics = Metrics()
+
+    def make_requests():
+        for idx in range(100):
+            metrics.observe('list_users', 'GET', 200, 0.001)
+
+    threads = [threading.Thread(target=make_requests) for idx in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    requests, responses, histograms = metrics.collect()
+    assert requests == {('list_users', 'GET'): 400}
+    assert responses == {('list_users', 200): 400}
+
+    metrics.clear()
+    assert metrics.collect() == ({}, {}, {})
+
+
+def test_finished_threads_are_retired():
+    metrics = Metrics()
+
+    def make_request():
+        metrics.observe('list_users', 'GET', 200, 0.001)
+
+    for idx in range(500):
+        thread = threading.Thread(target=make_request)
+        thread.start()
+        thread.join()
+        assert len(metrics._shards) <= 2
+
+    requests, responses, histograms = metrics.collect()
+    assert len(metrics._shards) == 0
+    assert requests == {('list_users', 'GET'): 500}
+    assert sum(histograms[('request_duration_seconds', 'list_users')][:-1]) == 500
+
+
+def test_prometheus_renderer():
+    metrics = Metrics()
+    renderer = prometheus_renderer()
+    assert renderer.media_type == 'text/plain'
+    assert renderer(metrics) == metrics.render()
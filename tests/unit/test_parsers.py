@@ -1,5 +1,8 @@
-from api_star.exceptions import BadRequest
-from api_star.parsers import json_parser, urlencoded_parser
+from api_star import json_backends
+from api_star.exceptions import BadRequest, RequestEntityTooLarge
+from api_star.parsers import (
+    iter_json_array, json_parser, multipart_parser, read_chunks, urlencoded_parser
+)
 from werkzeug import MultiDict
 import io
 import pytest
@@ -15,6 +18,95 @@ def test_json_parser():
         parser(stream)
 
 
+@pytest.mark.parametrize('backend', sorted(json_backends.backends.keys()))
+def test_json_parser_backends(backend):
+    parser = json_parser(backend=backend)
+    stream = io.BytesIO(u'{"hello":"\u2603","big":1180591620717411303424}'.encode('utf-8'))
+    assert parser(stream) == {"hello": u"\u2603", "big": 2 ** 70}
+
+    for content in (b'hello, world.', b'{"hello": "world"', b'"\xff"'):
+        with pytest.raises(BadRequest):
+            parser(io.BytesIO(content))
+
+
+def test_json_parser_max_body_size():
+    parser = json_parser(max_body_size=10)
+    assert parser(io.BytesIO(b'[1, 2, 3]')) == [1, 2, 3]
+
+    with pytest.raises(RequestEntityTooLarge):
+        parser(io.BytesIO(b'[1, 2, 3, 4, 5]'))
+    with pytest.raises(RequestEntityTooLarge):
+        parser(io.BytesIO(b''), content_length=11)
+
+
+class RecordingStream(io.BytesIO):
+    def __init__(self, content):
+        super(RecordingStream, self).__init__(content)
+        self.reads = []
+
+    def read(self, size=-1):
+        self.reads.append(size)
+        return super(RecordingStream, self).read(size)
+
+
+def test_json_parser_chunk_size(monkeypatch):
+    stream = RecordingStream(b'[1, 2, 3]')
+    assert json_parser(chunk_size=4)(stream) == [1, 2, 3]
+    assert set(stream.reads) == set([4])
+
+    # The module default is read when the parser is called.
+    monkeypatch.setattr('api_star.parsers.CHUNK_SIZE', 5)
+    stream = RecordingStream(b'[1, 2, 3]')
+    assert json_parser()(stream) == [1, 2, 3]
+    assert set(stream.reads) == set([5])
+
+
+def test_json_parser_max_depth():
+    # Small chunks split escapes and strings across chunk boundaries.
+    for chunk_size in (1, 2, 3, 4):
+        parser = json_parser(max_depth=2, chunk_size=chunk_size)
+        assert parser(io.BytesIO(b'[{"a": 1}, {"b": "[[[\\""}]')) == [{"a": 1}, {"b": '[[["'}]
+
+    parser = json_parser(max_depth=2, chunk_size=3)
+
+    with pytest.raises(BadRequest):
+        parser(io.BytesIO(b'[{"a": [1]}]'))
+    with pytest.raises(BadRequest):
+        parser(io.BytesIO(b'[' * 100000 + b']' * 100000))
+
+
+def test_json_parser_lazy():
+    content = u' [1, 234, "five, six]", {"seven": [8, "\\"}"]}, null, "\u2603"] '.encode('utf-8')
+    expected = [1, 234, 'five, six]', {'seven': [8, '"}']}, None, u'\u2603']
+    for chunk_size in (1, 2, 3, 4, 5, 64):
+        parser = json_parser(lazy=True, chunk_size=chunk_size)
+        assert list(parser(io.BytesIO(content))) == expected
+        assert list(parser(io.BytesIO(b'[]'))) == []
+        assert list(parser(io.BytesIO(b' [ ] '))) == []
+
+        for content_ in (b'{}', b'[1, 2', b'[1 2]', b'[1,]', b'[,1]', b'[1] 2', b'[nope]', b'[{"a": 1}}]', b'["\xff"]'):
+            with pytest.raises(BadRequest):
+                list(parser(io.BytesIO(content_)))
+
+
+@pytest.mark.parametrize('backend', sorted(json_backends.backends.keys()))
+def test_iter_json_array_decodes_each_item_once(backend):
+    backend = json_backends.get_backend(backend)
+    calls = []
+
+    class CountingBackend(object):
+        def loads(self, content):
+            calls.append(len(content))
+            return backend.loads(content)
+
+    item = b'{"values": [' + b','.join([b'"value"'] * 10000) + b']}'
+    chunks = read_chunks(io.BytesIO(b'[' + item + b', ' + item + b']'), chunk_size=16)
+    items = list(iter_json_array(chunks, CountingBackend()))
+    assert len(items) == 2
+    assert items[0] == {'values': ['value'] * 10000}
+    assert calls == [len(item), len(item)]
+
+
 def test_urlencoded_parser():
     parser = urlencoded_parser()
     stream = io.BytesIO(b'foo=1&bar=2')
@@ -23,3 +115,94 @@ def test_urlencoded_parser():
     parser = urlencoded_parser()
     stream = io.BytesIO(b'foo=1&foo=2')
     assert parser(stream) == MultiDict([("foo", "1"), ("foo", "2")])
+
+
+def get_multipart(file_content, message=b'hello'):
+    content = (
+        b'--boundary\r\n'
+        b'Content-Disposition: form-data; name="message"\r\n\r\n' +
+        message + b'\r\n'
+        b'--boundary\r\n'
+        b'Content-Disposition: form-data; name="upload"; filename="data.bin"\r\n'
+        b'Content-Type: application/octet-stream\r\n\r\n' +
+        file_content + b'\r\n'
+        b'--boundary--\r\n'
+    )
+    context = {
+        'content_type': 'multipart/form-data; boundary=boundary',
+        'content_length': len(content)
+    }
+    return io.BytesIO(content), context
+
+
+def test_multipart_parser():
+    parser = multipart_parser()
+    stream, context = get_multipart(b'x' * 1000)
+    data = parser(stream, **context)
+    assert data['message'] == 'hello'
+    assert data['upload'].filename == 'data.bin'
+    assert data['upload'].read() == b'x' * 1000
+
+
+def test_multipart_parser_spooling():
+    parser = multipart_parser(spool_size=100)
+    stream, context = get_multipart(b'x' * 50)
+    upload = parser(stream, **context)['upload']
+    assert not upload.stream._rolled
+    assert upload.read() == b'x' * 50
+
+    stream, context = get_multipart(b'x' * 500)
+    upload = parser(stream, **context)['upload']
+    assert upload.stream._rolled
+    assert upload.read() == b'x' * 500
+
+
+def test_multipart_parser_max_file_size():
+    parser = multipart_parser(max_file_size=100)
+    stream, context = get_multipart(b'x' * 100)
+    assert parser(stream, **context)['upload'].read() == b'x' * 100
+
+    stream, context = get_multipart(b'x' * 101)
+    with pytest.raises(RequestEntityTooLarge):
+        parser(stream, **context)
+
+
+def test_multipart_parser_max_body_size():
+    parser = multipart_parser(max_body_size=1000)
+    stream, context = get_multipart(b'x' * 500)
+    assert parser(stream, **context)['upload'].read() == b'x' * 500
+
+    stream, context = get_multipart(b'x' * 2000)
+    with pytest.raises(RequestEntityTooLarge):
+        parser(stream, **context)
+
+    # Content-Length is not trusted, the limit is also enforced when reading.
+    stream, context = get_multipart(b'x' * 2000)
+    context['content_length'] = None
+    with pytest.raises(RequestEntityTooLarge):
+        parser(stream, **context)
+
+
+def test_multipart_parser_sink():
+    class Sink(object):
+        def __init__(self):
+            self.chunks = []
+
+        def write(self, data):
+            self.chunks.append(data)
+
+    sinks = []
+
+    def sink(filename, content_type):
+        assert filename == 'data.bin'
+        assert content_type == 'application/octet-stream'
+        sinks.append(Sink())
+        return sinks[-1]
+
+    parser = multipart_parser(sink=sink, max_file_size=10 ** 6)
+    stream, context = get_multipart(b'x' * 300000)
+    data = parser(stream, **context)
+    assert data['message'] == 'hello'
+    assert len(sinks) == 1
+    assert len(sinks[0].chunks) > 1
+    assert b''.join(sinks[0].chunks) == b'x' * 300000
@@ -1,7 +1,18 @@
+from api_star import json_backends, utils
 from api_star.renderers import (
     json_renderer, corejson_renderer, docs_renderer, html_renderer
 )
 import coreapi
+import datetime
+import decimal
+import json
+import pytest
+import uuid
+
+try:
+    import enum
+except ImportError:
+    enum = None
 
 
 def test_json_renderer():
@@ -18,6 +29,106 @@ def test_json_renderer():
     )
 
 
+@pytest.mark.parametrize('backend', sorted(json_backends.backends.keys()))
+def test_json_renderer_backends(backend):
+    renderer = json_renderer(backend=backend)
+    data = {
+        'datetime': datetime.datetime(2001, 1, 1, 12, 0, tzinfo=utils.utc),
+        'date': datetime.date(2001, 1, 1),
+        'decimal': decimal.Decimal('1.5'),
+        'uuid': uuid.UUID('12345678123456781234567812345678'),
+        'link': coreapi.Link(url='/example/')
+    }
+    assert renderer(data) == json_renderer(backend='json')(data)
+
+    # Data that the faster backends do not handle is passed to the stdlib.
+    assert renderer({1: 2 ** 70}) == b'{"1":1180591620717411303424}'
+
+    renderer = json_renderer(verbose=True, backend=backend)
+    assert renderer({'hello': 'world'}) == b'{\n    "hello": "world"\n}'
+
+    with pytest.raises(TypeError):
+        renderer({'object': object()})
+
+
+if enum is not None:
+    class Color(enum.Enum):
+        red = 1
+
+
+@pytest.mark.skipif(enum is None, reason='enum is not available')
+@pytest.mark.parametrize('backend', sorted(json_backends.backends.keys()))
+def test_registered_encoders_apply_to_every_backend(backend):
+    data = {
+        'uuid': uuid.UUID('12345678123456781234567812345678'),
+        'datetime': datetime.datetime(2001, 1, 1, 12, 0),
+        'date': datetime.date(2001, 1, 1),
+        'color': Color.red
+    }
+    encoders = {
+        uuid.UUID: lambda obj: 'HEX:' + obj.hex,
+        datetime.datetime: lambda obj: 'DATETIME',
+        datetime.date: lambda obj: 'DATE',
+        Color: lambda obj: obj.name
+    }
+    originals = dict((cls, utils.json_encoders.get(cls)) for cls in encoders)
+    for cls, func in encoders.items():
+        utils.register_json_encoder(cls, func)
+    try:
+        content = json_renderer(backend=backend)(data)
+    finally:
+        for cls, func in originals.items():
+            if func is None:
+                del utils.json_encoders[cls]
+            else:
+                utils.json_encoders[cls] = func
+        utils._resolved_json_encoders.clear()
+    assert json.loads(content.decode('utf-8')) == {
+        'uuid': 'HEX:12345678123456781234567812345678',
+        'datetime': 'DATETIME',
+        'date': 'DATE',
+        'color': 'red'
+    }
+
+
+def test_json_renderer_stream():
+    for verbose in (False, True):
+        renderer = json_renderer(verbose=verbose)
+        for data in ([], [1], [{'a': [1, 2]}, 'b', None]):
+            chunks = list(renderer.stream(iter(data)))
+            assert b''.join(chunks) == renderer(data)
+
+
+def test_json_renderer_stream_chunks(monkeypatch):
+    monkeypatch.setattr('api_star.renderers.STREAM_CHUNK_SIZE', 10)
+    renderer = json_renderer()
+    chunks = list(renderer.stream('item %d' % idx for idx in range(5)))
+    assert len(chunks) == 3
+    assert b''.join(chunks) == b'["item 0","item 1","item 2","item 3","item 4"]'
+
+
+def test_json_renderer_preconvert():
+    data = [{
+        'datetime': datetime.datetime(2001, 1, 1, 12, 0, tzinfo=utils.utc),
+        'decimal': (decimal.Decimal('1.5'),),
+        'document': coreapi.Document(content={'link': coreapi.Link(url='/example/')})
+    }]
+    renderer = json_renderer(preconvert=True)
+    assert renderer(data) == json_renderer()(data)
+    assert b''.join(renderer.stream(iter(data))) == renderer(data)
+
+
+def test_default_json_backend():
+    # The faster backends differ in some output, so are only used when selected.
+    assert json_backends.get_backend().name == 'json'
+    assert json_renderer()({'nan': float('nan')}) == b'{"nan":NaN}'
+
+
+def test_unknown_json_backend():
+    with pytest.raises(RuntimeError):
+        json_renderer(backend='unknown')
+
+
 def test_corejson_renderer():
     doc = coreapi.Document(title='Example', content={'hello': 'world'})
 
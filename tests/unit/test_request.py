@@ -0,0 +1,52 @@
+from api_star.decorators import annotate
+from api_star.exceptions import NotAcceptable
+from api_star.request import _negotiate_renderer, renderer_cache
+import pytest
+
+
+def mock_renderer(media_type):
+    @annotate(media_type=media_type)
+    def renderer(data, **context):
+        return data
+    return renderer
+
+
+json = mock_renderer('application/json')
+html = mock_renderer('text/html')
+renderers = (json, html)
+
+
+def test_negotiate_renderer():
+    assert _negotiate_renderer(None, renderers) is json
+    assert _negotiate_renderer('*/*', renderers) is json
+    assert _negotiate_renderer('text/html', renderers) is html
+    assert _negotiate_renderer('text/*', renderers) is html
+    assert _negotiate_renderer('text/html, application/json', renderers) is json
+    assert _negotiate_renderer('text/*, application/json', (html, json)) is json
+    assert _negotiate_renderer('Text/HTML; charset=utf-8', renderers) is html
+
+    with pytest.raises(NotAcceptable):
+        _negotiate_renderer('image/png', renderers)
+
+
+def test_negotiate_renderer_quality():
+    assert _negotiate_renderer('application/json;q=0.5, text/html', renderers) is html
+    assert _negotiate_renderer('text/html;q=0.2, */*;q=0.1', renderers) is html
+    assert _negotiate_renderer('*/*;q=0.5, text/html;q=0.9', renderers) is html
+    assert _negotiate_renderer('application/json;q=0, */*', renderers) is html
+
+    with pytest.raises(NotAcceptable):
+        _negotiate_renderer('application/json;q=0', renderers)
+
+
+def test_negotiate_renderer_cache():
+    renderer_cache.clear()
+    hits, misses = renderer_cache.hits, renderer_cache.misses
+
+    assert _negotiate_renderer('text/html;q=0.9', renderers) is html
+    assert _negotiate_renderer('text/html;q=0.9', renderers) is html
+    assert _negotiate_renderer('text/html;q=0.9', [json, html]) is html
+    assert _negotiate_renderer('text/html;q=0.9', (html,)) is html
+
+    assert renderer_cache.hits - hits == 2
+    assert renderer_cache.misses - misses == 2
@@ -0,0 +1,132 @@
+from api_star import utils
+from api_star.utils import LRUCache
+import decimal
+import json
+import time
+
+
+def test_lru_cache():
+    cache = LRUCache(max_size=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+
+    # 'b' is the least recently used entry, so is evicted first.
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert len(cache) == 2
+    assert 'a' in cache and 'b' not in cache
+    assert cache.info() == {'hits': 3, 'misses': 1, 'size': 2, 'max_size': 2}
+
+    cache.delete('a')
+    assert cache.get('a', 'missing') == 'missing'
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_lru_cache_ttl():
+    cache = LRUCache(ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2, ttl=-1)
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert 'b' not in cache
+
+    cache = LRUCache(ttl=0.01)
+    cache.set('a', 1)
+    time.sleep(0.02)
+    assert cache.get('a') is None
+
+
+def test_lru_cache_on_evict():
+    evicted = []
+    cache = LRUCache(max_size=2, on_evict=evicted.append)
+    cache.set('a', 1)
+    cache.set('b', 2, ttl=-1)
+    cache.set('c', 3)
+    assert evicted == ['a']
+    assert cache.get('b') is None
+    assert evicted == ['a', 'b']
+    cache.delete('c')
+    assert evicted == ['a', 'b']
+
+
+datetimes = [
+    '2001-01-01T12:00', '2001-01-01 12:00:30', '2001-01-01T12:00:00.123456',
+    '2001-01-01T12:00:00Z', '2001-01-01T12:00:00.5Z', '2001-01-01T12:00+00:00',
+    '2001-01-01T12:00:00-01:30', '2001-01-01T12:00:00.123456+05:45',
+    '2001-01-01T12:00:00+0100', '2001-01-01T12:00:00-01', '2001-1-1T1:2:3',
+    '2001-01-01T12:00:00.1234567', '2001-01-01T12:00:00,123', '2001-02-30T12:00',
+    '2001-01-01T12:00:00+aa:bb', '2001-01-01X12:00', '20010101T120000', 'abc',
+    '2001-01-01T12:00:00.123', '2001-01-01T12:00:00.123Z', '2001-01-01T12:00:00.12345Z+01:00',
+    '2001-01-01T12:00:00.1+0456', '2001-01-01T12:00:00.12+01:00', '2001-01-01T12:00:00.1234+01:00'
+]
+dates = ['2001-01-01', '2001-1-1', '2001-02-30', '20010101', '2001-01-01T', 'abc']
+times = [
+    '12:00', '12:00:00', '12:00:00.123456', '12:00:00.1', '1:2', '25:00', '12:00abc', 'abc',
+    '12:00:00.123', '12:00:00.12345Z', '12:00:00.1+0456', '12:00:00.123+01', '12:00:00Z',
+    '12:00:00.1234', '12:00+01:00'
+]
+
+
+def parse_all(func, values, *args):
+    results = []
+    for value in values:
+        try:
+            parsed = func(value, *args)
+        except ValueError:
+            parsed = None
+        tzinfo = getattr(parsed, 'tzinfo', None)
+        results.append((parsed, tzinfo, type(tzinfo)))
+    return results
+
+
+def test_iso8601_fast_path_matches_regex(monkeypatch):
+    fast = [
+        parse_all(utils.parse_iso8601_datetime, datetimes),
+        parse_all(utils.parse_iso8601_datetime, datetimes, utils.utc),
+        parse_all(utils.parse_iso8601_date, dates),
+        parse_all(utils.parse_iso8601_time, times),
+    ]
+    monkeypatch.setattr(utils, 'date_fromisoformat', None)
+    monkeypatch.setattr(utils, 'time_fromisoformat', None)
+    monkeypatch.setattr(utils, 'datetime_fromisoformat', None)
+    slow = [
+        parse_all(utils.parse_iso8601_datetime, datetimes),
+        parse_all(utils.parse_iso8601_datetime, datetimes, utils.utc),
+        parse_all(utils.parse_iso8601_date, dates),
+        parse_all(utils.parse_iso8601_time, times),
+    ]
+    assert fast == slow
+
+
+def test_fixed_timezones_are_interned():
+    first = utils.parse_iso8601_datetime('2001-01-01T12:00:00+01:00')
+    second = utils.parse_iso8601_datetime('2002-01-01T12:00:00+01:00')
+    assert first.tzinfo is second.tzinfo
+    assert utils.get_fixed_timezone(60) is first.tzinfo
+    assert utils.parse_iso8601_datetime('2001-01-01T12:00:00Z').tzinfo is utils.utc
+
+
+class Money(object):
+    def __init__(self, amount):
+        self.amount = amount
+
+
+class Euros(Money):
+    pass
+
+
+def test_register_json_encoder():
+    assert utils.get_json_encoder(Euros) is None
+    utils.register_json_encoder(Money, lambda obj: {'amount': obj.amount})
+    try:
+        assert utils.get_json_encoder(Euros) is utils.json_encoders[Money]
+        assert utils.to_json_primitives([Euros(decimal.Decimal('1.5'))]) == [{'amount': 1.5}]
+        encoded = json.dumps({'price': Money(2)}, cls=utils.JSONEncoder)
+        assert encoded == '{"price": {"amount": 2}}'
+    finally:
+        del utils.json_encoders[Money]
+        utils._resolved_json_encoders.clear()
@@ -309,3 +309,44 @@ def test_object_of():
         ({'integer': 'abc', 'boolean': True}, {'integer': validators.errors['value'].format(type_name='integer')}),
         ('foo', validators.errors['type'].format(type_name='object'))
     ])
+
+
+def test_nested_object_of():
+    validator = validators.list_of(validators.object_of({
+        'id': validators.integer(),
+        'tags': validators.optional(validators.list_of(validators.text())),
+        'score': validators.optional(validators.number(), default=None)
+    }))
+    valid(validator, [
+        ([{'id': '1'}], [{'id': 1, 'score': None}]),
+        ([{'id': 1, 'tags': [' a ']}], [{'id': 1, 'tags': ['a'], 'score': None}]),
+    ])
+    invalid(validator, [
+        ([{'id': 1}, {'id': 'abc'}], {1: {'id': validators.errors['value'].format(type_name='integer')}}),
+    ])
+
+
+def test_compile_spec():
+    integer = validators.integer()
+    text = validators.optional(validators.text(), default='')
+    plan = validators.compile_spec({'a': integer})
+    assert plan == (('a', integer, validators.required),)
+    plan = validators.compile_spec({'b': text})
+    assert plan == (('b', text, ''),)
+
+
+def test_validate_many():
+    spec = {'id': validators.integer()}
+    validated, invalid = validators.validate_many(spec, [{'id': '1'}, {'id': 'abc'}, {}, {'id': 4}])
+    assert validated == [{'id': 1}, {'id': 4}]
+    assert invalid == {
+        1: {'id': validators.errors['value'].format(type_name='integer')},
+        2: {'id': validators.errors['required']}
+    }
+
+    validated, invalid = validators.validate_many(validators.integer(), ['1', '2'])
+    assert validated == [1, 2]
+    assert invalid == {}
+
+    with pytest.raises(validators.ValidationError):
+        validators.validate_many(spec, 'foo')